@@ -0,0 +1,227 @@
+"""
+AI Assistant Action Executor
+Side effects (opening the browser, playing media) run off the request path
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+import webbrowser
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OPEN_URL = "open_url"
+OPEN_FILE = "open_file"
+
+
+class Action:
+    """A side effect described as data: what to do and to what
+
+    Actions with the same kind and target are the same action, which is
+    what deduplication is based on. failure is the message reported to the
+    user if the action doesn't succeed.
+    """
+
+    def __init__(self, kind: str, target: str, failure: str = ""):
+        self.kind = kind
+        self.target = target
+        self.failure = failure
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.kind, self.target
+
+    def __eq__(self, other):
+        return isinstance(other, Action) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'kind': self.kind, 'target': self.target}
+
+    def __repr__(self):
+        return f"Action({self.kind!r}, {self.target!r})"
+
+
+class ActionResult:
+    """Outcome of an action, passed to every subscriber"""
+
+    def __init__(self, action: Action, ok: bool, error: Optional[str] = None,
+                 elapsed: float = 0.0):
+        self.action = action
+        self.ok = ok
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"ActionResult({self.action!r}, ok={self.ok}, error={self.error!r})"
+
+
+def open_in_browser(action: Action, timeout: float) -> bool:
+    """Open action.target with the webbrowser module
+
+    Some launchers (xdg-open and friends) are waited on, so the call runs
+    on its own thread and is abandoned after timeout; the launcher keeps
+    running and the browser may still open.
+    """
+    outcome: Dict[str, Any] = {}
+
+    def run():
+        try:
+            outcome['ok'] = webbrowser.open(action.target)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, name="browser-launcher", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"browser launcher still running after {timeout:.0f}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return bool(outcome.get('ok'))
+
+
+def open_with_default_app(action: Action, timeout: float) -> bool:
+    """Open the file action.target with the platform's default application
+
+    A launcher that is still running after timeout is taken as success:
+    some players stay attached to it while they play.
+    """
+    if sys.platform.startswith('win'):
+        os.startfile(action.target)
+        return True
+    command = ['open' if sys.platform == 'darwin' else 'xdg-open', action.target]
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        return process.wait(timeout) == 0
+    except subprocess.TimeoutExpired:
+        return True
+
+
+class StubLauncher:
+    """Launcher that records actions instead of performing them (tests, benchmarks)"""
+
+    def __init__(self, result: bool = True, delay: float = 0.0):
+        self.result = result
+        self.delay = delay
+        self.actions: List[Action] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, action: Action, timeout: float) -> bool:
+        if self.delay:
+            time.sleep(min(self.delay, timeout))
+            if self.delay > timeout:
+                raise TimeoutError(f"stub launcher took longer than {timeout}s")
+        with self._lock:
+            self.actions.append(action)
+        return self.result
+
+
+class ActionExecutor:
+    """Run actions on a small thread pool with per-action timeouts
+
+    submit() returns at once; completion or failure is reported to
+    subscribers on the pool thread. An action that is already queued or
+    running, or that finished within dedupe_window seconds, is not run
+    again (a repeated "open github" opens one tab). At most max_pending
+    actions may wait; further ones are rejected rather than queued behind
+    a stuck launcher.
+    """
+
+    def __init__(self, launchers: Optional[Dict[str, Callable[[Action, float], bool]]] = None,
+                 workers: int = 2, max_pending: int = 16, timeout: float = 10.0,
+                 dedupe_window: float = 2.0):
+        self.launchers = {OPEN_URL: open_in_browser, OPEN_FILE: open_with_default_app}
+        if launchers:
+            self.launchers.update(launchers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.dedupe_window = dedupe_window
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="action")
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._recent: Dict[Tuple[str, str], Tuple[float, Future]] = {}
+        self._listeners: List[Callable[[ActionResult], None]] = []
+        self.counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'timed_out': 0,
+                         'deduplicated': 0, 'rejected': 0}
+
+    def subscribe(self, listener: Callable[[ActionResult], None]):
+        """Call listener(result) whenever an action finishes"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[ActionResult], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def submit(self, action: Action) -> Optional[Future]:
+        """Queue an action; returns a Future of its ActionResult, or None if rejected"""
+        if action.kind not in self.launchers:
+            raise ValueError(f"No launcher for action kind {action.kind!r}")
+        now = time.monotonic()
+        with self._lock:
+            future = self._inflight.get(action.key)
+            if future is None:
+                recent = self._recent.get(action.key)
+                if recent and now - recent[0] < self.dedupe_window:
+                    future = recent[1]
+            if future is not None:
+                self.counters['deduplicated'] += 1
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.counters['rejected'] += 1
+                logger.warning(f"Too many pending actions; dropped {action!r}")
+                return None
+            self.counters['submitted'] += 1
+            future = self._pool.submit(self._run, action)
+            self._inflight[action.key] = future
+        return future
+
+    def batch(self, actions: Iterable[Action]) -> List[Optional[Future]]:
+        """Submit several actions; duplicates within the batch run once"""
+        return [self.submit(action) for action in actions]
+
+    def _run(self, action: Action) -> ActionResult:
+        start = time.monotonic()
+        try:
+            ok = self.launchers[action.kind](action, self.timeout)
+            result = ActionResult(action, bool(ok), None if ok else "launcher reported failure",
+                                  time.monotonic() - start)
+        except TimeoutError as e:
+            self.counters['timed_out'] += 1
+            result = ActionResult(action, False, str(e), time.monotonic() - start)
+        except Exception as e:
+            result = ActionResult(action, False, str(e), time.monotonic() - start)
+
+        self.counters['succeeded' if result.ok else 'failed'] += 1
+        with self._lock:
+            future = self._inflight.pop(action.key, None)
+            if future is not None:
+                now = time.monotonic()
+                self._recent = {key: value for key, value in self._recent.items()
+                                if now - value[0] < self.dedupe_window}
+                self._recent[action.key] = (now, future)
+        if not result.ok:
+            logger.error(f"Action {action.kind} {action.target} failed: {result.error}")
+
+        for listener in list(self._listeners):
+            try:
+                listener(result)
+            except Exception as e:
+                logger.error(f"Action listener failed: {e}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, 'pending': len(self._inflight)}
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting actions; running launchers are not interrupted"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,227 @@
+"""
+AI Assistant Async Core
+asyncio front end for AIAssistant using the AsyncOpenAI client
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ai_assistant_metrics import TRACER
+from ai_assistant_transport import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAssistant:
+    """Run assistant turns on an event loop instead of one thread per request
+
+    Wraps an existing AIAssistant and shares its config, router and response
+    cache. Each coroutine accepts a timeout and can be cancelled; pass a
+    separate history list per conversation to serve several at once.
+    Local command handlers run on executor (the loop's default if None).
+    """
+
+    def __init__(self, assistant, default_timeout: Optional[float] = 30.0,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.assistant = assistant
+        self.default_timeout = default_timeout
+        self.executor = executor
+        self._client = None
+        self._generation = None
+        # Closes of replaced clients still waiting (the loop keeps weak references)
+        self._closing = set()
+
+        # Microphone capture gets its own thread so it never waits behind
+        # local command handlers on the default executor
+        self._listen_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mic")
+
+    @property
+    def client(self):
+        """AsyncOpenAI client, recreated when the key or endpoint changes in the config"""
+        if self._generation != self.assistant.client_generation:
+            self._generation = self.assistant.client_generation
+            if self._client is not None:
+                self._retire(self._client)
+            self._client = None
+            if self.assistant.ai_enabled:
+                try:
+                    from openai import AsyncOpenAI
+                    self._client = AsyncOpenAI(**self.assistant.openai_client_options(async_client=True))
+                except Exception as e:
+                    logger.error(f"AsyncOpenAI initialization failed: {e}")
+        return self._client
+
+    def _retire(self, client):
+        """Close a replaced client once calls still running on it have had their deadline"""
+        async def close():
+            await asyncio.sleep(self.assistant.transport.deadline + 1)
+            try:
+                await client.close()
+            except Exception as e:
+                logger.error(f"Failed to close AsyncOpenAI client: {e}")
+        try:
+            task = asyncio.get_running_loop().create_task(close())
+        except RuntimeError:
+            # No running loop, so no call can still be using the old client
+            try:
+                asyncio.run(client.close())
+            except Exception as e:
+                logger.error(f"Failed to close AsyncOpenAI client: {e}")
+            return
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return self.default_timeout if timeout is None else timeout
+
+    async def ask_openai(self, query: str, history: Optional[list] = None,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         timeout: Optional[float] = None, session=None) -> str:
+        """Query OpenAI without blocking the event loop
+
+        session (a Session) supplies the history and model settings;
+        history, if given, overrides its history. Both default to the
+        wrapped assistant's local session. On timeout or cancellation the
+        unanswered user message is removed from history.
+        """
+        if not self.client:
+            return "OpenAI is not configured. Please set your API key using: python ai_assistant.py --config"
+
+        if session is None:
+            session = self.assistant.session
+        if history is None:
+            history = session.history
+        messages, model, cache_key = self.assistant.prepare_chat(query, history, session)
+        user_message = history[-1]
+
+        answer = self.assistant.response_cache.get(cache_key)
+        if answer is not None:
+            if on_token:
+                on_token(answer)
+            history.append({"role": "assistant", "content": answer})
+            return answer
+
+        options = self.assistant.completion_options(session)
+
+        async def complete(emit: Optional[Callable[[str], None]]) -> str:
+            with TRACER.span('openai.request'):
+                return await self._complete(model, messages, emit, options)
+
+        try:
+            # Identical requests already in flight share one upstream call
+            answer, shared = await asyncio.wait_for(
+                self.assistant.inflight.ado(cache_key, complete, on_token),
+                self._timeout(timeout)
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            for i in range(len(history) - 1, -1, -1):
+                if history[i] is user_message:
+                    del history[i]
+                    break
+            raise
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            return "The AI service is having trouble right now. Please try again in a moment."
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+
+        if answer and not shared:
+            self.assistant.response_cache.put(cache_key, answer)
+        history.append({"role": "assistant", "content": answer})
+        return answer
+
+    async def _complete(self, model: str, messages: list,
+                        on_token: Optional[Callable[[str], None]],
+                        options: Dict[str, Any]) -> str:
+        """Run one chat completion, streaming tokens to on_token if given"""
+        if not on_token:
+            response = await self.assistant.transport.acall(
+                self.client.chat.completions.create,
+                model=model,
+                messages=messages,
+                **options
+            )
+            return response.choices[0].message.content.strip()
+
+        start = time.perf_counter()
+        stream = await self.assistant.transport.acall(
+            self.client.chat.completions.create,
+            model=model,
+            messages=messages,
+            stream=True,
+            **options
+        )
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                if not parts:
+                    TRACER.record('openai.first_token', time.perf_counter() - start)
+                parts.append(token)
+                on_token(token)
+        return "".join(parts).strip()
+
+    async def process_command(self, query: str, history: Optional[list] = None,
+                              on_token: Optional[Callable[[str], None]] = None,
+                              timeout: Optional[float] = None,
+                              session=None) -> Optional[str]:
+        """Route a command; AI queries are awaited, local commands run off-loop"""
+        if not query:
+            return None
+
+        query = query.lower().strip()
+        with TRACER.span('route'):
+            match = self.assistant.router.route(query)
+        if match is None:
+            return None
+
+        if match.rule.name == 'chat' and self.client:
+            return await self.ask_openai(query, history, on_token, timeout, session)
+
+        match.context = {'session': session}
+        # Local handlers may open a browser, so keep them off the event loop
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self.executor, match.rule.handler, match),
+            self._timeout(timeout)
+        )
+
+    async def listen(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Capture and recognize one voice query"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._listen_executor, self.assistant.listen),
+            self._timeout(timeout)
+        )
+
+    async def speak(self, text: str, print_text: bool = True,
+                    timeout: Optional[float] = None):
+        """Queue text on the speech worker and wait until it has been spoken
+
+        Cancelling or timing out interrupts the speech.
+        """
+        utterance = self.assistant.speak(text, print_text, wait=False)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(
+                loop.run_in_executor(None, utterance.wait),
+                self._timeout(timeout)
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            self.assistant.speech.interrupt()
+            raise
+
+    async def close(self):
+        """Close the async client and worker threads"""
+        if self._client:
+            try:
+                await self._client.close()
+            except Exception as e:
+                logger.error(f"Failed to close AsyncOpenAI client: {e}")
+        self._listen_executor.shutdown(wait=False)
@@ -0,0 +1,237 @@
+"""
+AI Assistant Audio Cache
+Pre-rendered speech for fixed phrases, played back without synthesis
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import hashlib
+import threading
+import subprocess
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Config keys that change how a phrase sounds
+VOICE_SETTINGS = ('voice_index', 'voice_rate', 'voice_volume')
+
+# Command-line players tried in order on Linux/BSD (macOS uses afplay)
+PLAYERS = (
+    ('paplay',),
+    ('aplay', '-q'),
+    ('ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet'),
+    ('play', '-q'),
+)
+
+
+def voice_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of the config that an audio cache key depends on"""
+    return {name: config.get(name) for name in VOICE_SETTINGS}
+
+
+class AudioPlayer:
+    """Play a WAV file and allow it to be stopped from another thread
+
+    Uses winsound on Windows and the first command-line player found
+    elsewhere. available is False when there is no way to play files.
+    """
+
+    def __init__(self):
+        self.command: Optional[List[str]] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        if sys.platform == 'win32':
+            self.command = ['winsound']
+        elif sys.platform == 'darwin':
+            if shutil.which('afplay'):
+                self.command = ['afplay']
+        else:
+            for player in PLAYERS:
+                if shutil.which(player[0]):
+                    self.command = list(player)
+                    break
+
+    @property
+    def available(self) -> bool:
+        return self.command is not None
+
+    def play(self, path: Path) -> bool:
+        """Play a file to the end; returns False if it failed or was stopped"""
+        if not self.available:
+            return False
+        self._stopped.clear()
+        try:
+            if self.command == ['winsound']:
+                return self._play_winsound(path)
+            with self._lock:
+                self._process = subprocess.Popen(self.command + [str(path)],
+                                                 stdin=subprocess.DEVNULL,
+                                                 stdout=subprocess.DEVNULL,
+                                                 stderr=subprocess.DEVNULL)
+            code = self._process.wait()
+            return code == 0 and not self._stopped.is_set()
+        except Exception as e:
+            logger.error(f"Audio playback failed: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._process = None
+
+    def _play_winsound(self, path: Path) -> bool:
+        """Play asynchronously so stop() can cut the sound short"""
+        import winsound
+        with wave.open(str(path), 'rb') as wav:
+            duration = wav.getnframes() / float(wav.getframerate() or 1)
+        winsound.PlaySound(str(path), winsound.SND_FILENAME | winsound.SND_ASYNC)
+        if self._stopped.wait(duration):
+            winsound.PlaySound(None, 0)
+            return False
+        return True
+
+    def stop(self):
+        """Stop the file currently playing, if any"""
+        self._stopped.set()
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                try:
+                    self._process.terminate()
+                except Exception as e:
+                    logger.error(f"Failed to stop playback: {e}")
+
+
+class AudioCache:
+    """Size-bounded directory of rendered phrases
+
+    Files are named by a hash of the text and voice settings, so changing
+    the voice simply misses the old files, which age out. The least
+    recently played files are deleted once the directory grows beyond
+    max_bytes.
+    """
+
+    SUFFIX = ".wav"
+
+    def __init__(self, directory: Path, max_bytes: int = 50 * 1024 * 1024,
+                 voice: Optional[Dict[str, Any]] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.voice = voice or {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (size, last used); rebuilt from the directory at startup
+        self._entries: Dict[str, List[float]] = {}
+
+        # Renders interrupted by a crash; tts-<key>.part.wav would also
+        # match the glob below
+        for path in self.directory.glob("tts-*.part*"):
+            path.unlink(missing_ok=True)
+        for path in self.directory.glob(f"tts-*{self.SUFFIX}"):
+            if path.name.endswith(".part" + self.SUFFIX):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            self._entries[path.stem[4:]] = [stat.st_size, stat.st_mtime]
+
+    def key(self, text: str) -> str:
+        payload = json.dumps([" ".join(text.split()), self.voice], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"tts-{key}{self.SUFFIX}"
+
+    def get(self, text: str) -> Optional[Path]:
+        """Return the rendered file for text, or None"""
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[1] = time.time()
+            self.hits += 1
+        path = self.path_for(key)
+        try:
+            # mtime doubles as the last-played time across restarts
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return path
+
+    def contains(self, text: str) -> bool:
+        with self._lock:
+            return self.key(text) in self._entries
+
+    def render(self, text: str, engine) -> Optional[Path]:
+        """Synthesize text to a file with a pyttsx3 engine (speech worker only)
+
+        The file is written under a temporary name and renamed, so a
+        half-written render is never played.
+        """
+        key = self.key(text)
+        path = self.path_for(key)
+        partial = self.directory / f"tts-{key}.part{self.SUFFIX}"
+        try:
+            engine.save_to_file(text, str(partial))
+            engine.runAndWait()
+            size = partial.stat().st_size
+            if size == 0:
+                raise OSError("engine wrote an empty file")
+            os.replace(partial, path)
+        except Exception as e:
+            logger.error(f"Failed to render speech for cache: {e}")
+            partial.unlink(missing_ok=True)
+            return None
+
+        with self._lock:
+            self._entries[key] = [size, time.time()]
+        self._evict()
+        return path
+
+    def _evict(self):
+        """Delete least recently used files until under max_bytes"""
+        with self._lock:
+            total = sum(size for size, _ in self._entries.values())
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+                del self._entries[key]
+        for key in victims:
+            self.path_for(key).unlink(missing_ok=True)
+        logger.debug(f"Evicted {len(victims)} cached phrases")
+
+    def missing(self, phrases: Iterable[str]) -> List[str]:
+        """Phrases that still need rendering, without duplicates"""
+        seen = set()
+        result = []
+        for text in phrases:
+            if text and text not in seen and not self.contains(text):
+                seen.add(text)
+                result.append(text)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': int(sum(size for size, _ in self._entries.values())),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,805 @@
+#!/usr/bin/env python3
+"""
+AI Assistant Benchmark Suite
+Offline benchmarks with fake TTS, WAV-backed microphone and local OpenAI/Wikipedia stand-ins
+
+Usage:
+  python ai_assistant_bench.py                     # Run everything, print JSON
+  python ai_assistant_bench.py --quick -o out.json # Smaller runs, write to file
+  python ai_assistant_bench.py --compare base.json # Exit 1 on regressions
+  python ai_assistant_bench.py --only startup      # Exit 1 if startup is over budget
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import array
+import shutil
+import platform
+import tempfile
+import threading
+import statistics
+import importlib.util
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+
+from ai_assistant_metrics import TRACER
+from ai_assistant_profile import DEFAULT_STARTUP_BUDGET_MS
+
+# speech_recognition only accepts subclasses of its AudioSource
+try:
+    from speech_recognition import AudioSource as _AudioSourceBase
+except ImportError:
+    _AudioSourceBase = object
+
+# Benchmarks whose primary metric is a throughput (higher is better)
+THROUGHPUT_METRIC = "ops_per_sec"
+LATENCY_METRIC = "p50_ms"
+
+
+# ---------------------------------------------------------------------------
+# Fakes
+# ---------------------------------------------------------------------------
+
+class TimingTTSEngine:
+    """pyttsx3-compatible engine that records calls and optionally simulates playback time"""
+
+    def __init__(self, chars_per_second: float = 0):
+        self.chars_per_second = chars_per_second
+        self.properties = {'rate': 175, 'volume': 0.9, 'voices': [], 'voice': None}
+        self.spoken: List[tuple] = []
+        self._pending: List[str] = []
+        self._stop = threading.Event()
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def say(self, text):
+        self._pending.append(text)
+
+    def runAndWait(self):
+        self._stop.clear()
+        for text in self._pending:
+            self.spoken.append((time.perf_counter(), text))
+            if self.chars_per_second:
+                self._stop.wait(len(text) / self.chars_per_second)
+        self._pending = []
+
+    def stop(self):
+        self._stop.set()
+
+
+def write_wav_fixture(path: Path, seconds_silence: float = 0.3, seconds_tone: float = 1.0,
+                      sample_rate: int = 16000):
+    """Write a mono 16-bit WAV with silence, a tone (the "speech") and silence"""
+    samples = array.array('h')
+    silence = int(seconds_silence * sample_rate)
+    samples.extend([0] * silence)
+    for i in range(int(seconds_tone * sample_rate)):
+        samples.append(int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate)))
+    samples.extend([0] * silence * 3)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+class WavMicrophone(_AudioSourceBase):
+    """AudioSource that plays a WAV file as if it were a microphone"""
+
+    CHUNK = 1024
+
+    def __init__(self, path: Path, realtime: bool = False, device_index=None):
+        self.path = path
+        self.realtime = realtime
+        self.stream = None
+
+    def __enter__(self):
+        self._wav = wave.open(str(self.path), 'rb')
+        self.SAMPLE_RATE = self._wav.getframerate()
+        self.SAMPLE_WIDTH = self._wav.getsampwidth()
+        self.stream = self
+        return self
+
+    def read(self, size: int) -> bytes:
+        data = self._wav.readframes(size)
+        if self.realtime:
+            time.sleep(size / self.SAMPLE_RATE)
+        if len(data) < size * self.SAMPLE_WIDTH:
+            # Keep producing silence once the fixture runs out
+            data += b"\0" * (size * self.SAMPLE_WIDTH - len(data))
+        return data
+
+    def __exit__(self, *exc):
+        self._wav.close()
+        self.stream = None
+
+
+def make_fixture_backend(transcript: str, delay: float):
+    """Recognition backend returning a fixed transcript after a fixed delay"""
+    from ai_assistant_recognition import RecognitionBackend
+
+    class FixtureBackend(RecognitionBackend):
+        name = "fixture"
+        offline = True
+
+        def _recognize(self, audio):
+            time.sleep(delay)
+            return transcript, 0.95
+
+    return FixtureBackend
+
+
+# ---------------------------------------------------------------------------
+# Local OpenAI-compatible stand-in
+# ---------------------------------------------------------------------------
+
+REPLY_TEXT = ("Python is a popular programming language. It is known for readable syntax. "
+              "Many people use it for data science, automation and web development. "
+              "It has a large standard library and a friendly community.")
+
+
+class FakeOpenAIServer:
+    """Minimal /v1/chat/completions server with configurable latency and token rate"""
+
+    def __init__(self, first_token_latency: float = 0.2, tokens_per_second: float = 50):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+                tokens = [w + " " for w in REPLY_TEXT.split(" ")]
+                model = body.get('model', 'gpt-3.5-turbo')
+                time.sleep(server.first_token_latency)
+
+                if body.get('stream'):
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.end_headers()
+                    for token in tokens:
+                        chunk = {
+                            'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk',
+                            'created': int(time.time()), 'model': model,
+                            'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                        time.sleep(1 / server.tokens_per_second)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+
+                time.sleep(len(tokens) / server.tokens_per_second)
+                payload = json.dumps({
+                    'id': 'chatcmpl-bench', 'object': 'chat.completion',
+                    'created': int(time.time()), 'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': REPLY_TEXT}}],
+                    'usage': {'prompt_tokens': 10, 'completion_tokens': len(tokens),
+                              'total_tokens': 10 + len(tokens)}
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+WIKI_ARTICLES = {
+    "Ada Lovelace": "Augusta Ada King, Countess of Lovelace was an English mathematician and writer. "
+                    "She is chiefly known for her work on Charles Babbage's Analytical Engine.",
+    "Charles Babbage": "Charles Babbage was an English polymath. He originated the concept of a "
+                       "digital programmable computer.",
+    "Albert Einstein": "Albert Einstein was a German-born theoretical physicist. He developed the "
+                       "theory of relativity.",
+    "Marie Curie": "Marie Curie was a Polish and naturalised-French physicist and chemist. She was "
+                   "the first woman to win a Nobel Prize.",
+    "Alan Turing": "Alan Mathison Turing was an English mathematician and computer scientist. He "
+                   "formalised the concepts of algorithm and computation.",
+    "Grace Hopper": "Grace Brewster Hopper was an American computer scientist and United States Navy "
+                    "rear admiral. She was a pioneer of computer programming.",
+}
+
+
+class FakeWikipediaServer:
+    """Minimal MediaWiki search + REST summary server with configurable latency
+
+    summary_delay is added to summary requests only, to simulate summaries
+    timing out after a successful search.
+    """
+
+    def __init__(self, latency: float = 0.15, summary_delay: float = 0.0):
+        self.latency = latency
+        self.summary_delay = summary_delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                from urllib.parse import parse_qs, unquote, urlsplit
+                server.requests += 1
+                time.sleep(server.latency)
+                url = urlsplit(self.path)
+                if url.path == "/w/api.php":
+                    words = set(parse_qs(url.query).get('srsearch', [''])[0].lower().split())
+                    hits = [title for title in WIKI_ARTICLES
+                            if words & set(title.lower().split())]
+                    payload = {'query': {'search': [{'title': t} for t in hits[:3]]}}
+                elif url.path.startswith("/api/rest_v1/page/summary/"):
+                    time.sleep(server.summary_delay)
+                    title = unquote(url.path.rsplit("/", 1)[1]).replace("_", " ")
+                    if title not in WIKI_ARTICLES:
+                        self.send_error(404)
+                        return
+                    payload = {'type': 'standard', 'title': title, 'extract': WIKI_ARTICLES[title],
+                               'content_urls': {'desktop': {'page': f"https://example.org/{title}"}}}
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ms = sorted(s * 1000 for s in samples)
+
+    def pct(p):
+        return ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))]
+
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.mean(ms), 4),
+        'p50_ms': round(pct(50), 4),
+        'p95_ms': round(pct(95), 4),
+        'p99_ms': round(pct(99), 4),
+        'min_ms': round(ms[0], 4),
+        'max_ms': round(ms[-1], 4),
+    }
+
+
+def load_assistant_module():
+    """Import virtual-assistant.py (its file name isn't a valid module name)"""
+    spec = importlib.util.spec_from_file_location("virtual_assistant", HERE / "virtual-assistant.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_assistant(module, **config):
+    """Create an assistant with a no-op TTS engine, stub browser and given config"""
+    from ai_assistant_speech import SpeechWorker
+    from ai_assistant_transport import OpenAITransport
+    from ai_assistant_actions import OPEN_FILE, OPEN_URL, StubLauncher
+    assistant = module.AIAssistant(use_gui=False, mute=True)
+    assistant.config.update(config)
+    assistant.transport = OpenAITransport.from_config(assistant.config)
+    assistant.speech = SpeechWorker(TimingTTSEngine)
+    assistant.actions.launchers[OPEN_URL] = StubLauncher()
+    assistant.actions.launchers[OPEN_FILE] = StubLauncher()
+    assistant.open_stores()
+    return assistant
+
+
+def skipped(reason: str) -> Dict[str, Any]:
+    return {'skipped': reason}
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+COMMAND_CORPUS = [
+    "what time is it", "what's the date today", "help", "open github",
+    "search for python tutorials", "youtube lofi beats", "google weather tomorrow",
+    "sometimes i wonder about things", "open reddit please", "look up the news",
+]
+
+
+def bench_startup(runs: int, budget_ms: float) -> Dict[str, Any]:
+    """Cold start (--startup-profile) in a fresh interpreter, against the startup budget"""
+    import re
+    import subprocess
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')
+    samples = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, str(HERE / "virtual-assistant.py"), "--startup-profile",
+             "--startup-budget", "1e9"],
+            capture_output=True, text=True, encoding='utf-8', errors='replace',
+            env=env, timeout=120)
+        found = re.search(r"Startup took (\d+) ms", process.stdout)
+        if process.returncode or not found:
+            return skipped(f"--startup-profile failed: {process.stderr.strip()[-200:]}")
+        samples.append(float(found.group(1)) / 1000)
+    result = summarize(samples)
+    result['budget_ms'] = budget_ms
+    # The median, so one slow run on a busy machine doesn't fail the check
+    result['over_budget'] = result['p50_ms'] > budget_ms
+    return result
+
+
+def bench_router(module, iterations: int) -> Dict[str, Any]:
+    """Routing only: tokenize + trie scan + rule selection"""
+    assistant = make_assistant(module)
+    router = assistant.router
+    samples = []
+    for i in range(iterations):
+        query = COMMAND_CORPUS[i % len(COMMAND_CORPUS)]
+        start = time.perf_counter()
+        router.route(query)
+        samples.append(time.perf_counter() - start)
+    assistant.shutdown()
+    result = summarize(samples)
+    result[THROUGHPUT_METRIC] = round(len(samples) / sum(samples), 1)
+    return result
+
+
+def bench_process_command(module, iterations: int) -> Dict[str, Any]:
+    """Full process_command on local commands (no network)"""
+    assistant = make_assistant(module, openai_api_key='')
+    samples = []
+    for i in range(iterations):
+        query = COMMAND_CORPUS[i % len(COMMAND_CORPUS)]
+        start = time.perf_counter()
+        assistant.process_command(query)
+        samples.append(time.perf_counter() - start)
+    assistant.shutdown()
+    result = summarize(samples)
+    result[THROUGHPUT_METRIC] = round(len(samples) / sum(samples), 1)
+    return result
+
+
+def bench_ask_openai(module, iterations: int, server: Optional[FakeOpenAIServer]) -> Dict[str, Any]:
+    """End-to-end ask_openai against the local stand-in, blocking and streamed"""
+    if server is None:
+        return skipped("openai package not installed")
+
+    assistant = make_assistant(module, openai_api_key='bench', openai_base_url=server.base_url,
+                               cache_max_entries=0)
+    blocking, first_token, first_audio, total = [], [], [], []
+    from ai_assistant_streaming import StreamingSpeaker
+
+    for i in range(iterations):
+        assistant.new_session()
+        start = time.perf_counter()
+        assistant.ask_openai(f"benchmark question {i}")
+        blocking.append(time.perf_counter() - start)
+
+    for i in range(iterations):
+        assistant.new_session()
+        speaker = StreamingSpeaker(assistant.speech)
+        marks = {}
+
+        def on_token(token):
+            marks.setdefault('first', time.perf_counter())
+            speaker.feed(token)
+
+        start = time.perf_counter()
+        assistant.ask_openai(f"streamed question {i}", on_token=on_token)
+        speaker.finish(wait=True)
+        total.append(time.perf_counter() - start)
+        first_token.append(marks['first'] - start)
+        engine_spoken = assistant.speech.engine.spoken
+        spoken_at = next((t for t, _ in engine_spoken if t >= start), None)
+        if spoken_at is not None:
+            first_audio.append(spoken_at - start)
+        engine_spoken.clear()
+
+    assistant.shutdown()
+    return {
+        'blocking': summarize(blocking),
+        'stream_first_token': summarize(first_token),
+        'stream_first_audio': summarize(first_audio) if first_audio else skipped("nothing spoken"),
+        'stream_total': summarize(total),
+        'server': {'first_token_latency_s': server.first_token_latency,
+                   'tokens_per_second': server.tokens_per_second},
+    }
+
+
+def bench_history(module, sizes: List[int]) -> Dict[str, Any]:
+    """Per-call history cost (append + build request) as the session grows"""
+    from ai_assistant_memory import ConversationMemory
+    results = {}
+    for size in sizes:
+        memory = ConversationMemory(3000, max_messages=10)
+        for i in range(size):
+            memory.append({"role": "user" if i % 2 == 0 else "assistant",
+                           "content": f"Message {i}. " + "words " * 30})
+        samples = []
+        for i in range(200):
+            start = time.perf_counter()
+            memory.append({"role": "user", "content": f"Query {i} about something"})
+            memory.context()
+            samples.append(time.perf_counter() - start)
+        results[str(size)] = summarize(samples)
+    return results
+
+
+def bench_voice_turn(module, iterations: int, workdir: Path) -> Dict[str, Any]:
+    """listen() from a WAV fixture with a fixed-latency recognition backend"""
+    if importlib.util.find_spec("speech_recognition") is None:
+        return skipped("speech_recognition not installed")
+
+    from ai_assistant_recognition import BACKENDS
+    fixture = workdir / "speech.wav"
+    write_wav_fixture(fixture)
+    BACKENDS['fixture'] = make_fixture_backend("what time is it", delay=0.05)
+
+    assistant = make_assistant(module, recognition_backend='fixture',
+                               mic_calibration={'default': 300.0}, persistent_capture=False)
+    assistant.microphone_factory = lambda device_index=None: WavMicrophone(fixture)
+    samples = []
+    failures = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        query = assistant.listen()
+        if not query:
+            failures += 1
+            continue
+        assistant.process_command(query)
+        samples.append(time.perf_counter() - start)
+    assistant.shutdown()
+    if not samples:
+        return skipped("every voice turn failed")
+    result = summarize(samples)
+    result['failures'] = failures
+    return result
+
+
+def bench_wikipedia(module, rounds: int, server: FakeWikipediaServer) -> Dict[str, Any]:
+    """"who is" answers: fetched from the stand-in, then repeated and related ones from the cache"""
+    assistant = make_assistant(module, openai_api_key='', wikipedia_url=server.base_url)
+    cold, warm, related = [], [], []
+    for title in WIKI_ARTICLES:
+        start = time.perf_counter()
+        assistant.process_command(f"who was {title}")
+        cold.append(time.perf_counter() - start)
+    fetched = server.requests
+    for _ in range(rounds):
+        for title in WIKI_ARTICLES:
+            start = time.perf_counter()
+            assistant.process_command(f"who was {title}")
+            warm.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            assistant.process_command(f"who is {title.split()[-1]}")
+            related.append(time.perf_counter() - start)
+    assistant.shutdown()
+    return {
+        'cold': summarize(cold),
+        'warm': summarize(warm),
+        'related': summarize(related),
+        'cached_requests': server.requests - fetched,
+        'server': {'latency_s': server.latency},
+    }
+
+
+def bench_documents(files: int, workdir: Path) -> Dict[str, Any]:
+    """Document index: full build, incremental rescans, reopening, and top-k queries"""
+    import random
+    from ai_assistant_documents import DocumentIndexer
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    directory = workdir / "documents"
+    directory.mkdir()
+    for i in range(files):
+        paragraphs = [" ".join(rng.choices(vocabulary, k=70)) for _ in range(4)]
+        (directory / f"note-{i}.txt").write_text("\n\n".join(paragraphs), encoding='utf-8')
+
+    indexer = DocumentIndexer(directory, workdir / "documents-index", throttle=0)
+    timings = {}
+    start = time.perf_counter()
+    indexer.scan()
+    timings['build_s'] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    indexer.scan()
+    timings['rescan_unchanged_s'] = round(time.perf_counter() - start, 3)
+    (directory / "note-0.txt").write_text("an edited note about word1 and word2", encoding='utf-8')
+    start = time.perf_counter()
+    indexer.scan()
+    timings['rescan_one_changed_s'] = round(time.perf_counter() - start, 3)
+    indexer.close()
+
+    start = time.perf_counter()
+    reopened = DocumentIndexer(directory, workdir / "documents-index")
+    reopened.open()
+    timings['reopen_s'] = round(time.perf_counter() - start, 4)
+    samples = []
+    for i in range(200):
+        query = " ".join(rng.choices(vocabulary, k=4))
+        start = time.perf_counter()
+        reopened.search(query, 3)
+        samples.append(time.perf_counter() - start)
+    stats = reopened.stats()
+    reopened.close()
+    return {'files': stats['files'], 'passages': stats['passages'], **timings,
+            'query': summarize(samples)}
+
+
+def bench_media(files: int, workdir: Path) -> Dict[str, Any]:
+    """Media catalog: scanning, rescanning, reloading, and fuzzy "play" lookups"""
+    import random
+    from ai_assistant_media import AUDIO, MediaLibrary
+    rng = random.Random(11)
+    syllables = "ka lo mi ra ne tu vo si da re pa zo li ma no be gu fi".split()
+
+    def name(words: int) -> str:
+        return " ".join("".join(rng.choices(syllables, k=rng.randint(2, 3))).capitalize()
+                        for _ in range(words))
+
+    # Empty files named "NN Artist - Title.mp3", twenty per artist folder
+    music = workdir / "music"
+    titles = []
+    for i in range(files):
+        if i % 20 == 0:
+            artist = name(2)
+            (music / artist).mkdir(parents=True, exist_ok=True)
+        title = name(rng.randint(1, 4))
+        titles.append((artist, title))
+        (music / artist / f"{i % 20 + 1:02d} {artist} - {title}.mp3").touch()
+
+    library = MediaLibrary({AUDIO: music}, workdir / "media.json.gz", throttle=0)
+    reloaded = MediaLibrary({AUDIO: music}, workdir / "media.json.gz")
+    try:
+        timings = {}
+        start = time.perf_counter()
+        library.scan()
+        timings['scan_s'] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        library.scan()
+        timings['rescan_unchanged_s'] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        reloaded.load()
+        timings['load_s'] = round(time.perf_counter() - start, 3)
+
+        samples, misses = [], 0
+        for i in range(300):
+            artist, title = titles[rng.randrange(len(titles))]
+            # Exact titles, titles with the artist, and ones with a typo
+            query = [title, f"{title} by {artist}", title[:-1]][i % 3].lower()
+            start = time.perf_counter()
+            item = reloaded.find(query)
+            samples.append(time.perf_counter() - start)
+            if item is None or item.title != title:
+                misses += 1
+        return {'files': len(reloaded.catalog), **timings, 'lookup': summarize(samples),
+                'lookup_misses': misses}
+    finally:
+        library.close()
+        reloaded.close()
+
+
+def bench_gui(module, messages: int) -> Dict[str, Any]:
+    """display_message cost in the Tk transcript as it grows"""
+    if importlib.util.find_spec("tkinter") is None:
+        return skipped("tkinter not installed")
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return skipped("no DISPLAY (run under xvfb-run to include GUI rendering)")
+
+    from ai_assistant_gui import AssistantGUI
+    assistant = make_assistant(module)
+    gui = AssistantGUI(assistant)
+    samples = []
+    for i in range(messages):
+        start = time.perf_counter()
+        gui.display_message("Assistant", f"Reply number {i}. " + "text " * 20)
+        gui.root.update_idletasks()
+        samples.append(time.perf_counter() - start)
+    gui.root.destroy()
+    assistant.shutdown()
+
+    tenth = max(1, messages // 10)
+    return {
+        'first_10pct': summarize(samples[:tenth]),
+        'last_10pct': summarize(samples[-tenth:]),
+        'all': summarize(samples),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _primary_metrics(results: Dict[str, Any], prefix: str = ""):
+    """Yield (name, metric, value) for every summary found in the results"""
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        name = f"{prefix}{key}"
+        if THROUGHPUT_METRIC in value:
+            yield name, THROUGHPUT_METRIC, value[THROUGHPUT_METRIC]
+        elif LATENCY_METRIC in value:
+            yield name, LATENCY_METRIC, value[LATENCY_METRIC]
+        else:
+            yield from _primary_metrics(value, f"{name}.")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return descriptions of metrics that regressed by more than tolerance"""
+    base = {(n, m): v for n, m, v in _primary_metrics(baseline.get('results', {}))}
+    regressions = []
+    for name, metric, value in _primary_metrics(current.get('results', {})):
+        old = base.get((name, metric))
+        if not old:
+            continue
+        if metric == THROUGHPUT_METRIC:
+            change = (old - value) / old
+        else:
+            change = (value - old) / old
+        if change > tolerance:
+            regressions.append(f"{name} {metric}: {old} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def run(args) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="assistant-bench-"))
+    # Keep the user's config, caches and session log out of the benchmark
+    os.environ['HOME'] = str(workdir)
+    os.environ['USERPROFILE'] = str(workdir)
+
+    quick = args.quick
+    only = set(args.only.split(",")) if args.only else None
+    module = load_assistant_module()
+    results: Dict[str, Any] = {}
+
+    def want(name):
+        return only is None or name in only
+
+    try:
+        if want('startup'):
+            results['startup'] = bench_startup(3 if quick else 7, args.startup_budget)
+        if want('router'):
+            results['router'] = bench_router(module, 2000 if quick else 50000)
+        if want('process_command'):
+            results['process_command'] = bench_process_command(module, 1000 if quick else 20000)
+        if want('history'):
+            results['history'] = bench_history(module, [100, 1000] if quick else [100, 1000, 10000, 100000])
+        if want('ask_openai'):
+            if importlib.util.find_spec("openai") is None:
+                results['ask_openai'] = skipped("openai package not installed")
+            else:
+                with FakeOpenAIServer(args.latency, args.token_rate) as server:
+                    results['ask_openai'] = bench_ask_openai(module, 3 if quick else 20, server)
+        if want('voice_turn'):
+            results['voice_turn'] = bench_voice_turn(module, 3 if quick else 20, workdir)
+        if want('wikipedia'):
+            with FakeWikipediaServer() as server:
+                results['wikipedia'] = bench_wikipedia(module, 5 if quick else 50, server)
+        if want('documents'):
+            results['documents'] = bench_documents(300 if quick else 5000, workdir)
+        if want('media'):
+            results['media'] = bench_media(2000 if quick else 30000, workdir)
+        if want('gui'):
+            results['gui'] = bench_gui(module, 200 if quick else 5000)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'version': getattr(module, '__version__', 'unknown'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'quick': quick,
+        'results': results,
+        # Per-stage latencies traced inside the assistant during the run
+        'stages': TRACER.stats(),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI Assistant offline benchmarks')
+    parser.add_argument('--output', '-o', help='Write JSON results to this file')
+    parser.add_argument('--quick', action='store_true', help='Smaller iteration counts')
+    parser.add_argument('--only', help='Comma-separated benchmarks: startup, router, process_command, '
+                                       'history, ask_openai, voice_turn, wikipedia, documents, media, '
+                                       'gui')
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='Stand-in OpenAI time to first token in seconds (default: 0.2)')
+    parser.add_argument('--token-rate', type=float, default=50,
+                        help='Stand-in OpenAI tokens per second (default: 50)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare with a previous JSON result; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown before --compare fails (default: 0.2 = 20%%)')
+    parser.add_argument('--startup-budget', type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                        metavar='MS',
+                        help='Fail if the median cold start takes longer than MS milliseconds '
+                             f'(default: {DEFAULT_STARTUP_BUDGET_MS})')
+    args = parser.parse_args()
+
+    # The assistant prints to stdout; keep stdout for the JSON report
+    with redirect_stdout(sys.stderr):
+        report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding='utf-8')
+    print(text)
+
+    failed = False
+    startup = report['results'].get('startup', {})
+    if startup.get('over_budget'):
+        print(f"\n❌ Startup took {startup['p50_ms']:.0f} ms, over the "
+              f"{startup['budget_ms']:.0f} ms budget", file=sys.stderr)
+        failed = True
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:", file=sys.stderr)
+            for line in regressions:
+                print(f"  • {line}", file=sys.stderr)
+            failed = True
+        else:
+            print("\n✅ No regressions", file=sys.stderr)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
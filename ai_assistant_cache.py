@@ -0,0 +1,317 @@
+"""
+AI Assistant Response Cache
+Persistent LRU/TTL cache for OpenAI answers, and single-flight coalescing
+of identical requests that are still in progress
+"""
+
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache entry"""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+def make_key(query: str, model: str, system_prompt: str,
+             context: List[Dict[str, str]]) -> str:
+    """Build the cache key for a query in a given conversation context"""
+    context_hash = hashlib.sha256(
+        json.dumps(context, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    raw = json.dumps([normalize_query(query), model, system_prompt, context_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-entry TTL, persisted in SQLite
+
+    Entries are kept in memory so hits never touch the disk; writes go
+    through to SQLite so the cache survives restarts. Recency updates from
+    hits are batched and written with the next insert or on close().
+    """
+
+    def __init__(self, path: Path, max_entries: int = 500, ttl: float = 86400):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, "
+                "expires REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._load()
+        except Exception as e:
+            logger.error(f"Response cache unavailable, using memory only: {e}")
+            self._db = None
+
+    def _load(self):
+        """Load unexpired entries from disk, least recently used first"""
+        now = time.time()
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        rows = self._db.execute(
+            "SELECT key, answer, expires FROM responses ORDER BY last_used"
+        ).fetchall()
+        for key, answer, expires in rows:
+            self._entries[key] = (answer, expires)
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries"""
+        evicted = []
+        while len(self._entries) > max(self.max_entries, 0):
+            key, _ = self._entries.popitem(last=False)
+            self._touched.pop(key, None)
+            evicted.append((key,))
+        if evicted and self._db:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            answer, expires = entry
+            now = time.time()
+            if expires <= now:
+                del self._entries[key]
+                self._touched.pop(key, None)
+                if self._db:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._touched[key] = now
+            self.hits += 1
+            return answer
+
+    def put(self, key: str, answer: str, ttl: Optional[float] = None):
+        """Store an answer; ttl overrides the default time-to-live"""
+        if self.max_entries <= 0:
+            return
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (answer, expires)
+            self._entries.move_to_end(key)
+            self._touched.pop(key, None)
+            self._evict()
+            if not self._db:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, answer, expires, now)
+                )
+                self._flush_touched()
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Failed to persist cache entry: {e}")
+
+    def _flush_touched(self):
+        """Write batched recency updates from cache hits"""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            if self._db:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        """Persist pending recency updates and close the database"""
+        with self._lock:
+            if not self._db:
+                return
+            try:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+            except Exception as e:
+                logger.error(f"Failed to close response cache: {e}")
+            self._db = None
+
+
+class SharedRequestCancelled(Exception):
+    """The request a caller was waiting on was cancelled by its owner"""
+
+
+class _Flight:
+    """One upstream call in progress and the callers waiting on it"""
+
+    def __init__(self):
+        self.future = Future()
+        self.tokens: List[str] = []
+        self.listeners: List[Callable[[str], None]] = []
+        self.lock = threading.Lock()
+
+    def publish(self, token: str):
+        """Forward a streamed token to every subscriber"""
+        with self.lock:
+            self.tokens.append(token)
+            for listener in self.listeners:
+                try:
+                    listener(token)
+                except Exception as e:
+                    logger.error(f"Token listener failed: {e}")
+
+    def subscribe(self, listener: Callable[[str], None]):
+        """Replay the tokens so far to listener, then send it the rest"""
+        with self.lock:
+            for token in self.tokens:
+                listener(token)
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str], None]):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+
+class SingleFlight:
+    """Share one upstream call between concurrent identical requests
+
+    The first caller for a key (the leader) makes the call; callers that
+    arrive while it is in flight wait for its result instead of making
+    their own. Followers that want streaming get the tokens received so
+    far replayed, then the rest live. Works for threads (do) and
+    coroutines (ado), and across the two.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.leaders += 1
+            return flight, True
+
+    def _finish(self, key: str, flight: _Flight, result: Any = None,
+                error: Optional[BaseException] = None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+
+    @staticmethod
+    def _deliver(flight: _Flight, result: Any, on_token: Optional[Callable[[str], None]]):
+        """Give a streaming follower the answer if the leader didn't stream it"""
+        if on_token and not flight.tokens and result:
+            on_token(result)
+
+    def do(self, key: str, fn: Callable[[Optional[Callable[[str], None]]], Any],
+           on_token: Optional[Callable[[str], None]] = None) -> Tuple[Any, bool]:
+        """Run fn(emit) once per key; returns (result, shared)
+
+        fn receives a token callback when streaming was requested (None
+        otherwise). A follower re-raises the leader's exception.
+        """
+        flight, leader = self._join(key)
+        if on_token:
+            flight.subscribe(on_token)
+        if not leader:
+            result = flight.future.result()
+            self._deliver(flight, result, on_token)
+            return result, True
+
+        try:
+            result = fn(flight.publish if on_token else None)
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, result)
+        return result, False
+
+    async def ado(self, key: str,
+                  factory: Callable[[Optional[Callable[[str], None]]], Awaitable[Any]],
+                  on_token: Optional[Callable[[str], None]] = None) -> Tuple[Any, bool]:
+        """Coroutine version of do(); factory(emit) returns the awaitable"""
+        flight, leader = self._join(key)
+        if on_token:
+            flight.subscribe(on_token)
+        if not leader:
+            try:
+                # shield: a follower giving up must not cancel the leader's call
+                result = await asyncio.shield(asyncio.wrap_future(flight.future))
+            except asyncio.CancelledError:
+                if on_token:
+                    flight.unsubscribe(on_token)
+                raise
+            self._deliver(flight, result, on_token)
+            return result, True
+
+        try:
+            result = await factory(flight.publish if on_token else None)
+        except asyncio.CancelledError:
+            self._finish(key, flight, error=SharedRequestCancelled("Request was cancelled"))
+            raise
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, result)
+        return result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Upstream calls made, calls saved by sharing, and calls in flight"""
+        with self._lock:
+            return {'upstream': self.leaders, 'saved': self.shared,
+                    'in_flight': len(self._flights)}
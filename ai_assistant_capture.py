@@ -0,0 +1,176 @@
+"""
+AI Assistant Audio Capture
+Persistent microphone stream with a rolling noise-floor estimate
+"""
+
+import math
+import time
+import array
+import threading
+import queue
+import logging
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Speech must be this many times louder than the noise floor
+NOISE_MULTIPLIER = 1.5
+# Never treat anything quieter than this as speech
+MIN_THRESHOLD = 50
+# Smoothing factor for the noise-floor moving average
+NOISE_ALPHA = 0.05
+# Audio kept from before speech was detected, in seconds
+PRE_ROLL = 0.5
+# Phrases that ended longer ago than this are stale when capture() is called
+STALE_AFTER = 1.5
+
+
+def rms(chunk: bytes, sample_width: int) -> float:
+    """Root-mean-square energy of a chunk of 16-bit (or 8/32-bit) PCM audio"""
+    try:
+        import audioop
+        return audioop.rms(chunk, sample_width)
+    except ImportError:
+        pass
+    typecode = {1: 'b', 2: 'h', 4: 'i'}.get(sample_width)
+    if typecode is None or not chunk:
+        return 0.0
+    samples = array.array(typecode)
+    samples.frombytes(chunk[:len(chunk) - len(chunk) % sample_width])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def device_key(device_index: Optional[int]) -> str:
+    """Name under which a device's calibration is saved in the config"""
+    if device_index is None:
+        return "default"
+    try:
+        import speech_recognition as sr
+        names = sr.Microphone.list_microphone_names()
+        if 0 <= device_index < len(names):
+            return names[device_index]
+    except Exception:
+        pass
+    return f"device-{device_index}"
+
+
+class _Phrase:
+    def __init__(self, audio, ended: float):
+        self.audio = audio
+        self.ended = ended
+
+
+class MicrophoneCapture:
+    """Keep the microphone open and cut the stream into phrases
+
+    A background thread reads the stream continuously, tracks the noise
+    floor while nobody is speaking and queues complete phrases (including
+    a short pre-roll, so the start of speech is never clipped). capture()
+    then returns the next phrase without any calibration delay. Audio is
+    discarded while suppress() returns True, e.g. while the assistant is
+    speaking.
+    """
+
+    def __init__(self, device_index: Optional[int] = None,
+                 energy_threshold: Optional[float] = None,
+                 pause_threshold: float = 0.8,
+                 suppress: Optional[Callable[[], bool]] = None):
+        import speech_recognition as sr
+        self._sr = sr
+        self.device_index = device_index
+        self.pause_threshold = pause_threshold
+        self.suppress = suppress
+        self.noise_floor = (energy_threshold / NOISE_MULTIPLIER) if energy_threshold else None
+        self.phrase_time_limit = 10.0
+
+        self._phrases = queue.Queue()
+        self._running = True
+        self._source = sr.Microphone(device_index=device_index)
+        self._source.__enter__()
+        self._thread = threading.Thread(target=self._run, name="mic-capture", daemon=True)
+        self._thread.start()
+
+    @property
+    def energy_threshold(self) -> float:
+        """Current speech threshold derived from the noise floor"""
+        if self.noise_floor is None:
+            return MIN_THRESHOLD * 6
+        return max(MIN_THRESHOLD, self.noise_floor * NOISE_MULTIPLIER)
+
+    def _run(self):
+        """Read audio continuously, tracking noise and queueing phrases"""
+        source = self._source
+        chunk_seconds = source.CHUNK / source.SAMPLE_RATE
+        pre_roll = deque(maxlen=max(1, int(PRE_ROLL / chunk_seconds)))
+        frames = []
+        silent_for = 0.0
+
+        while self._running:
+            try:
+                chunk = source.stream.read(source.CHUNK)
+            except Exception as e:
+                logger.error(f"Microphone read failed: {e}")
+                time.sleep(0.1)
+                continue
+
+            if self.suppress and self.suppress():
+                frames = []
+                pre_roll.clear()
+                continue
+
+            energy = rms(chunk, source.SAMPLE_WIDTH)
+            if not frames:
+                if energy > self.energy_threshold:
+                    frames = list(pre_roll) + [chunk]
+                    silent_for = 0.0
+                else:
+                    # Only quiet audio updates the noise floor
+                    if self.noise_floor is None:
+                        self.noise_floor = energy
+                    else:
+                        self.noise_floor += NOISE_ALPHA * (energy - self.noise_floor)
+                    pre_roll.append(chunk)
+                continue
+
+            frames.append(chunk)
+            silent_for = silent_for + chunk_seconds if energy <= self.energy_threshold else 0.0
+            duration = len(frames) * chunk_seconds
+            if silent_for >= self.pause_threshold or duration >= self.phrase_time_limit:
+                audio = self._sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                self._phrases.put(_Phrase(audio, time.time()))
+                frames = []
+                pre_roll.clear()
+
+    def capture(self, timeout: float = 5, phrase_time_limit: float = 10):
+        """Return the next phrase as AudioData, or None if nobody spoke in time
+
+        Phrases that finished before this call (beyond a short grace period)
+        are dropped so stale background speech isn't answered.
+        """
+        self.phrase_time_limit = phrase_time_limit
+        called = time.time()
+        deadline = called + timeout + phrase_time_limit
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            try:
+                phrase = self._phrases.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if phrase.ended >= called - STALE_AFTER:
+                return phrase.audio
+
+    def close(self):
+        """Stop the capture thread and release the microphone"""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join(1.0)
+        try:
+            self._source.__exit__(None, None, None)
+        except Exception as e:
+            logger.error(f"Failed to close microphone: {e}")
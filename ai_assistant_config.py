@@ -0,0 +1,279 @@
+"""
+AI Assistant Config Store
+Validated settings with atomic, debounced writes and live reload
+"""
+
+import os
+import json
+import shutil
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NUMBER = (int, float)
+
+# key -> (accepted types, minimum, maximum); keys not listed are kept unchecked
+SCHEMA: Dict[str, Tuple[tuple, Optional[float], Optional[float]]] = {
+    'voice_rate': (NUMBER, 50, 400),
+    'voice_volume': (NUMBER, 0.0, 1.0),
+    'voice_index': ((int,), 0, None),
+    'openai_api_key': ((str,), None, None),
+    'openai_base_url': ((str,), None, None),
+    'assistant_name': ((str,), None, None),
+    'model': ((str,), None, None),
+    'max_history': ((int,), 0, None),
+    'history_token_budget': ((int,), 0, None),
+    'cache_max_entries': ((int,), 0, None),
+    'cache_ttl': (NUMBER, 0, None),
+    'stream_responses': ((bool,), None, None),
+    'save_sessions': ((bool,), None, None),
+    'microphone_index': ((int, type(None)), 0, None),
+    'persistent_capture': ((bool,), None, None),
+    'mic_calibration': ((dict,), None, None),
+    'recognition_backend': ((str,), None, None),
+    'recognition_language': ((str,), None, None),
+    'recognition_race': ((list,), None, None),
+    'recognition_deadlines': ((dict,), None, None),
+    'recognition_min_confidence': (NUMBER, 0.0, 1.0),
+    'openai_timeout': (NUMBER, 1, None),
+    'openai_max_retries': ((int,), 0, None),
+    'openai_backoff_base': (NUMBER, 0, None),
+    'openai_backoff_max': (NUMBER, 0, None),
+    'openai_breaker_threshold': ((int,), 0, None),
+    'openai_breaker_reset': (NUMBER, 0, None),
+    'openai_pool_size': ((int,), 1, None),
+    'openai_keepalive': (NUMBER, 0, None),
+    'metrics_flush_interval': (NUMBER, 0, None),
+    'server_host': ((str,), None, None),
+    'server_port': ((int,), 0, 65535),
+    'server_workers': ((int,), 1, None),
+    'server_max_queue': ((int,), 0, None),
+    'server_request_timeout': (NUMBER, 1, None),
+    'server_token': ((str,), None, None),
+    'session_idle_timeout': (NUMBER, 0, None),
+    'session_max_live': ((int,), 1, None),
+    'session_memory_limit_mb': (NUMBER, 0, None),
+    'tts_cache': ((bool,), None, None),
+    'tts_cache_max_mb': (NUMBER, 0, None),
+    'tts_cache_prewarm': ((bool,), None, None),
+    'gui_max_messages': ((int,), 1, None),
+    'config_watch_interval': (NUMBER, 0, None),
+    'action_workers': ((int,), 1, None),
+    'action_timeout': (NUMBER, 0.1, None),
+    'plugins_enabled': ((bool,), None, None),
+    'plugins_disabled': ((list,), None, None),
+    'wikipedia_url': ((str,), None, None),
+    'wikipedia_timeout': (NUMBER, 0.5, None),
+    'wikipedia_cache_ttl': (NUMBER, 0, None),
+    'wikipedia_first': ((bool,), None, None),
+    'documents_index': ((bool,), None, None),
+    'documents_rag': ((bool,), None, None),
+    'documents_top_k': ((int,), 1, None),
+    'documents_min_match': (NUMBER, 0.0, 1.0),
+    'documents_rescan_interval': (NUMBER, 0, None),
+    'media_index': ((bool,), None, None),
+    'media_rescan_interval': (NUMBER, 0, None),
+    'directories': ((dict,), None, None),
+}
+
+
+def check(key: str, value: Any) -> Optional[str]:
+    """Return why value is invalid for key, or None if it is fine"""
+    rule = SCHEMA.get(key)
+    if rule is None:
+        return None
+    types, low, high = rule
+    # JSON true/false must not pass as a number
+    if isinstance(value, bool) and bool not in types:
+        return f"expected {'/'.join(t.__name__ for t in types)}, got a boolean"
+    if not isinstance(value, types):
+        return f"expected {'/'.join(t.__name__ for t in types)}, got {type(value).__name__}"
+    if isinstance(value, NUMBER) and not isinstance(value, bool):
+        if low is not None and value < low:
+            return f"must be at least {low}"
+        if high is not None and value > high:
+            return f"must be at most {high}"
+    return None
+
+
+def validate(loaded: Dict[str, Any], defaults: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Merge a loaded file over the defaults, dropping invalid values
+
+    Returns (config, problems). An invalid value falls back to the default
+    so one typo never stops the assistant from starting.
+    """
+    config = dict(defaults)
+    problems = []
+    for key, value in loaded.items():
+        problem = check(key, value)
+        if problem:
+            problems.append(f"{key}: {problem} (using {defaults.get(key)!r})")
+            continue
+        if key not in defaults and key not in SCHEMA:
+            logger.info(f"Unknown config key {key!r} kept as is")
+        config[key] = value
+    return config, problems
+
+
+class ConfigStore:
+    """The assistant's settings, kept in sync with the JSON config file
+
+    data is a plain dict shared with the rest of the assistant. save()
+    schedules a write debounce seconds later, so a burst of changes costs
+    one write; the file is replaced atomically (temp file + rename), so a
+    crash never leaves half a config. watch() polls the file and applies
+    outside edits in place, then calls each subscriber with the changed
+    keys and their new values.
+    """
+
+    def __init__(self, path: Path, defaults: Dict[str, Any], debounce: float = 0.5):
+        self.path = Path(path)
+        self.defaults = defaults
+        self.debounce = debounce
+        self.data: Dict[str, Any] = dict(defaults)
+        self.writes = 0
+        self.reloads = 0
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        # (mtime_ns, size) of the file as last read or written by us
+        self._signature: Optional[Tuple[int, int]] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Read and validate the file; None if it is missing or unreadable"""
+        signature = self._stat()
+        if signature is None:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if not isinstance(loaded, dict):
+                raise ValueError("top level must be an object")
+        except Exception as e:
+            logger.error(f"Failed to load config: {e}")
+            # Don't retry until the file changes again
+            self._signature = signature
+            return None
+        self._signature = signature
+        config, problems = validate(loaded, self.defaults)
+        for problem in problems:
+            logger.warning(f"Invalid config value {problem}")
+        return config
+
+    def load(self) -> Dict[str, Any]:
+        """Read the file into data and return it"""
+        config = self._read()
+        with self._lock:
+            self.data.clear()
+            self.data.update(config if config is not None else self.defaults)
+        return self.data
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call listener(changes) after outside edits are applied"""
+        self._listeners.append(listener)
+
+    def save(self):
+        """Write data to the file after the debounce delay"""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> bool:
+        """Write pending changes now; returns False if the write failed"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            try:
+                self._write(json.dumps(self.data, indent=2))
+            except Exception as e:
+                logger.error(f"Failed to save config: {e}")
+                return False
+            self._dirty = False
+            self.writes += 1
+        logger.info("Configuration saved successfully")
+        return True
+
+    def _write(self, text: str):
+        """Replace the file atomically, keeping its permissions"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.path.exists():
+                shutil.copymode(self.path, temp)
+            os.replace(temp, self.path)
+        finally:
+            if temp.exists():
+                temp.unlink()
+        # Our own write must not look like an outside edit
+        self._signature = self._stat()
+
+    def reload(self) -> Dict[str, Any]:
+        """Apply the file if it changed since it was last read or written
+
+        Returns the changed keys with their new values.
+        """
+        with self._lock:
+            if self._stat() == self._signature:
+                return {}
+            config = self._read()
+            if config is None:
+                return {}
+            changes = {key: value for key, value in config.items()
+                       if self.data.get(key) != value}
+            self.data.update(changes)
+        if changes:
+            self.reloads += 1
+            logger.info(f"Config reloaded: {', '.join(sorted(changes))}")
+            for listener in list(self._listeners):
+                try:
+                    listener(changes)
+                except Exception as e:
+                    logger.error(f"Failed to apply config change: {e}")
+        return changes
+
+    def watch(self, interval: float = 1.0):
+        """Check the file for outside edits every interval seconds"""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Config watcher error: {e}")
+
+        self._watcher = threading.Thread(target=run, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def close(self):
+        """Stop watching and write anything still pending"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2.0)
+            self._watcher = None
+        self.flush()
@@ -0,0 +1,502 @@
+"""
+AI Assistant Documents
+Incremental BM25 index of the documents directory, stored memory-mapped on disk
+"""
+
+import os
+import re
+import sys
+import html
+import json
+import math
+import mmap
+import heapq
+import bisect
+import hashlib
+import threading
+import time
+import logging
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEXT_SUFFIXES = {'.txt', '.text', '.md', '.markdown', '.rst', '.log', '.csv'}
+HTML_SUFFIXES = {'.html', '.htm'}
+
+# Larger files are skipped (logs, exports) rather than read into memory
+MAX_FILE_BYTES = 5 * 1024 * 1024
+
+# Words per passage; paragraphs are packed up to this size
+PASSAGE_WORDS = 80
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'do', 'does', 'for', 'from',
+    'how', 'i', 'if', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'so', 'that',
+    'the', 'this', 'to', 'was', 'we', 'what', 'when', 'where', 'which', 'who', 'why',
+    'will', 'with', 'you', 'your',
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+MAGIC = b"AIDOCIX1"
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_TAG = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of a text: lowercase words without stopwords"""
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def read_text(path: Path, data: bytes) -> str:
+    """Plain text of a document from its raw bytes"""
+    text = data.decode('utf-8', errors='replace')
+    if path.suffix.lower() in HTML_SUFFIXES:
+        text = html.unescape(_TAG.sub(" ", text))
+    return text
+
+
+def split_passages(text: str, words: int = PASSAGE_WORDS) -> List[str]:
+    """Split a document into passages of about words words
+
+    Paragraphs are kept together where they fit; long ones are cut into
+    windows.
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    for paragraph in _PARAGRAPH.split(text):
+        tokens = paragraph.split()
+        if current and len(current) + len(tokens) > words:
+            passages.append(" ".join(current))
+            current = []
+        while len(tokens) > words:
+            passages.append(" ".join(tokens[:words]))
+            tokens = tokens[words:]
+        current.extend(tokens)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class DocumentIndex:
+    """A read-only BM25 index file, memory-mapped
+
+    Layout: MAGIC, the header length, a JSON header (files, term
+    dictionary, section offsets), then four native-endian arrays: passage
+    lengths, passage text offsets, postings as (passage, term frequency)
+    pairs, and the UTF-8 passage text. Only the header is parsed when the
+    index is opened; postings and text are read from the mapping on demand.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        try:
+            if self._map[:8] != MAGIC:
+                raise ValueError("not a document index")
+            header_len = int.from_bytes(self._map[8:16], 'little')
+            header = json.loads(self._map[16:16 + header_len].decode('utf-8'))
+            if header.get('byteorder') != sys.byteorder:
+                raise ValueError("index written on a different platform")
+        except Exception:
+            self.close()
+            raise
+        self.directory = header['directory']
+        self.files: List[list] = header['files']
+        self.terms: Dict[str, List[int]] = header['terms']
+        self.count = header['passages']
+        self.avgdl = header['avgdl'] or 1.0
+        self._firsts = [entry[4] for entry in self.files]
+        sections = header['sections']
+        self._views = [memoryview(self._map)]
+        self.lengths = self._section(sections['lengths'], 'I')
+        self.offsets = self._section(sections['offsets'], 'Q')
+        self.postings = self._section(sections['postings'], 'I')
+        self._text = self._section(sections['text'])
+
+    def _section(self, bounds: List[int], fmt: Optional[str] = None) -> memoryview:
+        view = self._views[0][bounds[0]:bounds[1]]
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def file_of(self, passage: int) -> str:
+        """Relative path of the file a passage came from"""
+        return self.files[bisect.bisect_right(self._firsts, passage) - 1][0]
+
+    def raw(self, passage: int) -> bytes:
+        return bytes(self._text[self.offsets[passage]:self.offsets[passage + 1]])
+
+    def text(self, passage: int) -> str:
+        return self.raw(passage).decode('utf-8')
+
+    def score(self, terms: List[str]) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """BM25 score of every passage containing at least one of terms
+
+        Also returns how many of the (distinct) terms each passage contains.
+        """
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        lengths, postings, n = self.lengths, self.postings, self.count
+        norm = K1 * (1 - B)
+        scale = K1 * B / self.avgdl
+        for term in set(terms):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i in range(offset * 2, (offset + df) * 2, 2):
+                passage, tf = postings[i], postings[i + 1]
+                scores[passage] = scores.get(passage, 0.0) + idf * tf * (K1 + 1) / (
+                    tf + norm + scale * lengths[passage])
+                matched[passage] = matched.get(passage, 0) + 1
+        return scores, matched
+
+    def search(self, query: str, k: int = 3, min_match: float = 0.0) -> List[Dict[str, Any]]:
+        """The k best passages for query, best first
+
+        Passages containing less than min_match of the query's words are
+        left out, however well they score.
+        """
+        terms = set(tokenize(query))
+        scores, matched = self.score(list(terms))
+        needed = min_match * len(terms)
+        candidates = ((p, s) for p, s in scores.items() if matched[p] >= needed)
+        best = heapq.nlargest(k, candidates, key=lambda item: item[1])
+        return [{'path': self.file_of(p), 'text': self.text(p), 'score': round(s, 3)}
+                for p, s in best]
+
+    def close(self):
+        # The mapping can't be closed while views of it exist
+        for view in reversed(getattr(self, '_views', [])):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+def write_index(path: Path, directory: str, files: List[list], lengths: array,
+                texts: List[bytes], postings: Dict[str, array]):
+    """Write an index file (atomically) for DocumentIndex to open"""
+    offsets = array('Q', [0])
+    for text in texts:
+        offsets.append(offsets[-1] + len(text))
+    terms, flat = {}, array('I')
+    for term in sorted(postings):
+        pairs = postings[term]
+        terms[term] = [len(flat) // 2, len(pairs) // 2]
+        flat.extend(pairs)
+
+    blobs = [lengths.tobytes(), offsets.tobytes(), flat.tobytes()]
+    header = {
+        'byteorder': sys.byteorder, 'directory': directory, 'files': files,
+        'terms': terms, 'passages': len(lengths),
+        'avgdl': (sum(lengths) / len(lengths)) if len(lengths) else 0.0,
+    }
+    # Section offsets depend on the header size, so lay out with a fixed
+    # placeholder first and pad the header to it
+    header['sections'] = {name: [0, 0] for name in ('lengths', 'offsets', 'postings', 'text')}
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header_len = len(encoded) + 256
+    header_len += -header_len % 8
+    position = 16 + header_len
+    for name, size in zip(('lengths', 'offsets', 'postings', 'text'),
+                          [len(b) for b in blobs] + [offsets[-1]]):
+        header['sections'][name] = [position, position + size]
+        position += size + (-size % 8)
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    encoded += b" " * (header_len - len(encoded))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(path.name + ".tmp")
+    with open(temp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(header_len.to_bytes(8, 'little'))
+        f.write(encoded)
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * (-len(blob) % 8))
+        for text in texts:
+            f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+class DocumentIndexer:
+    """Keep a DocumentIndex of a directory up to date in the background
+
+    Each scan compares file sizes and mtimes with the index and re-reads
+    only files that changed; a file whose content hash is unchanged (e.g.
+    just touched) is not re-tokenized. Postings of unchanged files are
+    copied from the previous index, so nothing is rebuilt from scratch, and
+    the new index is written as a new generation file and swapped in.
+    Scans sleep briefly every few files so they don't starve the voice
+    loop and GUI, and stop promptly on close().
+    """
+
+    BATCH = 20
+
+    def __init__(self, directory: Path, index_dir: Path, rescan_interval: float = 300,
+                 throttle: float = 0.005):
+        self.directory = Path(directory)
+        self.index_dir = Path(index_dir)
+        self.rescan_interval = rescan_interval
+        self.throttle = throttle
+        self.index: Optional[DocumentIndex] = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._generation = 0
+        self.counters = {'scans': 0, 'skipped': 0, 'queries': 0}
+        self.last_scan: Dict[str, int] = {}
+        self.last_scan_s = 0.0
+
+    # -- Lifecycle ----------------------------------------------------------
+
+    def start(self):
+        """Open the saved index and keep it up to date on a background thread"""
+        if self._thread is not None:
+            return
+
+        def run():
+            self.open()
+            while not self._stop.is_set():
+                try:
+                    self.scan()
+                except Exception as e:
+                    logger.error(f"Document indexing failed: {e}")
+                self.ready.set()
+                if not self.rescan_interval or self._stop.wait(self.rescan_interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="document-indexer", daemon=True)
+        self._thread.start()
+
+    def open(self) -> bool:
+        """Map the newest saved index; older generations are deleted"""
+        with self._scan_lock:
+            if self._stop.is_set():
+                return False
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            generations = sorted(self._generations(), reverse=True)
+            for generation, path in generations:
+                try:
+                    index = DocumentIndex(path)
+                except Exception as e:
+                    logger.warning(f"Ignoring document index {path.name}: {e}")
+                    continue
+                self._swap(index, generation)
+                return True
+            return False
+
+    def close(self):
+        """Stop scanning and unmap the index"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        # A scan still running (the join timed out) reads the current index
+        # and may swap in a new one; it stops at its next pause
+        with self._scan_lock, self._lock:
+            if self.index is not None:
+                self.index.close()
+                self.index = None
+
+    def _generations(self) -> List[Tuple[int, Path]]:
+        found = []
+        for path in self.index_dir.glob("documents-*.idx"):
+            try:
+                found.append((int(path.stem.split("-", 1)[1]), path))
+            except ValueError:
+                continue
+        return found
+
+    def _swap(self, index: DocumentIndex, generation: int):
+        with self._lock:
+            old, self.index = self.index, index
+            self._generation = generation
+        if old is not None:
+            old.close()
+        # Old generations can only be deleted once unmapped (Windows)
+        for other, path in self._generations():
+            if other != generation:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    # -- Scanning -----------------------------------------------------------
+
+    def _walk(self) -> List[Tuple[str, os.stat_result]]:
+        found = []
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(names):
+                suffix = os.path.splitext(name)[1].lower()
+                if name.startswith('.') or suffix not in TEXT_SUFFIXES | HTML_SUFFIXES:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    found.append((Path(path).relative_to(self.directory).as_posix(),
+                                  os.stat(path)))
+                except OSError:
+                    continue
+        return found
+
+    def _pause(self, done: int) -> bool:
+        """Yield the CPU every BATCH files; True if the scan should stop"""
+        if done % self.BATCH == 0 and self.throttle:
+            return self._stop.wait(self.throttle)
+        return self._stop.is_set()
+
+    def scan(self) -> Dict[str, int]:
+        """Bring the index up to date with the directory
+
+        Returns counts of indexed, unchanged and removed files. A cancelled
+        scan leaves the previous index in place.
+        """
+        with self._scan_lock:
+            if self._stop.is_set():
+                return {}
+            start = time.perf_counter()
+            with self._lock:
+                index = self.index
+            old = {}
+            if index is not None and index.directory == str(self.directory):
+                old = {entry[0]: (i, entry) for i, entry in enumerate(index.files)}
+
+            kept: List[list] = []
+            added: List[Tuple[list, List[str]]] = []
+            changed = 0
+            seen = set()
+            for done, (name, stat) in enumerate(self._walk(), 1):
+                if self._pause(done):
+                    return {}
+                previous = old.get(name)
+                if previous and previous[1][1] == stat.st_mtime_ns and previous[1][2] == stat.st_size:
+                    seen.add(name)
+                    kept.append(previous[1])
+                    continue
+                # A file that grew too large or became unreadable is not
+                # seen, so its old passages count as removed
+                if stat.st_size > MAX_FILE_BYTES:
+                    self.counters['skipped'] += 1
+                    continue
+                try:
+                    data = (self.directory / name).read_bytes()
+                except OSError as e:
+                    logger.debug(f"Cannot read {name}: {e}")
+                    continue
+                seen.add(name)
+                digest = hashlib.sha1(data).hexdigest()
+                changed += 1
+                if previous and previous[1][3] == digest:
+                    kept.append([name, stat.st_mtime_ns, stat.st_size, digest,
+                                 previous[1][4], previous[1][5]])
+                    continue
+                entry = [name, stat.st_mtime_ns, stat.st_size, digest, 0, 0]
+                added.append((entry, split_passages(read_text(Path(name), data))))
+            removed = len(set(old) - seen)
+
+            result = {'indexed': len(added), 'unchanged': len(kept), 'removed': removed}
+            if changed or removed or (index is None and seen):
+                generation = self._generation + 1
+                path = self.index_dir / f"documents-{generation}.idx"
+                if not self._rebuild(path, index, kept, added):
+                    return {}
+                self._swap(DocumentIndex(path), generation)
+                logger.info(f"Indexed {len(added)} document(s), {len(kept)} unchanged, "
+                            f"{removed} removed in {time.perf_counter() - start:.2f}s")
+            self.counters['scans'] += 1
+            self.last_scan = result
+            self.last_scan_s = time.perf_counter() - start
+            return result
+
+    def _rebuild(self, path: Path, index: Optional[DocumentIndex], kept: List[list],
+                 added: List[Tuple[list, List[str]]]) -> bool:
+        """Write a new index: kept files' postings copied, added files tokenized"""
+        files: List[list] = []
+        lengths = array('I')
+        texts: List[bytes] = []
+        postings: Dict[str, array] = {}
+        remap: Dict[int, int] = {}
+
+        for entry in kept:
+            first, count = entry[4], entry[5]
+            files.append(entry[:4] + [len(lengths), count])
+            for passage in range(first, first + count):
+                remap[passage] = len(lengths)
+                lengths.append(index.lengths[passage])
+                texts.append(index.raw(passage))
+        if index is not None and remap:
+            for done, (term, (offset, df)) in enumerate(index.terms.items(), 1):
+                if done % 5000 == 0 and self._pause(0):
+                    return False
+                pairs = None
+                source = index.postings
+                for i in range(offset * 2, (offset + df) * 2, 2):
+                    passage = remap.get(source[i])
+                    if passage is not None:
+                        if pairs is None:
+                            pairs = postings[term] = array('I')
+                        pairs.append(passage)
+                        pairs.append(source[i + 1])
+
+        for done, (entry, passages) in enumerate(added, 1):
+            if self._pause(done):
+                return False
+            files.append(entry[:4] + [len(lengths), len(passages)])
+            for text in passages:
+                passage = len(lengths)
+                terms = tokenize(text)
+                lengths.append(len(terms))
+                texts.append(text.encode('utf-8'))
+                for term, tf in Counter(terms).items():
+                    pairs = postings.get(term)
+                    if pairs is None:
+                        pairs = postings[term] = array('I')
+                    pairs.append(passage)
+                    pairs.append(tf)
+
+        write_index(path, str(self.directory), files, lengths, texts, postings)
+        return True
+
+    # -- Queries ------------------------------------------------------------
+
+    def search(self, query: str, k: int = 3, min_match: float = 0.0) -> List[Dict[str, Any]]:
+        """The k best passages for query; empty until the index is loaded"""
+        with self._lock:
+            index = self.index
+            if index is None:
+                return []
+            self.counters['queries'] += 1
+            return index.search(query, k, min_match)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self.index
+            return {
+                **self.counters,
+                'files': len(index.files) if index else 0,
+                'passages': index.count if index else 0,
+                'terms': len(index.terms) if index else 0,
+                'last_scan': dict(self.last_scan),
+                'last_scan_s': round(self.last_scan_s, 3),
+            }
@@ -5,10 +5,17 @@ FIXED VERSION - Bug fixes and improvements
 
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
+import time
+import datetime
 import threading
 from typing import Optional
 import logging
 
+from ai_assistant_metrics import TRACER
+from ai_assistant_streaming import StreamingSpeaker
+from ai_assistant_transcript import TranscriptView
+from ai_assistant_uibus import UIEventBus
+
 logger = logging.getLogger(__name__)
 
 class AssistantGUI:
@@ -29,9 +36,21 @@ class AssistantGUI:
         self.entry_bg = "#313244"
         self.text_bg = "#181825"
         
-        self.setup_ui()
+        # Worker threads never touch widgets; they post updates to the bus,
+        # which the Tk loop drains every frame
+        self.bus = UIEventBus(self.root)
+        # Only read and written on the Tk thread
         self.listening = False
         
+        self.setup_ui()
+        self.bus.start()
+        
+        # Browser launches finish after the reply; failures show up in the chat
+        assistant.actions.subscribe(self._action_finished)
+        
+        # Settings edited in the config file while the window is open
+        assistant.config_store.subscribe(lambda changes: self.bus.post(self._apply_config, changes))
+        
         # Bind close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -43,16 +62,16 @@ class AssistantGUI:
         title_frame = tk.Frame(self.root, bg=self.bg_color)
         title_frame.pack(pady=10, padx=20, fill=tk.X)
         
-        title_label = tk.Label(
+        self.title_label = tk.Label(
             title_frame,
             text=f"🤖 {self.assistant.config.get('assistant_name', 'AI Assistant')}",
             font=("Segoe UI", 18, "bold"),
             bg=self.bg_color,
             fg=self.accent_color
         )
-        title_label.pack()
+        self.title_label.pack()
         
-        status_text = "AI-Powered" if self.assistant.client else "Basic Mode"
+        status_text = "AI-Powered" if self.assistant.ai_enabled else "Basic Mode"
         subtitle = tk.Label(
             title_frame,
             text=status_text,
@@ -85,6 +104,14 @@ class AssistantGUI:
         self.chat_display.tag_config("assistant", foreground="#89b4fa", font=("Consolas", 11, "bold"))
         self.chat_display.tag_config("system", foreground="#f9e2af", font=("Consolas", 10, "italic"))
         
+        # Only the newest messages stay in the widget; older ones are in the session store
+        self.transcript = TranscriptView(
+            self.bus,
+            self.chat_display,
+            max_messages=self.assistant.config.get('gui_max_messages', 500),
+            on_notice_click=self.show_history
+        )
+        
         # Input Frame
         input_frame = tk.Frame(self.root, bg=self.bg_color)
         input_frame.pack(pady=10, padx=20, fill=tk.X)
@@ -148,6 +175,14 @@ class AssistantGUI:
         )
         help_btn.pack(side=tk.LEFT, padx=5)
         
+        history_btn = tk.Button(
+            button_frame,
+            text="📜 History",
+            command=self.show_history,
+            **button_style
+        )
+        history_btn.pack(side=tk.LEFT, padx=5)
+        
         exit_btn = tk.Button(
             button_frame,
             text="🚪 Exit",
@@ -163,7 +198,7 @@ class AssistantGUI:
         exit_btn.pack(side=tk.RIGHT, padx=5)
         
         # Add hover effects
-        for btn in [self.voice_btn, send_btn, clear_btn, help_btn]:
+        for btn in [self.voice_btn, send_btn, clear_btn, help_btn, history_btn]:
             btn.bind("<Enter>", lambda e, b=btn: b.config(bg=self.button_hover))
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.button_color))
         
@@ -171,8 +206,11 @@ class AssistantGUI:
         exit_btn.bind("<Leave>", lambda e: exit_btn.config(bg="#f38ba8"))
         
         # Status Bar
+        status_frame = tk.Frame(self.root, bg=self.entry_bg)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
         self.status_bar = tk.Label(
-            self.root,
+            status_frame,
             text="Ready",
             font=("Segoe UI", 9),
             bg=self.entry_bg,
@@ -181,35 +219,136 @@ class AssistantGUI:
             padx=10,
             pady=5
         )
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.speech_label = tk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.entry_bg,
+            fg=self.accent_color,
+            anchor=tk.E,
+            padx=10,
+            pady=5
+        )
+        self.speech_label.pack(side=tk.RIGHT)
+        
+        # Response latency; click for the full per-stage table
+        self.latency_label = tk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.entry_bg,
+            fg=self.fg_color,
+            anchor=tk.E,
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        )
+        self.latency_label.pack(side=tk.RIGHT)
+        self.latency_label.bind("<Button-1>", lambda e: self.show_stats())
+        
+        # Escape stops the current reply (barge-in)
+        self.root.bind("<Escape>", lambda e: self.assistant.speech.interrupt())
+        self._poll_speech_status()
+        self._poll_latency()
         
         # Display welcome message
         self.display_message("System", self.assistant.greet(), "system")
+        # Render fixed replies while the user is still reading
+        self.assistant.prewarm_speech()
+        
+        # Show the context of a resumed session
+        if len(self.assistant.conversation_history):
+            self.display_message("System", "Resumed previous session", "system")
+            for message in self.assistant.conversation_history:
+                if message.get("role") == "user":
+                    self.display_message("User", message.get("content", ""), "user")
+                else:
+                    self.display_message("Assistant", message.get("content", ""))
     
-    def display_message(self, sender: str, message: str, tag: str = "assistant"):
-        """Display a message in the chat"""
-        self.chat_display.config(state=tk.NORMAL)
-        
-        # Add timestamp
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M")
-        
+    def _apply_config(self, changes):
+        """Reflect live config changes in the window (Tk thread)"""
+        if 'assistant_name' in changes:
+            name = self.assistant.config.get('assistant_name', 'AI Assistant')
+            self.root.title(f"🤖 {name}")
+            self.title_label.config(text=f"🤖 {name}")
+    
+    def _action_finished(self, result):
+        """Report a background action that failed (action thread)"""
+        if not result.ok and result.action.failure:
+            self.display_message("System", result.action.failure, "system")
+    
+    def _header(self, sender: str):
+        """Header text and tag for a message from sender"""
         if sender == "User":
-            self.chat_display.insert(tk.END, f"[{timestamp}] 👤 You: ", "user")
-        elif sender == "System":
-            self.chat_display.insert(tk.END, f"[{timestamp}] ⚙️  ", "system")
+            return "👤 You: ", "user"
+        if sender == "System":
+            return "⚙️  ", "system"
+        assistant_name = self.assistant.config.get('assistant_name', 'Assistant')
+        return f"🤖 {assistant_name}: ", "assistant"
+    
+    def display_message(self, sender: str, message: str, tag: str = "assistant"):
+        """Display a message in the chat (safe to call from any thread)"""
+        header, header_tag = self._header(sender)
+        self.transcript.add(header, header_tag, message, tag)
+    
+    def begin_stream_message(self):
+        """Start an assistant message whose text will arrive token by token"""
+        header, header_tag = self._header("Assistant")
+        self.transcript.add(header, header_tag, end="")
+    
+    def append_stream_text(self, text: str):
+        """Append streamed text to the message started by begin_stream_message
+
+        Tokens arriving within one frame are rendered in a single update.
+        """
+        self.transcript.append(text, "assistant")
+    
+    def _poll_speech_status(self):
+        """Show speaking state and queue depth of the speech worker"""
+        status = self.assistant.speech.status()
+        if status['speaking'] or status['queued']:
+            text = "🔊 Speaking"
+            if status['queued']:
+                text += f" ({status['queued']} queued)"
         else:
-            assistant_name = self.assistant.config.get('assistant_name', 'Assistant')
-            self.chat_display.insert(tk.END, f"[{timestamp}] 🤖 {assistant_name}: ", "assistant")
-        
-        self.chat_display.insert(tk.END, f"{message}\n\n", tag)
-        self.chat_display.see(tk.END)
-        self.chat_display.config(state=tk.DISABLED)
+            text = ""
+        if self.speech_label.cget("text") != text:
+            self.speech_label.config(text=text)
+        self.root.after(250, self._poll_speech_status)
+    
+    def _poll_latency(self):
+        """Show median and p95 response time in the status bar"""
+        stats = TRACER.stats()
+        turn = stats.get('turn')
+        text = ""
+        if turn:
+            text = f"⏱ {turn['p50_ms']:.0f} ms p50 · {turn['p95_ms']:.0f} ms p95"
+            first_token = stats.get('openai.first_token')
+            if first_token:
+                text += f" · first token {first_token['p50_ms']:.0f} ms"
+        if self.latency_label.cget("text") != text:
+            self.latency_label.config(text=text)
+        self.root.after(1000, self._poll_latency)
+    
+    def show_stats(self):
+        """Show the per-stage latency table"""
+        ui = self.bus.stats()
+        messagebox.showinfo("Latency", TRACER.format_stats() +
+                            f"\n\nUI: {ui['applied']} updates in {ui['frames']} frames, "
+                            f"{ui['coalesced']} coalesced, max lag {ui['max_lag_ms']:.0f} ms")
     
     def update_status(self, message: str):
-        """Update the status bar"""
-        self.status_bar.config(text=message)
-        self.root.update_idletasks()
+        """Update the status bar (safe from any thread)
+
+        Only the latest status posted within a frame is drawn.
+        """
+        self.bus.post(self._set_status, message, key='status')
+    
+    def _set_status(self, message: str):
+        if self.status_bar.cget("text") != message:
+            self.status_bar.config(text=message)
     
     def send_message(self):
         """Send a message to the assistant"""
@@ -218,6 +357,9 @@ class AssistantGUI:
         if not message:
             return
         
+        # A new message interrupts the previous reply
+        self.assistant.speech.interrupt()
+        
         # Display user message
         self.display_message("User", message, "user")
         self.input_entry.delete(0, tk.END)
@@ -232,32 +374,65 @@ class AssistantGUI:
     def _process_message(self, message: str):
         """Process message in a separate thread"""
         try:
-            response = self.assistant.process_command(message)
+            start = time.perf_counter()
+            response, streamed = self._process_streaming(message)
+            TRACER.record('turn', time.perf_counter() - start)
             
             if response == "exit":
-                self.root.after(0, self.on_closing)
+                self.bus.post(self.on_closing)
+            elif streamed:
+                self.append_stream_text("\n\n")
             elif response:
-                self.root.after(0, self.display_message, "Assistant", response)
-                # Speak in thread to avoid blocking
-                if self.assistant.engine:
-                    speak_thread = threading.Thread(
-                        target=self.assistant.speak, 
-                        args=(response, False), 
-                        daemon=True
-                    )
-                    speak_thread.start()
+                self.display_message("Assistant", response)
+                # Queued on the speech worker, so this returns immediately
+                self.assistant.speak(response, print_text=False, wait=False,
+                                     cache=self.assistant.reply_is_cacheable())
             
-            self.root.after(0, self.update_status, "Ready")
+            self.update_status("Ready")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            self.root.after(0, self.display_message, "System", f"Error: {str(e)}", "system")
-            self.root.after(0, self.update_status, "Error")
+            self.display_message("System", f"Error: {str(e)}", "system")
+            self.update_status("Error")
+    
+    def _process_streaming(self, message: str):
+        """Run a command, rendering and speaking AI tokens as they arrive
+
+        Returns (response, streamed); streamed is True when the reply has
+        already been rendered and spoken incrementally.
+        """
+        assistant = self.assistant
+        if not (assistant.ai_enabled and assistant.config.get('stream_responses', True)):
+            return assistant.process_command(message), False
+        
+        speaker = StreamingSpeaker(assistant.speech) if assistant.speech.enabled else None
+        started = False
+        
+        def on_token(token: str):
+            nonlocal started
+            if not started:
+                self.begin_stream_message()
+                started = True
+            self.append_stream_text(token)
+            if speaker:
+                speaker.feed(token)
+        
+        try:
+            response = assistant.process_command(message, on_token=on_token)
+        finally:
+            if speaker:
+                # Let speech finish in the background; the UI is already updated
+                speaker.finish(wait=False)
+        
+        return response, started
     
     def voice_input(self):
         """Handle voice input"""
         if self.listening:
             return
         
+        # Stop talking before listening so the microphone doesn't hear us
+        self.assistant.speech.interrupt()
+        
         self.listening = True
         self.voice_btn.config(text="⏸️ Listening...", state=tk.DISABLED)
         self.update_status("Listening for voice input...")
@@ -268,32 +443,36 @@ class AssistantGUI:
     
     def _voice_input_thread(self):
         """Voice input in separate thread"""
+        query = None
         try:
             query = self.assistant.listen()
             
-            if query:
-                self.root.after(0, self.input_entry.delete, 0, tk.END)
-                self.root.after(0, self.input_entry.insert, 0, query)
-                self.root.after(0, self.send_message)
-            else:
-                self.root.after(0, self.display_message, "System", 
-                              "Could not understand audio. Please try again.", "system")
+            if not query:
+                self.display_message("System", "Could not understand audio. Please try again.",
+                                     "system")
         except Exception as e:
             logger.error(f"Voice input error: {e}")
-            self.root.after(0, self.display_message, "System", 
-                          f"Voice input error: {str(e)}", "system")
+            self.display_message("System", f"Voice input error: {str(e)}", "system")
         finally:
-            self.listening = False
-            self.root.after(0, self.voice_btn.config, {"text": "🎤 Voice", "state": tk.NORMAL})
-            self.root.after(0, self.update_status, "Ready")
+            self.bus.post(self._voice_finished, query, key='voice')
+    
+    def _voice_finished(self, query: Optional[str]):
+        """Restore the voice button and send what was heard (Tk thread)"""
+        self.listening = False
+        self.voice_btn.config(text="🎤 Voice", state=tk.NORMAL)
+        if query:
+            self.input_entry.delete(0, tk.END)
+            self.input_entry.insert(0, query)
+            self.send_message()
+        else:
+            self.update_status("Ready")
     
     def clear_chat(self):
         """Clear the chat display"""
         if messagebox.askyesno("Clear Chat", "Are you sure you want to clear the chat history?"):
-            self.chat_display.config(state=tk.NORMAL)
-            self.chat_display.delete(1.0, tk.END)
-            self.chat_display.config(state=tk.DISABLED)
-            self.assistant.conversation_history.clear()
+            self.transcript.clear()
+            # The old conversation stays in the session store
+            self.assistant.new_session()
             self.update_status("Chat cleared")
     
     def show_help(self):
@@ -301,10 +480,68 @@ class AssistantGUI:
         help_text = self.assistant.get_help()
         messagebox.showinfo("Help - Available Commands", help_text)
     
+    def show_history(self):
+        """Show the whole conversation from the session store, a page at a time"""
+        sessions = self.assistant.sessions
+        if not sessions:
+            messagebox.showinfo("History", "Session saving is turned off (save_sessions), "
+                                           "so only the messages shown are available.")
+            return
+        # Make sure the latest messages have been written
+        sessions.flush(timeout=1.0)
+        session_id = self.assistant.session_id
+        
+        window = tk.Toplevel(self.root)
+        window.title("Conversation History")
+        window.geometry("650x500")
+        window.configure(bg=self.bg_color)
+        
+        text = scrolledtext.ScrolledText(
+            window,
+            wrap=tk.WORD,
+            font=("Consolas", 10),
+            bg=self.text_bg,
+            fg=self.fg_color,
+            relief=tk.FLAT,
+            padx=10,
+            pady=10
+        )
+        text.tag_config("user", foreground="#a6e3a1", font=("Consolas", 10, "bold"))
+        text.tag_config("assistant", foreground="#89b4fa", font=("Consolas", 10, "bold"))
+        earlier_btn = tk.Button(window, text="⬆ Earlier", bg=self.button_color, fg="#1e1e2e",
+                                relief=tk.FLAT, cursor="hand2")
+        earlier_btn.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        oldest = {'id': None}
+        
+        def load_page():
+            page = sessions.tail(session_id, limit=200, before_id=oldest['id'])
+            if not page:
+                earlier_btn.config(text="Start of conversation", state=tk.DISABLED)
+                return
+            oldest['id'] = page[0]['id']
+            text.config(state=tk.NORMAL)
+            # Each page goes above the one loaded before it
+            for message in reversed(page):
+                timestamp = datetime.datetime.fromtimestamp(message['ts']).strftime("%b %d %H:%M")
+                who = "👤 You" if message['role'] == "user" else "🤖 Assistant"
+                text.insert("1.0", f"{message['content']}\n\n")
+                text.insert("1.0", f"[{timestamp}] {who}: ",
+                            "user" if message['role'] == "user" else "assistant")
+            text.config(state=tk.DISABLED)
+            if len(page) < 200:
+                earlier_btn.config(text="Start of conversation", state=tk.DISABLED)
+        
+        earlier_btn.config(command=load_page)
+        load_page()
+        text.see(tk.END)
+    
     def on_closing(self):
         """Handle window closing"""
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
             self.assistant.running = False
+            self.bus.stop()
             self.root.destroy()
     
     def run(self):
@@ -0,0 +1,478 @@
+"""
+AI Assistant Media Library
+Background catalog of the music and videos directories with fuzzy lookup
+"""
+
+import os
+import re
+import gzip
+import json
+import math
+import time
+import heapq
+import bisect
+import difflib
+import threading
+import unicodedata
+import logging
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUDIO = "audio"
+VIDEO = "video"
+
+SUFFIXES = {
+    '.mp3': AUDIO, '.wav': AUDIO, '.flac': AUDIO, '.ogg': AUDIO, '.oga': AUDIO,
+    '.opus': AUDIO, '.m4a': AUDIO, '.aac': AUDIO, '.wma': AUDIO,
+    '.mp4': VIDEO, '.m4v': VIDEO, '.mkv': VIDEO, '.avi': VIDEO, '.mov': VIDEO,
+    '.webm': VIDEO, '.wmv': VIDEO, '.mpg': VIDEO, '.mpeg': VIDEO,
+}
+
+INDEX_VERSION = 1
+
+# Candidates taken from the trigram index and rescored precisely
+CANDIDATES = 12
+
+# Rescored similarity a match needs to be played
+MIN_SCORE = 0.6
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+# "01 - ", "03. ", "1-02 " track number prefixes in file names
+_TRACK_PREFIX = re.compile(r"^\s*(\d{1,2}[-.])?\d{1,3}\s*[-._)]?\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words without accents or punctuation, for matching"""
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MediaItem:
+    """One file in the catalog with the tags used to find it"""
+
+    __slots__ = ('path', 'kind', 'title', 'artist', 'album', 'mtime_ns', 'size', 'keys')
+
+    def __init__(self, path: str, kind: str, title: str, artist: str = "", album: str = "",
+                 mtime_ns: int = 0, size: int = 0):
+        self.path = path
+        self.kind = kind
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # Normalized strings a query is compared with
+        title_key = normalize(title)
+        artist_key = normalize(artist)
+        self.keys = tuple(k for k in (title_key, f"{artist_key} {title_key}".strip(),
+                                      f"{title_key} {artist_key}".strip(), normalize(album))
+                          if k)
+
+    @property
+    def label(self) -> str:
+        """How the item is named to the user"""
+        return f"{self.title} by {self.artist}" if self.artist else self.title
+
+    def to_row(self) -> list:
+        return [self.path, self.kind, self.title, self.artist, self.album, self.mtime_ns, self.size]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'MediaItem':
+        return cls(*row)
+
+
+# -- Tags ---------------------------------------------------------------------
+
+_mutagen = None
+
+
+def _load_mutagen():
+    """mutagen if installed (reads tags of every format), else False"""
+    global _mutagen
+    if _mutagen is None:
+        try:
+            import mutagen
+            _mutagen = mutagen
+        except ImportError:
+            _mutagen = False
+    return _mutagen
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _id3_text(frame: bytes) -> str:
+    if not frame:
+        return ""
+    encoding, body = frame[0], frame[1:]
+    codec = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}.get(encoding, 'latin-1')
+    return body.decode(codec, errors='replace').split('\x00')[0].strip()
+
+
+def read_id3(path: str) -> Dict[str, str]:
+    """Title, artist and album from an ID3v2.3/2.4 header (or ID3v1 trailer)
+
+    Only the text frames are read; artwork and other large frames are
+    skipped over.
+    """
+    wanted = {b'TIT2': 'title', b'TPE1': 'artist', b'TALB': 'album'}
+    tags: Dict[str, str] = {}
+    with open(path, 'rb') as f:
+        header = f.read(10)
+        if len(header) == 10 and header[:3] == b'ID3' and header[3] in (3, 4):
+            version, end = header[3], 10 + _syncsafe(header[6:10])
+            while f.tell() + 10 <= end and len(tags) < len(wanted):
+                frame = f.read(10)
+                frame_id = frame[:4]
+                if not frame_id.strip(b'\x00'):
+                    break
+                size = _syncsafe(frame[4:8]) if version == 4 else int.from_bytes(frame[4:8], 'big')
+                if size <= 0 or f.tell() + size > end:
+                    break
+                if frame_id in wanted:
+                    tags[wanted[frame_id]] = _id3_text(f.read(size))
+                else:
+                    f.seek(size, os.SEEK_CUR)
+        if not tags:
+            f.seek(0, os.SEEK_END)
+            if f.tell() >= 128:
+                f.seek(-128, os.SEEK_END)
+                trailer = f.read(128)
+                if trailer[:3] == b'TAG':
+                    for key, field in (('title', trailer[3:33]), ('artist', trailer[33:63]),
+                                       ('album', trailer[63:93])):
+                        tags[key] = field.split(b'\x00')[0].decode('latin-1').strip()
+    return {key: value for key, value in tags.items() if value}
+
+
+def read_tags(path: str) -> Dict[str, str]:
+    """Title, artist and album tags of a media file (any may be missing)"""
+    mutagen = _load_mutagen()
+    try:
+        if mutagen:
+            media = mutagen.File(path, easy=True)
+            if media is not None and media.tags:
+                return {key: str(media.tags[key][0]).strip() for key in ('title', 'artist', 'album')
+                        if media.tags.get(key)}
+            return {}
+        if path.lower().endswith('.mp3'):
+            return read_id3(path)
+    except Exception as e:
+        logger.debug(f"Cannot read tags of {path}: {e}")
+    return {}
+
+
+def describe(path: str, kind: str, root: str) -> Dict[str, str]:
+    """Tags of a file, filled in from its name and folders where missing
+
+    "Artist - Title.mp3" names are split, track numbers are dropped, and
+    for music the folders give the artist and album
+    (Artist/Album/01 Title.mp3).
+    """
+    tags = read_tags(path) if kind == AUDIO else {}
+    stem = _TRACK_PREFIX.sub("", os.path.splitext(os.path.basename(path))[0]).strip()
+    if " - " in stem:
+        artist, title = stem.split(" - ", 1)
+        tags.setdefault('artist', artist.strip())
+        tags.setdefault('title', title.strip())
+    tags.setdefault('title', stem or os.path.basename(path))
+    if kind == AUDIO:
+        folders = Path(os.path.relpath(os.path.dirname(path), root)).parts
+        folders = [part for part in folders if part not in ('', '.')]
+        if folders:
+            tags.setdefault('album', folders[-1])
+            if len(folders) >= 2:
+                tags.setdefault('artist', folders[-2])
+    return tags
+
+
+# -- Catalog ------------------------------------------------------------------
+
+class MediaCatalog:
+    """Items plus a word index over their names, for fuzzy lookups
+
+    Each query word is looked up in the word index; a word that isn't
+    there (a typo, a mishearing) is matched against the vocabulary by
+    shared trigrams instead. Items are ranked by the rarity of the words
+    they match and only the best few are compared with difflib, so a lookup
+    touches a handful of postings rather than every item, even in libraries
+    of tens of thousands of files.
+    """
+
+    def __init__(self, items: Iterable[MediaItem]):
+        self.items: List[MediaItem] = list(items)
+        self._words: Dict[str, array] = {}
+        # Distinct words per item, so shorter names win ties
+        self._lengths = array('H')
+        for number, item in enumerate(self.items):
+            words = set()
+            for key in item.keys:
+                words.update(key.split())
+            self._lengths.append(min(len(words), 65535))
+            for word in words:
+                postings = self._words.get(word)
+                if postings is None:
+                    postings = self._words[word] = array('I')
+                postings.append(number)
+        self._sorted = sorted(self._words)
+        self._vocabulary: Dict[str, List[str]] = {}
+        for word in self._sorted:
+            for gram in trigrams(word):
+                self._vocabulary.setdefault(gram, []).append(word)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _similar_words(self, word: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Vocabulary words spelled like word, or starting with it, with a similarity"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._vocabulary.get(gram, ()))
+        similar = {other: 2 * count / (len(grams) + len(other) + 2)
+                   for other, count in shared.items()}
+        # A cut-off word ("rhap") matches the words it begins
+        if len(word) >= 3:
+            position = bisect.bisect_left(self._sorted, word)
+            for other in self._sorted[position:position + limit]:
+                if not other.startswith(word):
+                    break
+                similar[other] = max(similar.get(other, 0.0), 0.9)
+        return [pair for pair in heapq.nlargest(limit, similar.items(), key=lambda pair: pair[1])
+                if pair[1] >= 0.5]
+
+    def search(self, query: str, k: int = 5, kind: Optional[str] = None) -> List[Tuple[MediaItem, float]]:
+        """The k items best matching query, best first, with scores from 0 to 1"""
+        text = normalize(query)
+        if not text or not self.items:
+            return []
+        total = len(self.items)
+        ranked: Dict[int, float] = {}
+        for word in set(text.split()):
+            matches = [(word, 1.0)] if word in self._words else self._similar_words(word)
+            # Each query word counts once per item, through its best match
+            best: Dict[int, float] = {}
+            for match, similarity in matches:
+                postings = self._words[match]
+                weight = similarity * math.log(1 + total / len(postings))
+                for number in postings:
+                    if best.get(number, 0.0) < weight:
+                        best[number] = weight
+            for number, weight in best.items():
+                ranked[number] = ranked.get(number, 0.0) + weight
+        if not ranked:
+            return []
+        lengths = self._lengths
+        candidates = heapq.nlargest(CANDIDATES * 4 if kind else CANDIDATES, ranked.items(),
+                                    key=lambda pair: pair[1] - 0.01 * lengths[pair[0]])
+
+        words = set(text.split())
+        # The query is the matcher's second sequence, which difflib analyses once
+        matcher = difflib.SequenceMatcher(None, "", text, autojunk=False)
+        scored = []
+        for number, _ in candidates:
+            item = self.items[number]
+            if kind and item.kind != kind:
+                continue
+            best = 0.0
+            for key in item.keys:
+                matcher.set_seq1(key)
+                if matcher.real_quick_ratio() > best and matcher.quick_ratio() > best:
+                    best = max(best, matcher.ratio())
+                # Every word of the query present: "queen" for "Bohemian Rhapsody by Queen"
+                if words <= set(key.split()):
+                    best = max(best, 0.8 + 0.2 * len(text) / max(len(key), 1))
+            scored.append((item, round(min(best, 1.0), 3)))
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:k]
+
+    def find(self, query: str, kind: Optional[str] = None,
+             min_score: float = MIN_SCORE) -> Optional[MediaItem]:
+        """The best match for query, or None if nothing is close enough"""
+        results = self.search(query, 1, kind)
+        if results and results[0][1] >= min_score:
+            return results[0][0]
+        return None
+
+
+class MediaLibrary:
+    """Keep a MediaCatalog of the media directories up to date in the background
+
+    The catalog is saved as gzipped JSON rows and loaded at startup. Scans
+    stat every file but only read the tags of files whose size or mtime
+    changed. Scans sleep throttle seconds every BATCH files so they don't
+    compete with the voice loop for CPU, and stop at once on close().
+    """
+
+    BATCH = 50
+
+    def __init__(self, directories: Dict[str, Path], index_path: Path,
+                 rescan_interval: float = 600, throttle: float = 0.01):
+        self.directories = {kind: Path(path) for kind, path in directories.items()}
+        self.index_path = Path(index_path)
+        self.rescan_interval = rescan_interval
+        self.throttle = throttle
+        self.catalog = MediaCatalog([])
+        self.ready = threading.Event()
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {'scans': 0, 'cancelled': 0, 'lookups': 0}
+        self.last_scan: Dict[str, int] = {}
+        self.last_scan_s = 0.0
+
+    # -- Lifecycle ----------------------------------------------------------
+
+    def start(self):
+        """Load the saved catalog and keep it current on a background thread"""
+        if self._thread is not None:
+            return
+
+        def run():
+            self.load()
+            while not self._stop.is_set():
+                try:
+                    self.scan()
+                except Exception as e:
+                    logger.error(f"Media scan failed: {e}")
+                self.ready.set()
+                if not self.rescan_interval or self._stop.wait(self.rescan_interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="media-scanner", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop scanning; a scan in progress leaves the catalog as it was"""
+        self._stop.set()
+
+    def close(self):
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def load(self) -> bool:
+        """Replace the catalog with the saved one; False if there is none"""
+        try:
+            with gzip.open(self.index_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return False
+            items = [MediaItem.from_row(row) for row in data['items']]
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring media index {self.index_path}: {e}")
+            return False
+        self.catalog = MediaCatalog(items)
+        return True
+
+    def save(self):
+        """Write the catalog atomically"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': INDEX_VERSION, 'items': [item.to_row() for item in self.catalog.items]}
+        temp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp, self.index_path)
+
+    # -- Scanning -----------------------------------------------------------
+
+    def _walk(self, root: Path) -> Iterable[os.DirEntry]:
+        stack = [str(root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in SUFFIXES:
+                            yield entry
+            except OSError as e:
+                logger.debug(f"Cannot list {e.filename}: {e}")
+
+    def scan(self) -> Dict[str, int]:
+        """Bring the catalog up to date with the directories
+
+        Returns counts of added/updated, unchanged and removed files, or an
+        empty dict if the scan was cancelled.
+        """
+        with self._scan_lock:
+            start = time.perf_counter()
+            known = {item.path: item for item in self.catalog.items}
+            items: List[MediaItem] = []
+            seen = set()
+            updated = unchanged = 0
+            done = 0
+            for kind, root in self.directories.items():
+                if not root.is_dir():
+                    continue
+                for entry in self._walk(root):
+                    done += 1
+                    if done % self.BATCH == 0 and self.throttle:
+                        self._stop.wait(self.throttle)
+                    if self._stop.is_set():
+                        self.counters['cancelled'] += 1
+                        return {}
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(entry.path)
+                    previous = known.get(entry.path)
+                    if (previous is not None and previous.mtime_ns == stat.st_mtime_ns
+                            and previous.size == stat.st_size):
+                        items.append(previous)
+                        unchanged += 1
+                        continue
+                    file_kind = SUFFIXES[os.path.splitext(entry.name)[1].lower()]
+                    tags = describe(entry.path, file_kind, str(root))
+                    items.append(MediaItem(entry.path, file_kind, tags['title'],
+                                           tags.get('artist', ""), tags.get('album', ""),
+                                           stat.st_mtime_ns, stat.st_size))
+                    updated += 1
+            removed = len(known.keys() - seen)
+            if updated or removed:
+                self.catalog = MediaCatalog(items)
+                try:
+                    self.save()
+                except Exception as e:
+                    logger.error(f"Failed to save media index: {e}")
+                logger.info(f"Media library: {updated} new or changed, {unchanged} unchanged, "
+                            f"{removed} removed in {time.perf_counter() - start:.2f}s")
+            self.counters['scans'] += 1
+            self.last_scan = {'updated': updated, 'unchanged': unchanged, 'removed': removed}
+            self.last_scan_s = time.perf_counter() - start
+            return dict(self.last_scan)
+
+    # -- Lookups ------------------------------------------------------------
+
+    def find(self, query: str, kind: Optional[str] = None) -> Optional[MediaItem]:
+        """Best match for query in the current catalog"""
+        self.counters['lookups'] += 1
+        return self.catalog.find(query, kind)
+
+    def stats(self) -> Dict[str, Any]:
+        catalog = self.catalog
+        return {
+            **self.counters,
+            'items': len(catalog),
+            'audio': sum(1 for item in catalog.items if item.kind == AUDIO),
+            'video': sum(1 for item in catalog.items if item.kind == VIDEO),
+            'last_scan': dict(self.last_scan),
+            'last_scan_s': round(self.last_scan_s, 3),
+        }
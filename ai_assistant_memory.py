@@ -0,0 +1,243 @@
+"""
+AI Assistant Conversation Memory
+Token-budgeted history with a rolling summary of older turns
+"""
+
+import re
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Token budget for conversation history (excluding the system prompt and the
+# reply) by model family; the longest matching prefix wins
+MODEL_TOKEN_BUDGETS = {
+    'gpt-3.5-turbo': 3000,
+    'gpt-4': 6000,
+    'gpt-4-turbo': 24000,
+    'gpt-4o': 24000,
+    'gpt-4.1': 24000,
+}
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Share of the budget the running summary may use
+SUMMARY_SHARE = 0.25
+
+# Approximate per-message overhead of the chat format
+MESSAGE_OVERHEAD = 4
+
+_encoder = None
+_encoder_loaded = False
+
+_FIRST_SENTENCE = re.compile(r'^(.+?[.!?])(\s|$)', re.S)
+
+
+def _get_encoder():
+    """Load tiktoken on first use; fall back to an estimate without it"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text (about four characters per token without tiktoken)"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+def budget_for_model(model: str) -> int:
+    """Return the history token budget for a model"""
+    best = ''
+    for prefix in MODEL_TOKEN_BUDGETS:
+        if model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return MODEL_TOKEN_BUDGETS.get(best, DEFAULT_TOKEN_BUDGET)
+
+
+def extractive_summary(message: Dict[str, str], limit: int = 160) -> str:
+    """Condense a message to its first sentence"""
+    content = " ".join(message.get("content", "").split())
+    match = _FIRST_SENTENCE.match(content)
+    if match:
+        content = match.group(1)
+    if len(content) > limit:
+        content = content[:limit - 3].rstrip() + "..."
+    speaker = "User" if message.get("role") == "user" else "Assistant"
+    return f"{speaker}: {content}"
+
+
+class ConversationMemory:
+    """Bounded conversation history
+
+    Recent messages are kept verbatim while they fit the token budget and
+    max_messages; older ones are folded into a running summary that is
+    itself capped. Appends are O(1) amortized and the size of the request
+    no longer grows with the length of the session.
+
+    Supports the list operations the rest of the assistant uses: append,
+    clear, len, iteration, indexing and del.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 max_messages: Optional[int] = None,
+                 summarizer: Optional[Callable[[Dict[str, str]], str]] = None):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summarizer = summarizer or extractive_summary
+        self._messages = deque()
+        self._tokens = 0
+        self._summary_lines = deque()
+        self._summary_tokens = 0
+        self._summary_text: Optional[str] = None
+        self.folded = 0
+        # Called with every appended message, e.g. to persist it
+        self.listener: Optional[Callable[[Dict[str, str]], None]] = None
+
+    @property
+    def tokens(self) -> int:
+        """Tokens used by the verbatim messages"""
+        return self._tokens
+
+    @property
+    def summary_budget(self) -> int:
+        return int(self.token_budget * SUMMARY_SHARE)
+
+    @property
+    def summary(self) -> str:
+        """Running summary of the turns that no longer fit"""
+        if self._summary_text is None:
+            self._summary_text = "\n".join(line for line, _ in self._summary_lines)
+        return self._summary_text
+
+    def set_budget(self, token_budget: int, max_messages: Optional[int] = None):
+        """Change the limits, folding messages that no longer fit"""
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self._enforce()
+
+    def append(self, message: Dict[str, str]):
+        """Add a message, folding the oldest ones if over budget"""
+        tokens = count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
+        self._messages.append((message, tokens))
+        self._tokens += tokens
+        self._enforce()
+        if self.listener:
+            try:
+                self.listener(message)
+            except Exception as e:
+                logger.error(f"History listener failed: {e}")
+
+    def restore(self, messages: List[Dict[str, str]]):
+        """Replace the history with saved messages without notifying the listener"""
+        listener, self.listener = self.listener, None
+        try:
+            self.clear()
+            for message in messages:
+                self.append(message)
+        finally:
+            self.listener = listener
+
+    def state(self) -> Dict[str, Any]:
+        """Plain-data copy of the messages and summary, e.g. for a snapshot"""
+        return {
+            'messages': [dict(message) for message, _ in self._messages],
+            'summary': [line for line, _ in self._summary_lines],
+            'folded': self.folded,
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Replace the history with one saved by state(), without notifying the listener"""
+        listener, self.listener = self.listener, None
+        try:
+            self.clear()
+            for line in state.get('summary', []):
+                tokens = count_tokens(line) + 1
+                self._summary_lines.append((line, tokens))
+                self._summary_tokens += tokens
+            self.folded = state.get('folded', 0)
+            for message in state.get('messages', []):
+                self.append(message)
+        finally:
+            self.listener = listener
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory held by message and summary text"""
+        text = sum(len(message.get("content", "")) for message, _ in self._messages)
+        return text + len(self.summary) + 200 * len(self._messages)
+
+    def _enforce(self):
+        """Fold the oldest messages until both limits are met
+
+        The newest message is always kept so the current query is sent.
+        """
+        message_budget = self.token_budget - self._summary_tokens
+        while len(self._messages) > 1 and (
+            self._tokens > message_budget
+            or (self.max_messages and len(self._messages) > self.max_messages)
+        ):
+            message, tokens = self._messages.popleft()
+            self._tokens -= tokens
+            self._fold(message)
+            message_budget = self.token_budget - self._summary_tokens
+
+    def _fold(self, message: Dict[str, str]):
+        """Add a message to the running summary, trimming the oldest lines"""
+        try:
+            line = self.summarizer(message)
+        except Exception as e:
+            logger.error(f"Summarizer failed: {e}")
+            line = extractive_summary(message)
+        if not line:
+            return
+
+        tokens = count_tokens(line) + 1
+        self._summary_lines.append((line, tokens))
+        self._summary_tokens += tokens
+        while len(self._summary_lines) > 1 and self._summary_tokens > self.summary_budget:
+            _, old_tokens = self._summary_lines.popleft()
+            self._summary_tokens -= old_tokens
+        self._summary_text = None
+        self.folded += 1
+
+    def context(self) -> List[Dict[str, str]]:
+        """Return the messages to send: the summary (if any) and recent turns"""
+        messages = []
+        if self._summary_lines:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}"
+            })
+        messages.extend(message for message, _ in self._messages)
+        return messages
+
+    def clear(self):
+        """Forget every message and the summary"""
+        self._messages.clear()
+        self._tokens = 0
+        self._summary_lines.clear()
+        self._summary_tokens = 0
+        self._summary_text = None
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (message for message, _ in self._messages)
+
+    def __getitem__(self, index: int) -> Dict[str, str]:
+        return self._messages[index][0]
+
+    def __delitem__(self, index: int):
+        _, tokens = self._messages[index]
+        del self._messages[index]
+        self._tokens -= tokens
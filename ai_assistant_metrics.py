@@ -0,0 +1,172 @@
+"""
+AI Assistant Latency Metrics
+Per-stage spans aggregated into histograms and flushed as JSON lines
+"""
+
+import json
+import math
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets grow by 10% from 0.1 ms, so percentiles are accurate to
+# about 10%; 150 buckets reach roughly 2.5 hours
+_BUCKET_BASE = 0.0001
+_BUCKET_GROWTH = 1.1
+_BUCKET_COUNT = 150
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+# Pipeline stages in the order they happen in a voice turn
+STAGES = (
+    'listen.mic_open', 'listen.calibrate', 'listen.capture', 'recognize',
+    'route', 'documents.search', 'media.lookup', 'openai.first_token', 'openai.request',
+    'tts.queue_wait', 'tts.playback', 'turn', 'ui.lag',
+)
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucket histogram of durations (seconds)"""
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        if seconds <= _BUCKET_BASE:
+            index = 0
+        else:
+            index = min(_BUCKET_COUNT - 1,
+                        int(math.log(seconds / _BUCKET_BASE) / _LOG_GROWTH) + 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile, in seconds"""
+        if not self.count:
+            return 0.0
+        target = math.ceil(p / 100 * self.count)
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(self.max, _BUCKET_BASE * _BUCKET_GROWTH ** index)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """count plus mean/p50/p95/p99/max in milliseconds"""
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 2),
+            'p95_ms': round(self.percentile(95) * 1000, 2),
+            'p99_ms': round(self.percentile(99) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class Tracer:
+    """Collect stage latencies
+
+    Each stage keeps a cumulative histogram for live stats and a window
+    histogram that is written to disk and reset on every flush.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total: Dict[str, LatencyHistogram] = {}
+        self._window: Dict[str, LatencyHistogram] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.log_dir: Optional[Path] = None
+
+    def record(self, stage: str, seconds: float):
+        """Record one duration for a stage"""
+        with self._lock:
+            for table in (self._total, self._window):
+                histogram = table.get(stage)
+                if histogram is None:
+                    histogram = table[stage] = LatencyHistogram()
+                histogram.record(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as one sample of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Cumulative summaries, in pipeline order"""
+        with self._lock:
+            names = sorted(self._total, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s))
+            return {name: self._total[name].summary() for name in names}
+
+    def format_stats(self) -> str:
+        """Human-readable table of the cumulative stats"""
+        stats = self.stats()
+        if not stats:
+            return "No latency data yet"
+        lines = [f"{'Stage':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+        for name, s in stats.items():
+            lines.append(f"{name:<20} {s['count']:>6} {s['p50_ms']:>9.1f} "
+                         f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+        return "\n".join(lines)
+
+    def flush(self):
+        """Append the window's summaries to today's latency log and reset it"""
+        with self._lock:
+            window, self._window = self._window, {}
+        if not window or self.log_dir is None:
+            return
+        line = json.dumps({
+            'ts': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'stages': {name: h.summary() for name, h in window.items()},
+        })
+        path = self.log_dir / f"latency-{time.strftime('%Y%m%d')}.jsonl"
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except Exception as e:
+            logger.error(f"Failed to write latency log: {e}")
+
+    def start_flushing(self, log_dir: Path, interval: float):
+        """Flush to log_dir every interval seconds on a background thread"""
+        self.log_dir = Path(log_dir)
+        if interval <= 0 or self._flusher is not None:
+            return
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            logger.error(f"Latency logging disabled: {e}")
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._stop.clear()
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Stop periodic flushing and write what is left"""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join(1.0)
+            self._flusher = None
+        self.flush()
+
+
+TRACER = Tracer()
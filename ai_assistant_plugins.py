@@ -0,0 +1,290 @@
+"""
+AI Assistant Plugins
+Command modules registered from manifests and imported on first use
+"""
+
+import sys
+import json
+import time
+import threading
+import importlib
+import importlib.util
+import logging
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Installed packages advertise plugins under this entry point group. Each
+# entry point names a manifest dict in a small module, e.g.
+#   [project.entry-points."ai_assistant.plugins"]
+#   weather = "assistant_weather.manifest:MANIFEST"
+ENTRY_POINT_GROUP = "ai_assistant.plugins"
+
+# Plugins shipped with the assistant, as (manifest, module name). They are
+# registered after the user's plugins, so a plugin of the same name replaces
+# one of these, and they can be turned off through plugins_disabled.
+BUILTIN_PLUGINS = [
+    ({
+        'name': 'wikipedia',
+        'description': "Answers from Wikipedia article summaries",
+        'commands': [
+            {'name': 'lookup', 'handler': 'answer',
+             'anchored': ['who is', 'who was', 'who are', 'what is', 'what was',
+                          'what are', 'tell me about'],
+             'help': 'Facts: "who is Ada Lovelace?" (from Wikipedia)'},
+        ],
+    }, 'ai_assistant_wikipedia'),
+]
+
+
+class PluginError(Exception):
+    """A manifest is invalid or a plugin module could not be loaded"""
+
+
+def _strings(value: Any, field: str) -> tuple:
+    if value is None:
+        return ()
+    if isinstance(value, str) or not all(isinstance(v, str) for v in value):
+        raise PluginError(f"{field} must be a list of strings")
+    return tuple(v.lower() for v in value)
+
+
+class PluginCommand:
+    """One command of a plugin: the keywords that fire it and its handler's name"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        if not isinstance(spec, dict) or not isinstance(spec.get('handler'), str):
+            raise PluginError("every command needs a handler name")
+        self.handler = spec['handler']
+        self.name = spec.get('name', self.handler)
+        self.triggers = _strings(spec.get('triggers'), 'triggers')
+        self.anchored = _strings(spec.get('anchored'), 'anchored')
+        self.all_of = _strings(spec.get('all_of'), 'all_of')
+        self.help = spec.get('help', '')
+        if not (self.triggers or self.anchored):
+            raise PluginError(f"command {self.name!r} has no triggers")
+
+
+class Plugin:
+    """A manifest plus a module that is imported the first time a command fires
+
+    Handlers are called as handler(match, assistant) and return the reply
+    text (or None to say nothing). A module may also define shutdown(),
+    called when the assistant exits if the module was loaded.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], source: str,
+                 loader: Callable[[], ModuleType]):
+        if not isinstance(manifest, dict):
+            raise PluginError("manifest must be an object")
+        self.name = manifest.get('name')
+        if not isinstance(self.name, str) or not self.name:
+            raise PluginError("manifest needs a name")
+        commands = manifest.get('commands')
+        if not commands:
+            raise PluginError("manifest lists no commands")
+        self.commands = [PluginCommand(spec) for spec in commands]
+        self.description = manifest.get('description', '')
+        self.source = source
+        self._loader = loader
+        self.module: Optional[ModuleType] = None
+        self.error: Optional[str] = None
+        self.load_ms = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.module is not None
+
+    def load(self) -> ModuleType:
+        """Import the plugin module (once); raises PluginError if it fails"""
+        if self.module is not None:
+            return self.module
+        with self._lock:
+            if self.module is None:
+                if self.error:
+                    raise PluginError(self.error)
+                start = time.perf_counter()
+                try:
+                    module = self._loader()
+                except Exception as e:
+                    self.error = f"failed to load plugin {self.name!r}: {e}"
+                    raise PluginError(self.error) from e
+                self.load_ms = (time.perf_counter() - start) * 1000
+                logger.info(f"Loaded plugin {self.name} in {self.load_ms:.0f} ms")
+                self.module = module
+        return self.module
+
+    def shutdown(self):
+        """Call the module's shutdown() hook, if it was loaded and has one"""
+        hook = getattr(self.module, 'shutdown', None)
+        if not callable(hook):
+            return
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Plugin {self.name} failed to shut down: {e}")
+
+    def handler_for(self, command: PluginCommand, assistant) -> Callable[[Any], Any]:
+        """Router handler that loads the module on first use"""
+        def handle(match):
+            try:
+                handler = getattr(self.load(), command.handler)
+            except (PluginError, AttributeError) as e:
+                logger.error(f"Plugin command {self.name}.{command.name} unavailable: {e}")
+                return f"Sorry, the {self.name} plugin isn't working right now."
+            return handler(match, assistant)
+        return handle
+
+
+def _file_loader(name: str, path: Path) -> Callable[[], ModuleType]:
+    """Loader for a module file or package directory next to a manifest"""
+    def load() -> ModuleType:
+        module_name = f"ai_assistant_plugin_{name}"
+        if path.is_dir():
+            spec = importlib.util.spec_from_file_location(
+                module_name, path / "__init__.py", submodule_search_locations=[str(path)])
+        else:
+            spec = importlib.util.spec_from_file_location(module_name, path)
+        if spec is None or spec.loader is None:
+            raise PluginError(f"cannot import {path}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        return module
+    return load
+
+
+def _import_loader(module_name: str) -> Callable[[], ModuleType]:
+    return lambda: importlib.import_module(module_name)
+
+
+class PluginManager:
+    """Find plugin manifests and register their commands with the router
+
+    Discovery only reads manifests (JSON files in the plugins directory,
+    plus manifest dicts advertised by installed packages), so plugins with
+    heavy dependencies cost nothing until one of their commands fires.
+    Plugins named in disabled are skipped.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, disabled: Iterable[str] = (),
+                 entry_points: bool = True):
+        self.directory = Path(directory) if directory else None
+        self.disabled = set(disabled)
+        self.entry_points = entry_points
+        self.plugins: Dict[str, Plugin] = {}
+
+    def add(self, manifest: Dict[str, Any], source: str,
+            loader: Callable[[], ModuleType]) -> Optional[Plugin]:
+        """Register a manifest; invalid or duplicate plugins are logged and skipped"""
+        try:
+            plugin = Plugin(manifest, source, loader)
+        except PluginError as e:
+            logger.error(f"Invalid plugin manifest {source}: {e}")
+            return None
+        if plugin.name in self.disabled:
+            logger.info(f"Plugin {plugin.name} is disabled")
+            return None
+        if plugin.name in self.plugins:
+            logger.warning(f"Plugin {plugin.name} from {source} ignored; "
+                           f"already loaded from {self.plugins[plugin.name].source}")
+            return None
+        self.plugins[plugin.name] = plugin
+        return plugin
+
+    def add_module(self, manifest: Dict[str, Any], module_name: str,
+                   source: str = "built-in") -> Optional[Plugin]:
+        """Register a plugin whose module is importable by name"""
+        return self.add(manifest, source, _import_loader(module_name))
+
+    def discover(self) -> List[Plugin]:
+        """Read manifests from the plugins directory, entry points and built-ins"""
+        found = []
+        if self.directory and self.directory.is_dir():
+            for path in sorted(self.directory.glob("*.json")):
+                plugin = self._from_file(path)
+                if plugin:
+                    found.append(plugin)
+        if self.entry_points:
+            found.extend(self._from_entry_points())
+        for manifest, module_name in BUILTIN_PLUGINS:
+            if manifest['name'] in self.plugins:
+                logger.info(f"Built-in plugin {manifest['name']} replaced by "
+                            f"{self.plugins[manifest['name']].source}")
+                continue
+            plugin = self.add_module(manifest, module_name)
+            if plugin:
+                found.append(plugin)
+        return found
+
+    def _from_file(self, path: Path) -> Optional[Plugin]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read plugin manifest {path}: {e}")
+            return None
+        module = manifest.get('module') if isinstance(manifest, dict) else None
+        if not isinstance(module, str) or not module:
+            logger.error(f"Plugin manifest {path} does not name a module")
+            return None
+        target = path.parent / module
+        if not target.is_dir():
+            target = path.parent / f"{module}.py"
+        return self.add(manifest, str(path), _file_loader(manifest.get('name', module), target))
+
+    def _from_entry_points(self) -> List[Plugin]:
+        try:
+            from importlib.metadata import entry_points
+            points = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            logger.debug(f"Plugin entry points unavailable: {e}")
+            return []
+        found = []
+        for point in points:
+            try:
+                manifest = point.load()
+            except Exception as e:
+                logger.error(f"Failed to load plugin manifest {point.value}: {e}")
+                continue
+            module = manifest.get('module') if isinstance(manifest, dict) else None
+            if not isinstance(module, str):
+                logger.error(f"Plugin manifest {point.value} does not name a module")
+                continue
+            plugin = self.add(manifest, point.value, _import_loader(module))
+            if plugin:
+                found.append(plugin)
+        return found
+
+    def register(self, router, assistant):
+        """Add a rule to router for every plugin command"""
+        for plugin in self.plugins.values():
+            for command in plugin.commands:
+                router.add_rule(f"plugin:{plugin.name}:{command.name}",
+                                plugin.handler_for(command, assistant),
+                                triggers=command.triggers, anchored=command.anchored,
+                                all_of=command.all_of)
+
+    def shutdown(self):
+        """Let loaded plugins release their resources"""
+        for plugin in self.plugins.values():
+            plugin.shutdown()
+
+    def help_lines(self) -> List[str]:
+        """Help text from the manifests (no plugin is imported)"""
+        return [command.help for plugin in self.plugins.values()
+                for command in plugin.commands if command.help]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {'loaded': plugin.loaded, 'load_ms': round(plugin.load_ms, 1),
+                   'error': plugin.error, 'source': plugin.source}
+            for name, plugin in self.plugins.items()
+        }
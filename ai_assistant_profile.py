@@ -0,0 +1,64 @@
+"""
+AI Assistant Startup Profiler
+Timing of imports and initializers for --startup-profile
+"""
+
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+from typing import Any, List, Tuple
+
+# Default cold-start budget for --startup-profile, in milliseconds
+DEFAULT_STARTUP_BUDGET_MS = 1500
+
+
+class StartupProfiler:
+    """Record how long each import and initializer takes
+
+    Recording is always on because it only costs a perf_counter() call per
+    span; the report is printed only when asked for.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, str, float]] = []
+
+    @contextmanager
+    def span(self, name: str, kind: str = "init"):
+        """Time the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((kind, name, time.perf_counter() - start))
+
+    def import_module(self, name: str) -> Any:
+        """Import a module on first use and record how long it took"""
+        if name in sys.modules:
+            # importlib also waits for another thread still importing it
+            return importlib.import_module(name)
+        with self.span(f"import {name}", kind="import"):
+            return importlib.import_module(name)
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the profiler was created"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self) -> str:
+        """Format the recorded spans, slowest first within each kind"""
+        lines = [f"{'Stage':<44} {'ms':>9}", "-" * 54]
+        for kind in ("import", "init"):
+            spans = sorted((s for s in self.spans if s[0] == kind),
+                           key=lambda s: s[2], reverse=True)
+            if not spans:
+                continue
+            lines.append(f"[{kind}]")
+            for _, name, seconds in spans:
+                lines.append(f"  {name:<42} {seconds * 1000:>9.1f}")
+        lines.append("-" * 54)
+        lines.append(f"{'Total since interpreter reached main script':<44} {self.elapsed_ms():>9.1f}")
+        return "\n".join(lines)
+
+
+STARTUP = StartupProfiler()
@@ -0,0 +1,201 @@
+"""
+AI Assistant Speech Recognition Backends
+Pluggable cloud/offline recognizers with deadlines and racing
+"""
+
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE = 5.0
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+
+class RecognitionResult:
+    """Text recognized by a backend, with its confidence and timing"""
+
+    def __init__(self, text: str, confidence: float, backend: str, elapsed: float):
+        self.text = text
+        self.confidence = confidence
+        self.backend = backend
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"RecognitionResult({self.text!r}, confidence={self.confidence:.2f}, "
+                f"backend={self.backend!r}, elapsed={self.elapsed:.2f}s)")
+
+
+class RecognitionBackend:
+    """Base class: wraps one speech_recognition recognizer method
+
+    Each backend has its own sr.Recognizer so backends can run in parallel.
+    Subclasses implement _recognize() and return (text, confidence or None);
+    default_confidence is used when the engine doesn't report one.
+    """
+
+    name = "base"
+    offline = False
+    default_confidence = 0.8
+
+    def __init__(self, language: str = "en-US", deadline: float = DEFAULT_DEADLINE):
+        import speech_recognition as sr
+        self.sr = sr
+        self.language = language
+        self.deadline = deadline
+        self.recognizer = sr.Recognizer()
+        # Bounds network calls for cloud backends
+        self.recognizer.operation_timeout = deadline
+
+    def _recognize(self, audio):
+        raise NotImplementedError
+
+    def recognize(self, audio) -> RecognitionResult:
+        """Recognize audio; raises sr.UnknownValueError / sr.RequestError"""
+        start = time.perf_counter()
+        text, confidence = self._recognize(audio)
+        if not text:
+            raise self.sr.UnknownValueError()
+        if confidence is None:
+            confidence = self.default_confidence
+        return RecognitionResult(text, confidence, self.name, time.perf_counter() - start)
+
+
+class GoogleBackend(RecognitionBackend):
+    """Google Web Speech API (network)"""
+
+    name = "google"
+
+    def _recognize(self, audio):
+        result = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        if not result or not result.get("alternative"):
+            raise self.sr.UnknownValueError()
+        best = result["alternative"][0]
+        return best.get("transcript", ""), best.get("confidence")
+
+
+class SphinxBackend(RecognitionBackend):
+    """CMU PocketSphinx (offline, needs pocketsphinx)"""
+
+    name = "sphinx"
+    offline = True
+    default_confidence = 0.5
+
+    def _recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio, language=self.language), None
+
+
+class VoskBackend(RecognitionBackend):
+    """Vosk (offline, needs vosk and a model in ./model)"""
+
+    name = "vosk"
+    offline = True
+    default_confidence = 0.7
+
+    def _recognize(self, audio):
+        result = json.loads(self.recognizer.recognize_vosk(audio) or "{}")
+        return result.get("text", ""), None
+
+
+class WhisperBackend(RecognitionBackend):
+    """OpenAI Whisper running locally (offline, needs openai-whisper)"""
+
+    name = "whisper"
+    offline = True
+
+    def _recognize(self, audio):
+        language = self.language.split("-")[0]
+        return self.recognizer.recognize_whisper(audio, language=language).strip(), None
+
+
+BACKENDS = {
+    cls.name: cls for cls in (GoogleBackend, SphinxBackend, VoskBackend, WhisperBackend)
+}
+
+
+class SpeechRecognizer:
+    """Run the configured backend, or race several and take the first confident answer
+
+    Config keys:
+      recognition_backend     "google", "sphinx", "vosk", "whisper" or "race"
+      recognition_race        backends raced in "race" mode
+      recognition_deadlines   per-backend deadline in seconds
+      recognition_min_confidence  confidence a raced result needs to win early
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        language = config.get('recognition_language', 'en-US')
+        deadlines = config.get('recognition_deadlines', {})
+        self.mode = config.get('recognition_backend', 'google')
+        self.min_confidence = config.get('recognition_min_confidence', DEFAULT_MIN_CONFIDENCE)
+
+        names = config.get('recognition_race', ['google', 'sphinx']) if self.mode == 'race' else [self.mode]
+        self.backends: List[RecognitionBackend] = []
+        for name in names:
+            cls = BACKENDS.get(name)
+            if cls is None:
+                logger.error(f"Unknown recognition backend: {name}")
+                continue
+            self.backends.append(cls(language, deadlines.get(name, DEFAULT_DEADLINE)))
+        if not self.backends:
+            self.backends.append(GoogleBackend(language, deadlines.get('google', DEFAULT_DEADLINE)))
+
+        # Spare workers so a backend still running past its deadline doesn't
+        # hold up the next turn
+        self._executor = ThreadPoolExecutor(max_workers=len(self.backends) * 2,
+                                            thread_name_prefix="recognize")
+        self.last_result: Optional[RecognitionResult] = None
+
+    def recognize(self, audio) -> RecognitionResult:
+        """Recognize audio with the configured backend(s)
+
+        Raises sr.UnknownValueError if no backend understood the audio and
+        sr.RequestError if backends failed or missed their deadlines.
+        """
+        sr = self.backends[0].sr
+        start = time.monotonic()
+        futures = {self._executor.submit(b.recognize, audio): b for b in self.backends}
+        deadlines = {future: start + b.deadline for future, b in futures.items()}
+        results: List[RecognitionResult] = []
+        errors: List[str] = []
+        pending = set(futures)
+
+        while pending:
+            remaining = min(deadlines[f] for f in pending) - time.monotonic()
+            done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+
+            # Give up on backends that are past their own deadline
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now]:
+                pending.discard(future)
+                future.cancel()
+                backend = futures[future]
+                errors.append(f"{backend.name}: no answer within {backend.deadline}s")
+
+            for future in done:
+                backend = futures[future]
+                try:
+                    result = future.result()
+                except sr.UnknownValueError:
+                    continue
+                except Exception as e:
+                    logger.warning(f"Recognition backend {backend.name} failed: {e}")
+                    errors.append(f"{backend.name}: {e}")
+                    continue
+                results.append(result)
+                if result.confidence >= self.min_confidence:
+                    self.last_result = result
+                    return result
+
+        if results:
+            self.last_result = max(results, key=lambda r: r.confidence)
+            return self.last_result
+        if errors:
+            raise sr.RequestError("; ".join(errors))
+        raise sr.UnknownValueError()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
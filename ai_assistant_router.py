@@ -0,0 +1,165 @@
+"""
+AI Assistant Intent Router
+Precompiled, table-driven command routing
+"""
+
+import re
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from ai_assistant_metrics import TRACER
+
+logger = logging.getLogger(__name__)
+
+# Words are matched as whole tokens, so "sometimes" no longer triggers "time"
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Marks the end of a keyword in the trie (tokens are never None)
+_END = None
+
+
+class Rule:
+    """A routing rule: which keywords make it fire and what handles it"""
+
+    def __init__(self, name: str, handler: Callable[['RouteMatch'], Any],
+                 triggers: Tuple[str, ...] = (), anchored: Tuple[str, ...] = (),
+                 all_of: Tuple[str, ...] = ()):
+        self.name = name
+        self.handler = handler
+        self.triggers = triggers
+        self.anchored = anchored
+        self.all_of = all_of
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+
+class RouteMatch:
+    """Result of routing a query: the rule that fired and the keywords found"""
+
+    def __init__(self, rule: Rule, query: str, tokens: List[Tuple[str, int, int]],
+                 found: Dict[str, List[Tuple[int, int]]], keyword: Optional[str]):
+        self.rule = rule
+        self.query = query
+        self.tokens = tokens
+        self.found = found
+        self.keyword = keyword
+        self.context: Dict[str, Any] = {}
+
+    def remainder(self, *keywords: str) -> str:
+        """Return the query with every occurrence of the given keywords removed"""
+        drop = set()
+        for keyword in keywords:
+            for start, end in self.found.get(keyword, ()):
+                drop.update(range(start, end))
+
+        pieces = []
+        last = 0
+        for i, (_, start, end) in enumerate(self.tokens):
+            if i in drop:
+                pieces.append(self.query[last:start])
+                last = end
+        pieces.append(self.query[last:])
+        return " ".join("".join(pieces).split())
+
+    def __repr__(self):
+        return f"RouteMatch(rule={self.rule.name!r}, keyword={self.keyword!r})"
+
+
+class IntentRouter:
+    """Route queries to handlers with a single pass over a keyword trie
+
+    Rules are checked in registration order; the first one whose keywords
+    were found wins. Keywords may be multi-word phrases ("search for").
+    """
+
+    def __init__(self):
+        self._trie: Dict[Any, Any] = {}
+        self._rules: List[Rule] = []
+        self._fallback: Optional[Rule] = None
+        self.hits: Dict[str, int] = {}
+
+    def _add_keyword(self, keyword: str):
+        """Insert a keyword phrase into the token trie"""
+        node = self._trie
+        for token in TOKEN_RE.findall(keyword.lower()):
+            node = node.setdefault(token, {})
+        node[_END] = keyword
+
+    def add_rule(self, name: str, handler: Callable[[RouteMatch], Any],
+                 triggers=(), anchored=(), all_of=()):
+        """Register a rule
+
+        triggers fire anywhere in the query, anchored only at its start;
+        all_of keywords must also be present for the rule to fire.
+        """
+        rule = Rule(name, handler, tuple(triggers), tuple(anchored), tuple(all_of))
+        for keyword in rule.triggers + rule.anchored + rule.all_of:
+            self._add_keyword(keyword)
+        self._rules.append(rule)
+        self.hits[name] = 0
+        return rule
+
+    def set_fallback(self, name: str, handler: Callable[[RouteMatch], Any]):
+        """Register the handler used when no rule matches"""
+        self._fallback = Rule(name, handler)
+        self.hits[name] = 0
+        return self._fallback
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def scan(self, query: str):
+        """Tokenize the query and find every keyword occurrence in one pass"""
+        tokens = [(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(query)]
+        words = [token for token, _, _ in tokens]
+        found: Dict[str, List[Tuple[int, int]]] = {}
+
+        for i in range(len(words)):
+            node = self._trie
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                keyword = node.get(_END)
+                if keyword is not None:
+                    found.setdefault(keyword, []).append((i, j + 1))
+
+        return tokens, found
+
+    def route(self, query: str) -> Optional[RouteMatch]:
+        """Return the match for the first rule that fires, or the fallback"""
+        tokens, found = self.scan(query)
+
+        for rule in self._rules:
+            if rule.all_of and not all(k in found for k in rule.all_of):
+                continue
+            keyword = next((k for k in rule.triggers if k in found), None)
+            if keyword is None:
+                keyword = next((k for k in rule.anchored
+                                if any(start == 0 for start, _ in found.get(k, ()))), None)
+            if keyword is None and (rule.triggers or rule.anchored):
+                continue
+            self.hits[rule.name] += 1
+            return RouteMatch(rule, query, tokens, found, keyword)
+
+        if self._fallback:
+            self.hits[self._fallback.name] += 1
+            return RouteMatch(self._fallback, query, tokens, found, None)
+        return None
+
+    def dispatch(self, query: str, **context):
+        """Route a query and run the handler of the rule that fired
+
+        Extra keyword arguments are made available to the handler as
+        match.context. Returns (match, result); match is None when nothing
+        handled the query.
+        """
+        with TRACER.span('route'):
+            match = self.route(query)
+        if match is None:
+            return None, None
+        match.context = context
+        logger.debug(f"Routed {query!r} via {match.rule.name}")
+        return match, match.rule.handler(match)
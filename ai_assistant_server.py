@@ -0,0 +1,687 @@
+"""
+AI Assistant Server
+Local HTTP and WebSocket API in front of one warm assistant process
+"""
+
+import json
+import time
+import base64
+import struct
+import signal
+import asyncio
+import hashlib
+import logging
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, parse_qs
+
+from ai_assistant_async import AsyncAssistant
+from ai_assistant_sessions import REMOTE, Session, new_session_id
+from ai_assistant_metrics import TRACER
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+REASONS = {
+    101: "Switching Protocols", 200: "OK", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+class ServerBusy(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class UnsafeBindError(Exception):
+    """Refusing to listen beyond this machine without an access token"""
+
+
+def is_loopback(host: str) -> bool:
+    """Whether host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class HTTPError(Exception):
+    """Error that is reported to the client as an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """A parsed HTTP request"""
+
+    def __init__(self, method: str, target: str, version: str,
+                 headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body.decode('utf-8') or "{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return data
+
+
+class WorkerPool:
+    """Run at most `workers` turns at once and let up to `max_queue` more wait
+
+    submit() decides admission synchronously, so a request is rejected
+    before any response headers are sent.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def submit(self, coro) -> asyncio.Future:
+        """Schedule coro; raises ServerBusy when the queue is full"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self.active + self.waiting >= self.workers + self.max_queue:
+            coro.close()
+            raise ServerBusy()
+        self.waiting += 1
+        return asyncio.ensure_future(self._run(coro))
+
+    async def _run(self, coro):
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.waiting -= 1
+            coro.close()
+            raise
+        self.waiting -= 1
+        self.active += 1
+        try:
+            return await coro
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def status(self) -> Dict[str, int]:
+        return {'workers': self.workers, 'active': self.active,
+                'waiting': self.waiting, 'max_queue': self.max_queue}
+
+
+class WebSocket:
+    """Server side of an RFC 6455 connection (text messages only)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    async def receive(self) -> Optional[str]:
+        """Return the next text message, or None once the connection closes"""
+        fragments = []
+        while not self.closed:
+            first, second = await self.reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            if not second & 0x80:
+                # Clients must mask every frame
+                self.close(1002)
+                return None
+            if length > MAX_BODY_BYTES:
+                self.close(1009)
+                return None
+            mask = await self.reader.readexactly(4)
+            payload = _unmask(await self.reader.readexactly(length), mask)
+
+            if opcode == 0x8:
+                self.close(1000)
+                return None
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            fragments.append(payload)
+            if first & 0x80:
+                return b"".join(fragments).decode('utf-8', errors='replace')
+        return None
+
+    def send(self, message: Dict[str, Any]):
+        """Queue a JSON message; call drain() to wait for it to be written"""
+        if not self.closed:
+            self._send_frame(0x1, json.dumps(message).encode('utf-8'))
+
+    async def drain(self):
+        await self.writer.drain()
+
+    def close(self, code: int = 1000):
+        if not self.closed:
+            self._send_frame(0x8, struct.pack("!H", code))
+            self.closed = True
+
+    def _send_frame(self, opcode: int, payload: bytes):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        try:
+            self.writer.write(header + payload)
+        except Exception as e:
+            logger.debug(f"WebSocket write failed: {e}")
+            self.closed = True
+
+
+def _unmask(data: bytes, mask: bytes) -> bytes:
+    """XOR a frame payload with its 4-byte mask"""
+    if not data:
+        return data
+    n = len(data)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+class AssistantServer:
+    """Serve process_command and ask_openai to many local clients
+
+    HTTP endpoints:
+      GET  /health    liveness and load
+      GET  /metrics   counters, worker pool, latency histograms, cache stats
+      POST /command   {"query", "session"?, "stream"?, session settings?}
+                      routed like typed input
+      POST /chat      same body, always answered by the AI model
+      GET  /ws        WebSocket; send {"id", "type": "command"|"chat", "query"}
+
+    With "stream": true the reply is sent as server-sent events. Requests
+    with the same "session" id share a conversation from the assistant's
+    SessionRegistry; "assistant_name", "model", "temperature" and "name"
+    change that session's settings. Turns run through a bounded worker
+    pool; when it is full requests get 503.
+    """
+
+    def __init__(self, assistant, host: str = "127.0.0.1", port: int = 8765,
+                 workers: int = 4, max_queue: int = 16,
+                 request_timeout: float = 60.0, token: str = ""):
+        self.assistant = assistant
+        self.host = host
+        self.port = port
+        self.token = token
+        self.pool = WorkerPool(workers, max_queue)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="server")
+        self.core = AsyncAssistant(assistant, default_timeout=request_timeout,
+                                   executor=self.executor)
+        self.registry = assistant.session_registry
+        self.counters = {'requests': 0, 'streams': 0, 'websocket_messages': 0,
+                         'rejected': 0, 'timeouts': 0, 'errors': 0}
+        self.websockets = set()
+        self.started = time.time()
+        self.stopping = False
+        self._server = None
+        self._connections = set()
+        self._busy = 0
+        self._stop_requested: Optional[asyncio.Event] = None
+
+    # -- conversations ------------------------------------------------------
+
+    def session(self, session_id: Optional[str], settings: Optional[Dict[str, Any]] = None) -> Session:
+        """Registry session for an id; a throwaway one when no id is given"""
+        if not session_id:
+            session = Session(new_session_id(), self.assistant.new_history(), origin=REMOTE)
+            session.update(**(settings or {}))
+            return session
+        return self.registry.get(session_id, **(settings or {}))
+
+    def submit_turn(self, kind: str, query: str, session_id: Optional[str],
+                    on_token=None, settings: Optional[Dict[str, Any]] = None) -> asyncio.Future:
+        """Admit one turn to the worker pool (raises ServerBusy)"""
+        session = self.session(session_id, settings)
+        if kind == 'chat':
+            coro = self.core.ask_openai(query, on_token=on_token, session=session)
+        else:
+            coro = self.core.process_command(query, on_token=on_token, session=session)
+        try:
+            return self.pool.submit(self._turn(session, coro))
+        except ServerBusy:
+            coro.close()
+            self.counters['rejected'] += 1
+            raise
+
+    async def _turn(self, session: Session, coro):
+        # A session with a turn in progress is never evicted
+        session.active += 1
+        try:
+            return await coro
+        finally:
+            session.active -= 1
+            session.touch()
+
+    # -- lifecycle ----------------------------------------------------------
+
+    async def start(self):
+        """Listen for clients; raises UnsafeBindError for a public host without a token"""
+        if not self.token and not is_loopback(self.host):
+            raise UnsafeBindError(
+                f"Refusing to serve on {self.host} without server_token: anyone on the "
+                "network could use the assistant. Set server_token or use 127.0.0.1.")
+        self._stop_requested = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving on http://{self.host}:{self.port}")
+
+    def stop(self):
+        """Ask serve_forever() to shut down (safe from signal handlers)"""
+        if self._stop_requested is not None:
+            self._stop_requested.set()
+
+    async def serve_forever(self, drain_timeout: float = 10.0):
+        """Serve until stop() or SIGINT/SIGTERM, then shut down gracefully"""
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not supported on Windows; Ctrl+C raises KeyboardInterrupt instead
+                pass
+        try:
+            await self._stop_requested.wait()
+        finally:
+            await self.shutdown(drain_timeout)
+
+    async def shutdown(self, drain_timeout: float = 10.0):
+        """Stop accepting, let in-flight requests finish, then close everything"""
+        if self.stopping:
+            return
+        self.stopping = True
+        if self._server is not None:
+            self._server.close()
+
+        deadline = time.monotonic() + drain_timeout
+        while self._busy and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._busy:
+            logger.warning(f"Shutting down with {self._busy} requests still running")
+
+        for ws in list(self.websockets):
+            ws.close(1001)
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        await self.core.close()
+        self.executor.shutdown(wait=False)
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while not self.stopping:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_json(writer, e.status, {'error': e.message}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                if (request.path == '/ws'
+                        and request.headers.get('upgrade', '').lower() == 'websocket'):
+                    await self._websocket(request, reader, writer)
+                    break
+
+                self._busy += 1
+                try:
+                    keep_alive = await self._dispatch(request, writer)
+                finally:
+                    self._busy -= 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"Server connection error: {e}")
+        finally:
+            self._connections.discard(task)
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400, "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Headers too large")
+
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if 'transfer-encoding' in headers:
+            raise HTTPError(400, "Chunked request bodies are not supported")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, version.strip(), headers, body)
+
+    def _authorized(self, request: Request) -> bool:
+        if not self.token:
+            return True
+        header = request.headers.get('authorization', '')
+        return header == f"Bearer {self.token}" or request.query.get('token') == self.token
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection may be reused"""
+        self.counters['requests'] += 1
+        keep_alive = request.keep_alive and not self.stopping
+        routes = {
+            '/health': ('GET', self._health),
+            '/metrics': ('GET', self._metrics),
+            '/command': ('POST', None),
+            '/chat': ('POST', None),
+        }
+        try:
+            if request.path not in routes:
+                raise HTTPError(404, "Not found")
+            method, handler = routes[request.path]
+            if request.method != method:
+                raise HTTPError(405, f"Use {method}")
+            if request.path != '/health' and not self._authorized(request):
+                raise HTTPError(401, "Missing or wrong token")
+
+            if handler is not None:
+                self._write_json(writer, 200, handler(), keep_alive)
+                await writer.drain()
+                return keep_alive
+
+            kind = request.path.lstrip('/')
+            body = request.json()
+            query = body.get('query')
+            if not isinstance(query, str) or not query.strip():
+                raise HTTPError(400, "'query' must be a non-empty string")
+            session = body.get('session')
+            settings = _settings(body)
+            if body.get('stream') or 'text/event-stream' in request.headers.get('accept', ''):
+                await self._stream(writer, kind, query, session, settings)
+                return False
+
+            with TRACER.span('server.request'):
+                try:
+                    response = await self.submit_turn(kind, query, session, settings=settings)
+                except ServerBusy:
+                    raise HTTPError(503, "Server busy, try again")
+                except asyncio.TimeoutError:
+                    self.counters['timeouts'] += 1
+                    raise HTTPError(504, "Timed out")
+            self._write_json(writer, 200, {'response': response, 'session': session}, keep_alive)
+        except HTTPError as e:
+            self._write_json(writer, e.status, {'error': e.message}, keep_alive,
+                             retry_after=1 if e.status == 503 else None)
+        except Exception as e:
+            logger.error(f"Server request error: {e}")
+            self.counters['errors'] += 1
+            self._write_json(writer, 500, {'error': str(e)}, keep_alive=False)
+            keep_alive = False
+        await writer.drain()
+        return keep_alive
+
+    def _write_json(self, writer: asyncio.StreamWriter, status: int, data: Dict[str, Any],
+                    keep_alive: bool, retry_after: Optional[int] = None):
+        body = json.dumps(data).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if retry_after is not None:
+            headers.append(f"Retry-After: {retry_after}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+
+    async def _stream(self, writer: asyncio.StreamWriter, kind: str, query: str,
+                      session: Optional[str], settings: Dict[str, Any]):
+        """Answer with server-sent events: one "token" event per token, then "done" """
+        loop = asyncio.get_running_loop()
+        tokens: asyncio.Queue = asyncio.Queue()
+        try:
+            turn = self.submit_turn(kind, query, session,
+                                    lambda t: loop.call_soon_threadsafe(tokens.put_nowait, t),
+                                    settings)
+        except ServerBusy:
+            self._write_json(writer, 503, {'error': "Server busy, try again"}, False, retry_after=1)
+            return
+        self.counters['streams'] += 1
+
+        def event(name: str, data: Dict[str, Any]):
+            writer.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        start = time.perf_counter()
+        try:
+            while not turn.done():
+                getter = asyncio.ensure_future(tokens.get())
+                await asyncio.wait({getter, turn}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    event("token", {'text': getter.result()})
+                    await writer.drain()
+                else:
+                    getter.cancel()
+            # Tokens scheduled just before the turn finished
+            await asyncio.sleep(0)
+            while not tokens.empty():
+                event("token", {'text': tokens.get_nowait()})
+            try:
+                event("done", {'response': turn.result(), 'session': session})
+            except asyncio.TimeoutError:
+                self.counters['timeouts'] += 1
+                event("error", {'error': "Timed out"})
+            await writer.drain()
+        finally:
+            # The client went away mid-stream
+            if not turn.done():
+                turn.cancel()
+            TRACER.record('server.request', time.perf_counter() - start)
+
+    def _health(self) -> Dict[str, Any]:
+        return {
+            'status': 'stopping' if self.stopping else 'ok',
+            'uptime_s': round(time.time() - self.started, 1),
+            'ai_enabled': self.assistant.ai_enabled,
+            **self.pool.status(),
+        }
+
+    def _metrics(self) -> Dict[str, Any]:
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'counters': dict(self.counters),
+            'pool': self.pool.status(),
+            'websockets': len(self.websockets),
+            'sessions': self.registry.stats(),
+            'routes': dict(self.assistant.router.hits),
+            'cache': self.assistant.response_cache.stats(),
+            'openai': self.assistant.transport.stats(),
+            'coalescing': self.assistant.inflight.stats(),
+            'actions': self.assistant.actions.stats(),
+            'plugins': self.assistant.plugins.stats(),
+            'documents': self.assistant.documents.stats(),
+            'media': self.assistant.media.stats(),
+            'latency': TRACER.stats(),
+        }
+
+    # -- WebSocket ----------------------------------------------------------
+
+    async def _websocket(self, request: Request, reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter):
+        key = request.headers.get('sec-websocket-key')
+        if not key:
+            self._write_json(writer, 400, {'error': "Missing Sec-WebSocket-Key"}, False)
+            return
+        if not self._authorized(request):
+            self._write_json(writer, 401, {'error': "Missing or wrong token"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+        ws = WebSocket(reader, writer)
+        # Messages without a session id share one conversation per connection
+        default_session = f"ws-{id(ws)}"
+        self.websockets.add(ws)
+        tasks = set()
+        try:
+            while True:
+                message = await ws.receive()
+                if message is None:
+                    break
+                task = asyncio.ensure_future(self._ws_message(ws, message, default_session))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await ws.drain()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.websockets.discard(ws)
+            self.registry.discard(default_session)
+
+    async def _ws_message(self, ws: WebSocket, message: str, default_session: str):
+        """Run one WebSocket request, streaming tokens back with its id"""
+        self.counters['websocket_messages'] += 1
+        try:
+            data = json.loads(message)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            ws.send({'type': 'error', 'status': 400, 'error': "Message must be a JSON object"})
+            return
+        request_id = data.get('id')
+        kind = data.get('type', 'command')
+        query = data.get('query')
+        if kind not in ('command', 'chat') or not isinstance(query, str) or not query.strip():
+            ws.send({'id': request_id, 'type': 'error', 'status': 400,
+                     'error': "Expected {\"type\": \"command\"|\"chat\", \"query\": ...}"})
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def on_token(token: str):
+            loop.call_soon_threadsafe(ws.send, {'id': request_id, 'type': 'token', 'text': token})
+
+        self._busy += 1
+        start = time.perf_counter()
+        try:
+            response = await self.submit_turn(kind, query, data.get('session') or default_session,
+                                              on_token, _settings(data))
+            await asyncio.sleep(0)
+            ws.send({'id': request_id, 'type': 'done', 'response': response})
+        except ServerBusy:
+            ws.send({'id': request_id, 'type': 'error', 'status': 503, 'error': "Server busy"})
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            ws.send({'id': request_id, 'type': 'error', 'status': 504, 'error': "Timed out"})
+        except Exception as e:
+            logger.error(f"WebSocket request error: {e}")
+            self.counters['errors'] += 1
+            ws.send({'id': request_id, 'type': 'error', 'status': 500, 'error': str(e)})
+        finally:
+            self._busy -= 1
+            TRACER.record('server.request', time.perf_counter() - start)
+        try:
+            await ws.drain()
+        except ConnectionError:
+            pass
+
+
+def _settings(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Session settings given in a request body"""
+    settings = {}
+    for key in ('name', 'assistant_name', 'model'):
+        if isinstance(body.get(key), str):
+            settings[key] = body[key]
+    if isinstance(body.get('temperature'), (int, float)):
+        settings['temperature'] = float(body['temperature'])
+    return settings
+
+
+def serve(assistant, host: Optional[str] = None, port: Optional[int] = None):
+    """Run an AssistantServer configured from assistant.config until stopped"""
+    config = assistant.config
+    server = AssistantServer(
+        assistant,
+        host=host or config.get('server_host', '127.0.0.1'),
+        port=port if port is not None else config.get('server_port', 8765),
+        workers=config.get('server_workers', 4),
+        max_queue=config.get('server_max_queue', 16),
+        request_timeout=config.get('server_request_timeout', 60),
+        token=config.get('server_token', ''),
+    )
+
+    async def main():
+        await server.start()
+        print(f"🌐 Serving on http://{server.host}:{server.port} "
+              f"(WebSocket: ws://{server.host}:{server.port}/ws) - Ctrl+C to stop")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    except UnsafeBindError as e:
+        print(f"❌ {e}")
+        return
+    print("👋 Server stopped")
@@ -0,0 +1,458 @@
+"""
+AI Assistant Session Store
+Append-only conversation log in SQLite (WAL) with a background writer,
+plus a registry of live sessions that evicts idle ones to snapshots
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import queue
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    updated REAL NOT NULL,
+    origin TEXT NOT NULL DEFAULT 'local'
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages (session_id, ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated);
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id TEXT PRIMARY KEY,
+    updated REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# Where a session's messages come from: the local user, or a server client
+LOCAL = 'local'
+REMOTE = 'remote'
+
+# Logs written before sessions had an origin: server sessions are the ones
+# with snapshots or with ids that new_session_id() did not make
+MIGRATE_ORIGIN = """
+ALTER TABLE sessions ADD COLUMN origin TEXT NOT NULL DEFAULT 'local';
+UPDATE sessions SET origin = 'remote'
+ WHERE id IN (SELECT session_id FROM snapshots)
+    OR id NOT GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]-[0-9][0-9][0-9][0-9][0-9][0-9]-??????';
+"""
+
+# Most writes the background thread commits in one transaction
+WRITE_BATCH = 200
+
+
+class _Snapshot:
+    def __init__(self, session_id: str, ts: float, data: str):
+        self.session_id = session_id
+        self.ts = ts
+        self.data = data
+
+
+def new_session_id() -> str:
+    """Return a sortable, unique session id"""
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+class SessionStore:
+    """Durable, append-only store of conversation messages
+
+    record() only queues the message; a writer thread commits queued
+    messages in batches so callers never wait on disk. Reads use their own
+    connection and only touch the rows they ask for, so resuming a
+    session costs the same however much history has accumulated.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        # Snapshots queued but not yet committed, so reads see them at once
+        self._pending_snapshots: Dict[str, str] = {}
+        self._snapshot_lock = threading.Lock()
+
+        db = self._connect()
+        db.executescript(SCHEMA)
+        columns = [row[1] for row in db.execute("PRAGMA table_info(sessions)")]
+        if 'origin' not in columns:
+            db.executescript(MIGRATE_ORIGIN)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_origin "
+                   "ON sessions (origin, updated)")
+        db.commit()
+        self._reader = db
+
+        self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.path), check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(self, session_id: str, role: str, content: str,
+               timestamp: Optional[float] = None, origin: str = LOCAL):
+        """Queue a message for writing and return immediately
+
+        origin is LOCAL for the user's own conversations and REMOTE for
+        server clients'; it is fixed by a session's first message.
+        """
+        self._queue.put((session_id, timestamp or time.time(), role, content, origin))
+
+    def _run(self):
+        """Commit queued messages in batches until close() is called"""
+        db = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = []
+            snapshots = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    continue
+                elif isinstance(item, _Snapshot):
+                    snapshots.append(item)
+                else:
+                    rows.append(item)
+
+            if snapshots:
+                try:
+                    with db:
+                        db.executemany(
+                            "INSERT OR REPLACE INTO snapshots (session_id, updated, data) "
+                            "VALUES (?, ?, ?)",
+                            [(s.session_id, s.ts, s.data) for s in snapshots]
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to write session snapshots: {e}")
+                with self._snapshot_lock:
+                    for snapshot in snapshots:
+                        if self._pending_snapshots.get(snapshot.session_id) is snapshot.data:
+                            del self._pending_snapshots[snapshot.session_id]
+
+            if rows:
+                try:
+                    latest = {}
+                    for session_id, ts, _, _, origin in rows:
+                        latest[session_id] = (ts, origin)
+                    with db:
+                        for session_id, (ts, origin) in latest.items():
+                            db.execute(
+                                "INSERT OR IGNORE INTO sessions (id, started, updated, origin) "
+                                "VALUES (?, ?, ?, ?)",
+                                (session_id, ts, ts, origin)
+                            )
+                            db.execute(
+                                "UPDATE sessions SET updated = ? WHERE id = ?",
+                                (ts, session_id)
+                            )
+                        db.executemany(
+                            "INSERT INTO messages (session_id, ts, role, content) "
+                            "VALUES (?, ?, ?, ?)",
+                            [row[:4] for row in rows]
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to write session messages: {e}")
+
+            # Wake flush() callers once everything queued before them is written
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+        db.close()
+
+    def save_snapshot(self, session_id: str, data: Dict[str, Any]):
+        """Queue a session snapshot, replacing any earlier one"""
+        encoded = json.dumps(data)
+        with self._snapshot_lock:
+            self._pending_snapshots[session_id] = encoded
+        self._queue.put(_Snapshot(session_id, time.time(), encoded))
+
+    def load_snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the latest snapshot of a session, or None"""
+        with self._snapshot_lock:
+            encoded = self._pending_snapshots.get(session_id)
+        if encoded is None:
+            with self._read_lock:
+                row = self._reader.execute(
+                    "SELECT data FROM snapshots WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            encoded = row[0]
+        try:
+            return json.loads(encoded)
+        except ValueError as e:
+            logger.error(f"Corrupt snapshot for session {session_id}: {e}")
+            return None
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every message recorded so far is on disk"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def last_session(self, origin: str = LOCAL) -> Optional[str]:
+        """Return the id of the most recently updated session of this origin"""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT id FROM sessions WHERE origin = ? ORDER BY updated DESC LIMIT 1",
+                (origin,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """List recent sessions, newest first"""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT id, started, updated, origin FROM sessions "
+                "ORDER BY updated DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [{'id': r[0], 'started': r[1], 'updated': r[2], 'origin': r[3]} for r in rows]
+
+    def tail(self, session_id: str, limit: int = 50,
+             before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return up to limit messages of a session in order, ending before before_id
+
+        Page further back by passing the id of the first message returned.
+        """
+        sql = "SELECT id, ts, role, content FROM messages WHERE session_id = ?"
+        params: list = [session_id]
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [{'id': r[0], 'ts': r[1], 'role': r[2], 'content': r[3]}
+                for r in reversed(rows)]
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Write everything still queued and stop the writer"""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+        with self._read_lock:
+            self._reader.close()
+
+
+class Session:
+    """One conversation with its own history, assistant name and model settings
+
+    Settings left as None fall back to the assistant's config. origin is
+    REMOTE for server clients, who must not reach the user's files or
+    desktop.
+    """
+
+    SETTINGS = ('name', 'assistant_name', 'model', 'temperature')
+
+    def __init__(self, session_id: str, history, name: Optional[str] = None,
+                 assistant_name: Optional[str] = None, model: Optional[str] = None,
+                 temperature: Optional[float] = None, origin: str = LOCAL):
+        self.session_id = session_id
+        self.history = history
+        self.origin = origin
+        self.name = name
+        self.assistant_name = assistant_name
+        self.model = model
+        self.temperature = temperature
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        # Turns currently running; busy sessions are never evicted
+        self.active = 0
+
+    def update(self, **settings):
+        """Change settings; unknown keys are ignored"""
+        for key, value in settings.items():
+            if key in self.SETTINGS:
+                setattr(self, key, value)
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    @property
+    def remote(self) -> bool:
+        return self.origin == REMOTE
+
+    @property
+    def size_bytes(self) -> int:
+        return self.history.size_bytes + 500
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain data from which the session can be rebuilt"""
+        data = {key: getattr(self, key) for key in self.SETTINGS}
+        data['created'] = self.created
+        data['history'] = self.history.state()
+        return data
+
+    def __repr__(self):
+        return f"Session({self.session_id!r}, messages={len(self.history)})"
+
+
+class SessionRegistry:
+    """Live sessions by id, evicted to snapshots when idle or over the ceiling
+
+    get() returns the live session, rehydrates it from its snapshot, or
+    creates it. Sessions unused for idle_timeout seconds are evicted by
+    sweep(), which get() also runs every minute or so. When there are more
+    than max_sessions, or their history text exceeds memory_limit bytes,
+    the least recently used ones go first. Snapshots are kept in the
+    SessionStore when there is one, otherwise in memory (bounded). Their
+    messages are recorded as REMOTE, so --resume never picks them up.
+    """
+
+    def __init__(self, new_history: Callable[[], Any], store: Optional[SessionStore] = None,
+                 idle_timeout: float = 1800, max_sessions: int = 50,
+                 memory_limit: int = 32 * 1024 * 1024):
+        self.new_history = new_history
+        self.store = store
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.memory_limit = memory_limit
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.created = 0
+        self.rehydrated = 0
+        self.evicted = 0
+        self._next_sweep = time.monotonic() + min(60.0, idle_timeout)
+
+    def get(self, session_id: Optional[str] = None, **settings) -> Session:
+        """Return the session with this id (a new one when None), marked as used"""
+        with self._lock:
+            if time.monotonic() >= self._next_sweep:
+                self.sweep()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = self._load(session_id or new_session_id())
+                self._sessions[session.session_id] = session
+            else:
+                self._sessions.move_to_end(session.session_id)
+            session.update(**settings)
+            session.touch()
+            self._enforce(keep=session)
+            return session
+
+    def _load(self, session_id: str) -> Session:
+        """Rebuild a session from its snapshot, or create an empty one"""
+        data = self._snapshots.pop(session_id, None)
+        if data is None and self.store is not None:
+            data = self.store.load_snapshot(session_id)
+        session = Session(session_id, self._history_for(session_id), origin=REMOTE)
+        if data is None:
+            self.created += 1
+            return session
+        session.update(**{k: data.get(k) for k in Session.SETTINGS})
+        session.created = data.get('created', session.created)
+        session.history.load_state(data.get('history', {}))
+        self.rehydrated += 1
+        return session
+
+    def _history_for(self, session_id: str):
+        history = self.new_history()
+        if self.store is not None:
+            store = self.store
+            history.listener = lambda m: store.record(session_id, m.get('role', ''),
+                                                      m.get('content', ''), origin=REMOTE)
+        return history
+
+    def evict(self, session_id: str) -> bool:
+        """Snapshot a session and drop it from memory"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            data = session.snapshot()
+            if self.store is not None:
+                self.store.save_snapshot(session_id, data)
+            else:
+                self._snapshots[session_id] = data
+                while len(self._snapshots) > self.max_sessions * 10:
+                    self._snapshots.popitem(last=False)
+            self.evicted += 1
+            return True
+
+    def discard(self, session_id: str):
+        """Forget a session without keeping a snapshot"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._snapshots.pop(session_id, None)
+
+    def sweep(self) -> int:
+        """Evict sessions idle for longer than idle_timeout; returns how many"""
+        now = time.monotonic()
+        cutoff = now - self.idle_timeout
+        with self._lock:
+            self._next_sweep = now + min(60.0, self.idle_timeout)
+            idle = [sid for sid, s in self._sessions.items()
+                    if s.last_used < cutoff and not s.active]
+            for session_id in idle:
+                self.evict(session_id)
+        return len(idle)
+
+    def _enforce(self, keep: Optional[Session] = None):
+        """Evict least recently used sessions until under both limits"""
+        total = sum(s.size_bytes for s in self._sessions.values())
+        for session_id, session in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_sessions and total <= self.memory_limit:
+                break
+            if session is keep or session.active:
+                continue
+            total -= session.size_bytes
+            self.evict(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def live(self) -> List[Session]:
+        """Sessions currently held in memory"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'live': len(self._sessions),
+                'bytes': sum(s.size_bytes for s in self._sessions.values()),
+                'created': self.created,
+                'rehydrated': self.rehydrated,
+                'evicted': self.evicted,
+            }
+
+    def close(self):
+        """Snapshot every live session"""
+        with self._lock:
+            for session_id in list(self._sessions):
+                self.evict(session_id)
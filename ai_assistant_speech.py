@@ -0,0 +1,276 @@
+"""
+AI Assistant Speech Worker
+One long-lived thread that owns the TTS engine
+"""
+
+import itertools
+import time
+import threading
+import queue
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from ai_assistant_metrics import TRACER
+from ai_assistant_audio_cache import AudioCache, AudioPlayer
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+# Cache renders only run while nothing else is waiting to be spoken
+PRIORITY_BACKGROUND = 10
+
+
+class Utterance:
+    """A queued piece of text; wait() blocks until it was spoken or dropped"""
+
+    def __init__(self, text: str, priority: int = PRIORITY_NORMAL,
+                 cache: bool = False, render_only: bool = False,
+                 action: Optional[Callable[[Any], None]] = None):
+        self.text = text
+        self.priority = priority
+        self.cache = cache
+        self.render_only = render_only
+        self.action = action
+        self.cancelled = False
+        self.done = threading.Event()
+        self.queued_at = time.perf_counter()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the utterance finished; returns False on timeout"""
+        return self.done.wait(timeout)
+
+    @property
+    def background(self) -> bool:
+        """Engine work that isn't speech (cache renders, reconfiguration)"""
+        return self.render_only or self.action is not None
+
+
+class SpeechWorker:
+    """Serialize all speech through one thread and a priority queue
+
+    The pyttsx3 engine is not safe for concurrent use, so only the worker
+    thread ever calls say()/runAndWait(). interrupt() drops queued
+    utterances and stops the one currently playing (barge-in).
+
+    The engine is created by engine_factory on the worker thread the first
+    time something is spoken (or on warm_up()), so startup never waits for
+    it. Pass None to disable speech.
+
+    With an audio_cache, utterances queued with cache=True are played from
+    pre-rendered files; a miss is spoken live and rendered afterwards, when
+    the queue is idle, so the next time it plays without synthesis.
+    """
+
+    def __init__(self, engine_factory: Optional[Callable[[], Any]],
+                 audio_cache: Optional[AudioCache] = None,
+                 player: Optional[AudioPlayer] = None):
+        self.engine_factory = engine_factory
+        self.engine = None
+        self.enabled = engine_factory is not None
+        self.audio_cache = audio_cache
+        self.player = player
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        # Queued items that aren't speech (renders, engine updates); changed
+        # by callers and the worker, so only under _background_lock
+        self._background = 0
+        self._background_lock = threading.Lock()
+        self._current: Optional[Utterance] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def warm_up(self):
+        """Start the worker (and create the engine) in the background"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+                self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of utterances waiting to be spoken"""
+        with self._background_lock:
+            return max(0, self._queue.qsize() - self._background)
+
+    @property
+    def speaking(self) -> bool:
+        """True while an utterance is playing"""
+        current = self._current
+        return current is not None and not current.background
+
+    def status(self) -> Dict[str, Any]:
+        """Return the current speaking state and queue depth"""
+        return {'speaking': self.speaking, 'queued': self.queue_depth}
+
+    def say(self, text: str, priority: int = PRIORITY_NORMAL,
+            cache: bool = False) -> Utterance:
+        """Queue text for speech and return immediately
+
+        cache=True marks a fixed phrase worth keeping as rendered audio.
+        """
+        utterance = Utterance(text, priority, cache=cache and self.audio_cache is not None)
+        if not self.enabled or not text:
+            utterance.done.set()
+            return utterance
+        self.warm_up()
+        self._queue.put((priority, next(self._seq), utterance))
+        if not self.enabled:
+            # The engine failed to start while we were queueing
+            self.flush()
+        return utterance
+
+    def prewarm(self, phrases: Iterable[str]) -> int:
+        """Render phrases that aren't cached yet in the background
+
+        Returns the number of phrases queued for rendering.
+        """
+        if not self.enabled or self.audio_cache is None:
+            return 0
+        missing = self.audio_cache.missing(phrases)
+        for text in missing:
+            self._render_later(text)
+        if missing:
+            self.warm_up()
+        return len(missing)
+
+    def _render_later(self, text: str):
+        self._put_background(PRIORITY_BACKGROUND,
+                             Utterance(text, PRIORITY_BACKGROUND, render_only=True))
+
+    def _put_background(self, priority: int, utterance: Utterance):
+        with self._background_lock:
+            self._background += 1
+            self._queue.put((priority, next(self._seq), utterance))
+
+    def _background_taken(self):
+        with self._background_lock:
+            self._background -= 1
+
+    def configure(self, action: Callable[[Any], None]):
+        """Run action(engine) on the worker before the next utterance
+
+        Used to apply new voice settings to a live engine. Does nothing if
+        the engine hasn't been started, since the factory will read the
+        current settings anyway.
+        """
+        if not self.enabled or self._thread is None:
+            return
+        self._put_background(PRIORITY_HIGH, Utterance("", PRIORITY_HIGH, action=action))
+
+    def flush(self):
+        """Drop every utterance that hasn't started yet (background work is kept)"""
+        keep = []
+        # Held so queue_depth never sees the kept items half re-queued
+        with self._background_lock:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                utterance = item[2]
+                if utterance is None:
+                    # Keep the shutdown request queued
+                    keep.append(item)
+                    break
+                if utterance.background:
+                    keep.append(item)
+                    continue
+                utterance.cancelled = True
+                utterance.done.set()
+            for item in keep:
+                self._queue.put(item)
+
+    def interrupt(self):
+        """Flush the queue and stop the utterance currently playing"""
+        self.flush()
+        current = self._current
+        if current is not None and not current.background and self.engine is not None:
+            current.cancelled = True
+            if self.player is not None:
+                self.player.stop()
+            try:
+                self.engine.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop speech: {e}")
+
+    def _run(self):
+        """Create the engine, then speak queued utterances one at a time"""
+        try:
+            self.engine = self.engine_factory()
+        except Exception as e:
+            logger.error(f"Text-to-speech initialization failed: {e}")
+            self.engine = None
+        if self.engine is None:
+            self.enabled = False
+            self.flush()
+            return
+
+        while True:
+            _, _, utterance = self._queue.get()
+            if utterance is None:
+                break
+            if utterance.action is not None:
+                self._background_taken()
+                try:
+                    utterance.action(self.engine)
+                except Exception as e:
+                    logger.error(f"Speech engine update failed: {e}")
+                utterance.done.set()
+                continue
+            if utterance.render_only:
+                self._background_taken()
+                self._render(utterance)
+                continue
+            if utterance.cancelled:
+                continue
+
+            self._current = utterance
+            TRACER.record('tts.queue_wait', time.perf_counter() - utterance.queued_at)
+            try:
+                with TRACER.span('tts.playback'):
+                    self._speak(utterance)
+            except Exception as e:
+                logger.error(f"Speech error: {e}")
+            finally:
+                self._current = None
+                utterance.done.set()
+
+    def _speak(self, utterance: Utterance):
+        """Play the cached rendering if there is one, else synthesize live"""
+        path = self.audio_cache.get(utterance.text) if utterance.cache else None
+        if path is not None:
+            if self.player.play(path) or utterance.cancelled:
+                return
+            logger.warning("Cached audio failed to play; synthesizing instead")
+
+        # pyttsx3 synthesizes and plays inside runAndWait()
+        self.engine.say(utterance.text)
+        self.engine.runAndWait()
+        if utterance.cache and path is None and not utterance.cancelled:
+            self._render_later(utterance.text)
+
+    def _render(self, utterance: Utterance):
+        """Render a phrase into the audio cache unless it already is there"""
+        if self.audio_cache.contains(utterance.text):
+            utterance.done.set()
+            return
+        self._current = utterance
+        try:
+            self.audio_cache.render(utterance.text, self.engine)
+        finally:
+            self._current = None
+            utterance.done.set()
+
+    def shutdown(self, timeout: Optional[float] = 2.0):
+        """Stop speaking and end the worker thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.interrupt()
+        self._queue.put((-1, next(self._seq), None))
+        self._thread.join(timeout)
+        self._thread = None
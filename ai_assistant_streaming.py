@@ -0,0 +1,70 @@
+"""
+AI Assistant Streaming Helpers
+Sentence-level incremental speech for streamed LLM responses
+"""
+
+import re
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at terminal punctuation (optionally followed by closing
+# quotes/brackets) and whitespace. Decimals such as "3.5" don't match because
+# there is no whitespace after the dot.
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+# Don't hand tiny fragments like "Hi." to the TTS engine on their own
+MIN_SENTENCE_CHARS = 12
+
+
+class SentenceSplitter:
+    """Cut a token stream into complete sentences as they arrive"""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """Add a token and return any sentences it completed"""
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            end = match.end()
+            if end - start < self.min_chars:
+                continue
+            sentence = self.buffer[start:end].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = end
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return rest or None
+
+
+class StreamingSpeaker:
+    """Speak sentences from a token stream while the rest is still generating"""
+
+    def __init__(self, speech):
+        self.speech = speech
+        self.splitter = SentenceSplitter()
+        self.last = None
+
+    def feed(self, token: str):
+        """Feed a streamed token; complete sentences are queued for speech at once"""
+        for sentence in self.splitter.feed(token):
+            self.last = self.speech.say(sentence)
+
+    def finish(self, wait: bool = True):
+        """Queue the trailing fragment and optionally wait until speech is done"""
+        rest = self.splitter.flush()
+        if rest:
+            self.last = self.speech.say(rest)
+        if wait and self.last is not None:
+            self.last.wait()
@@ -0,0 +1,135 @@
+"""
+AI Assistant Transcript View
+Bounded, batched rendering of the conversation into a Tk text widget
+"""
+
+import datetime
+import threading
+import logging
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+TRIM_NOTICE = "⋯ Earlier messages were trimmed from view. Click here or use 📜 History to see them.\n\n"
+
+
+class TranscriptView:
+    """Append-only transcript that keeps only the newest messages in the widget
+
+    add() and append() may be called from any thread. Calls are queued and
+    applied in the next frame of the UI event bus, so a burst of streamed
+    tokens costs one widget update, one state toggle and one scroll.
+
+    When more than max_messages are shown, the oldest are deleted in one
+    go. Trimming works in batches of about a tenth of the limit, so it
+    doesn't run on every message. The full conversation stays in the
+    session store.
+    """
+
+    def __init__(self, bus, widget: tk.Text, max_messages: int = 500,
+                 on_notice_click: Optional[Callable[[], None]] = None):
+        self.bus = bus
+        self.widget = widget
+        self.max_messages = max(1, max_messages)
+        self.trim_batch = max(1, self.max_messages // 10)
+        self.trimmed = 0
+        self._pending: List[Tuple[str, str, str]] = []
+        self._lock = threading.Lock()
+        # Marks at the start of each message still shown, oldest first
+        self._marks: Deque[str] = deque()
+        self._next_mark = 0
+
+        widget.tag_config("notice", foreground="#6c7086", font=("Consolas", 9, "italic"))
+        if on_notice_click:
+            widget.tag_bind("notice", "<Button-1>", lambda e: on_notice_click())
+            widget.tag_config("notice", underline=True)
+
+    def add(self, header: str, header_tag: str, text: str = "", tag: str = "assistant",
+            end: str = "\n\n"):
+        """Start a new message: a timestamped header, then text
+
+        Pass end="" to keep the message open for append().
+        """
+        timestamp = datetime.datetime.now().strftime("%H:%M")
+        self._queue(("start", f"[{timestamp}] {header}", header_tag))
+        if text or end:
+            self._queue(("text", text + end, tag))
+
+    def append(self, text: str, tag: str = "assistant"):
+        """Add text to the end of the current message"""
+        self._queue(("text", text, tag))
+
+    def clear(self):
+        """Remove everything from the view"""
+        with self._lock:
+            self._pending.append(("clear", "", ""))
+        self._schedule()
+
+    def _queue(self, op: Tuple[str, str, str]):
+        with self._lock:
+            # Consecutive text with the same tag becomes one insert
+            if op[0] == "text" and self._pending and self._pending[-1][0] == "text" \
+                    and self._pending[-1][2] == op[2]:
+                last = self._pending[-1]
+                self._pending[-1] = ("text", last[1] + op[1], op[2])
+            else:
+                self._pending.append(op)
+        self._schedule()
+
+    def _schedule(self):
+        # One flush per frame however many updates arrive
+        self.bus.post(self._flush, key='transcript')
+
+    def _flush(self):
+        """Apply every queued update in one widget transaction (Tk thread)"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        widget = self.widget
+        try:
+            # Only follow new output if the user hasn't scrolled up to read
+            follow = widget.yview()[1] >= 0.999
+            widget.config(state=tk.NORMAL)
+            for kind, text, tag in pending:
+                if kind == "clear":
+                    self._clear()
+                    continue
+                if kind == "start":
+                    mark = f"msg{self._next_mark}"
+                    self._next_mark += 1
+                    widget.mark_set(mark, "end-1c")
+                    widget.mark_gravity(mark, tk.LEFT)
+                    self._marks.append(mark)
+                widget.insert(tk.END, text, tag)
+            if len(self._marks) > self.max_messages + self.trim_batch:
+                self._trim(len(self._marks) - self.max_messages)
+            widget.config(state=tk.DISABLED)
+            if follow:
+                widget.see(tk.END)
+        except tk.TclError as e:
+            logger.debug(f"Transcript update skipped: {e}")
+
+    def _trim(self, count: int):
+        """Delete the oldest count messages with a single delete"""
+        for _ in range(count):
+            self.widget.mark_unset(self._marks.popleft())
+        self.widget.delete("1.0", self._marks[0])
+        self.widget.insert("1.0", TRIM_NOTICE, "notice")
+        self.trimmed += count
+        logger.debug(f"Trimmed {count} messages from the transcript")
+
+    def _clear(self):
+        self.widget.delete("1.0", tk.END)
+        for mark in self._marks:
+            self.widget.mark_unset(mark)
+        self._marks.clear()
+        self.trimmed = 0
+
+    def __len__(self) -> int:
+        """Messages currently shown"""
+        return len(self._marks)
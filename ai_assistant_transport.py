@@ -0,0 +1,286 @@
+"""
+AI Assistant OpenAI Transport
+Pooled connections, deadlines, jittered retries and a circuit breaker
+"""
+
+import time
+import random
+import asyncio
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (408, 409, 429)
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered unhealthy; the call was not attempted"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"OpenAI circuit open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures
+
+    After failure_threshold consecutive retryable failures the breaker
+    opens and rejects calls for reset_timeout seconds. Then one probe call
+    is let through (half-open): success closes the breaker, failure opens
+    it again. A probe that ends any other way (a 4xx, cancellation) must
+    be released so the next call can probe instead.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Return whether a call may go upstream now"""
+        return self.admit() is not None
+
+    def admit(self) -> Optional[bool]:
+        """None if the call is rejected, else whether it is the half-open probe"""
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and self.retry_in() == 0:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                logger.info("OpenAI circuit closed")
+            self.state = self.CLOSED
+
+    def release(self):
+        """End a probe that recorded no outcome so the next call can probe"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                logger.warning(f"OpenAI circuit opened after {self.failures} failures")
+
+
+def status_of(error: Exception) -> Optional[int]:
+    """HTTP status carried by an OpenAI SDK error, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx, timeouts and connection failures are worth another try"""
+    status = status_of(error)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    try:
+        import openai
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+    except (ImportError, AttributeError):
+        pass
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the server (Retry-After / retry-after-ms), in seconds"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after-ms')
+        if value is not None:
+            return float(value) / 1000
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class OpenAITransport:
+    """Wrap OpenAI calls with a deadline, retries and a circuit breaker
+
+    The SDK's own retries are disabled (client_options sets max_retries=0)
+    so that every attempt is counted here and the whole turn, backoff
+    included, stays within the deadline. One transport is shared by the
+    sync and async clients.
+    """
+
+    def __init__(self, deadline: float = 30.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 pool_size: int = 10, keepalive: float = 120.0):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.counters = {'calls': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'OpenAITransport':
+        return cls(
+            deadline=config.get('openai_timeout', 30),
+            max_retries=config.get('openai_max_retries', 2),
+            backoff_base=config.get('openai_backoff_base', 0.5),
+            backoff_max=config.get('openai_backoff_max', 8),
+            breaker=CircuitBreaker(config.get('openai_breaker_threshold', 5),
+                                   config.get('openai_breaker_reset', 30)),
+            pool_size=config.get('openai_pool_size', 10),
+            keepalive=config.get('openai_keepalive', 120),
+        )
+
+    def client_options(self, async_client: bool = False) -> Dict[str, Any]:
+        """Extra keyword arguments for OpenAI()/AsyncOpenAI()"""
+        options: Dict[str, Any] = {'timeout': self.deadline, 'max_retries': 0}
+        http_client = self._http_client(async_client)
+        if http_client is not None:
+            options['http_client'] = http_client
+        return options
+
+    def _http_client(self, async_client: bool):
+        """Pooled HTTP client that keeps connections warm between turns
+
+        httpx drops idle connections after 5 s by default, so a pause in
+        the conversation would cost a new TLS handshake. Returns None (SDK
+        defaults) when httpx or the SDK's client classes are unavailable.
+        """
+        try:
+            import httpx
+            import openai
+            factory = openai.DefaultAsyncHttpxClient if async_client else openai.DefaultHttpxClient
+            limits = httpx.Limits(max_connections=self.pool_size,
+                                  max_keepalive_connections=self.pool_size,
+                                  keepalive_expiry=self.keepalive)
+            return factory(limits=limits)
+        except (ImportError, AttributeError, TypeError) as e:
+            logger.debug(f"Using the SDK's default HTTP client: {e}")
+            return None
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+    def _before_attempt(self, deadline: float) -> Tuple[float, bool]:
+        """Check the breaker and deadline; returns the time left and whether this is a probe"""
+        probe = self.breaker.admit()
+        if probe is None:
+            self.counters['rejected'] += 1
+            raise CircuitOpenError(self.breaker.retry_in())
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if probe:
+                self.breaker.release()
+            raise TimeoutError(f"OpenAI request exceeded {self.deadline}s")
+        return remaining, probe
+
+    def _after_failure(self, attempt: int, error: Exception, deadline: float) -> float:
+        """Record a failed attempt; returns the delay before retrying or re-raises"""
+        if not is_retryable(error):
+            raise error
+        self.counters['failures'] += 1
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+        delay = self._backoff(attempt, error)
+        if time.monotonic() + delay >= deadline:
+            raise error
+        self.counters['retries'] += 1
+        logger.warning(f"OpenAI request failed ({error}); retrying in {delay:.1f}s")
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call fn (an SDK method), retrying within the deadline"""
+        self.counters['calls'] += 1
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining, probe = self._before_attempt(deadline)
+            try:
+                try:
+                    result = fn(*args, timeout=remaining, **kwargs)
+                except Exception as e:
+                    delay = self._after_failure(attempt, e, deadline)
+                else:
+                    self.breaker.record_success()
+                    return result
+            finally:
+                # A probe that ended in a 4xx or an interrupt recorded no
+                # outcome; without this the breaker stays half-open for good
+                if probe:
+                    self.breaker.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Async version of call() for AsyncOpenAI methods"""
+        self.counters['calls'] += 1
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining, probe = self._before_attempt(deadline)
+            try:
+                try:
+                    result = await fn(*args, timeout=remaining, **kwargs)
+                except Exception as e:
+                    delay = self._after_failure(attempt, e, deadline)
+                else:
+                    self.breaker.record_success()
+                    return result
+            finally:
+                # Also covers CancelledError, which is not an Exception
+                if probe:
+                    self.breaker.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, 'circuit': self.breaker.state, 'trips': self.breaker.trips}
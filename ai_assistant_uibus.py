@@ -0,0 +1,120 @@
+"""
+AI Assistant UI Event Bus
+Worker threads post UI updates; the Tk main loop applies them
+"""
+
+import time
+import itertools
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from ai_assistant_metrics import TRACER
+
+logger = logging.getLogger(__name__)
+
+# Cadence at which the Tk loop drains the bus (about one frame)
+FRAME_MS = 16
+
+# Log when the UI falls this far behind (seconds)
+LAG_WARNING = 0.25
+
+
+class UIEventBus:
+    """Queue of UI updates drained by the Tk main loop at a fixed cadence
+
+    Tk widgets may only be touched from the thread running mainloop(), so
+    workers call post() instead of root.after(). Updates posted with a key
+    replace any pending update with the same key: ten status changes in
+    one frame become one repaint, and only the latest button state is
+    applied. Updates without a key run in the order they were posted.
+
+    Lag is the time from the oldest update being posted until the frame
+    that applied it; it is recorded as the 'ui.lag' stage.
+    """
+
+    def __init__(self, root, interval_ms: int = FRAME_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._pending: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._after_id: Optional[str] = None
+        self._last_warning = 0.0
+        self.counters = {'posted': 0, 'coalesced': 0, 'applied': 0, 'frames': 0, 'errors': 0}
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def post(self, fn: Callable[..., Any], *args, key: Optional[Hashable] = None):
+        """Queue fn(*args) for the Tk thread; safe to call from any thread"""
+        now = time.perf_counter()
+        with self._lock:
+            self.counters['posted'] += 1
+            if key is None:
+                key = ('event', next(self._seq))
+            else:
+                previous = self._pending.pop(key, None)
+                if previous is not None:
+                    self.counters['coalesced'] += 1
+                    # Lag is measured from the first of the merged updates
+                    now = previous[2]
+            self._pending[key] = (fn, args, now)
+
+    def start(self):
+        """Begin draining on the Tk loop (call from the Tk thread)"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _pump(self):
+        self._after_id = None
+        self.drain()
+        self._after_id = self.root.after(self.interval_ms, self._pump)
+
+    def drain(self) -> int:
+        """Apply every pending update now (Tk thread); returns how many ran"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        lag = time.perf_counter() - min(posted for _, _, posted in pending)
+        for fn, args, _ in pending:
+            try:
+                fn(*args)
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error(f"UI update failed: {e}")
+
+        self.counters['applied'] += len(pending)
+        self.counters['frames'] += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        TRACER.record('ui.lag', lag)
+        if lag > LAG_WARNING and time.monotonic() - self._last_warning > 10:
+            self._last_warning = time.monotonic()
+            logger.warning(f"UI is running {lag * 1000:.0f} ms behind")
+        return len(pending)
+
+    @property
+    def backlog(self) -> int:
+        """Updates waiting for the next frame"""
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            'pending': self.backlog,
+            'last_lag_ms': round(self.last_lag * 1000, 1),
+            'max_lag_ms': round(self.max_lag * 1000, 1),
+        }
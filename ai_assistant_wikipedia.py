@@ -0,0 +1,339 @@
+"""
+AI Assistant Wikipedia
+"Who is / what is" answers from Wikipedia summaries, cached in SQLite FTS5
+"""
+
+import re
+import json
+import time
+import sqlite3
+import threading
+import logging
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "AIAssistant/2.1 (desktop voice assistant)"
+
+# Words left over from the question that aren't part of the topic
+FILLER = {'a', 'an', 'the', 'was', 'were', 'are', 'is', 'about', 'me', 'tell'}
+
+QUESTION_WORDS = ('who is', 'who was', 'who are', 'what is', 'what was', 'what are',
+                  'tell me about')
+
+MAX_SENTENCES = 2
+
+# Questions about the assistant or the user ("what is your name") are
+# conversation, not encyclopedia topics
+PERSONAL = {'i', 'me', 'my', 'mine', 'myself', 'you', 'your', 'yours', 'yourself',
+            'we', 'us', 'our', 'ours'}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+_FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def topic_of(query: str) -> str:
+    """The subject of a question, e.g. 'who was Ada Lovelace?' -> 'ada lovelace'"""
+    words = _FTS_TOKEN.findall(query.lower())
+    lowered = " ".join(words)
+    for phrase in QUESTION_WORDS:
+        if lowered.startswith(phrase + " "):
+            words = words[len(phrase.split()):]
+            break
+    while words and words[0] in FILLER:
+        words = words[1:]
+    return " ".join(words)
+
+
+def relevant(topic: str, title: str) -> bool:
+    """Whether an article title is about the topic rather than merely mentioning it
+
+    Every word of the topic must be in the title ("einstein" / "Albert
+    Einstein"), ignoring a parenthesized qualifier like "(programming
+    language)". A title covering only part of the topic ("Password" for
+    "wifi password") is not a match.
+    """
+    topic_words = set(_FTS_TOKEN.findall(topic.lower())) - FILLER
+    title_words = set(_FTS_TOKEN.findall(re.sub(r"\(.*?\)", "", title).lower())) - FILLER
+    if not topic_words or not title_words:
+        return False
+    return topic_words <= title_words
+
+
+def short_summary(extract: str, sentences: int = MAX_SENTENCES) -> str:
+    """First few sentences of an article summary, for speaking"""
+    parts = _SENTENCE_END.split(extract.strip())
+    return " ".join(parts[:sentences])
+
+
+class ArticleCache:
+    """Wikipedia summaries on disk, searchable with SQLite FTS5
+
+    Each lookup query is remembered with the article it resolved to, so a
+    repeat is one indexed read. Other queries are matched against cached
+    titles with FTS5, so "who is einstein" is served by the article fetched
+    for "albert einstein". Entries older than ttl count as stale: they are
+    only returned when Wikipedia can't be reached.
+    """
+
+    def __init__(self, path: Path, ttl: float = 7 * 86400, max_entries: int = 5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles USING fts5(
+                title, summary, url UNINDEXED, fetched UNINDEXED
+            );
+            CREATE TABLE IF NOT EXISTS queries (
+                query TEXT PRIMARY KEY, title TEXT NOT NULL, fetched REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def _fresh(self, fetched: float, stale_ok: bool) -> bool:
+        return stale_ok or time.time() - fetched < self.ttl
+
+    def get(self, query: str, stale_ok: bool = False) -> Optional[Dict[str, Any]]:
+        """Cached article for query, by exact query then by title search"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT a.title, a.summary, a.url, a.fetched FROM queries q "
+                "JOIN articles a ON a.title = q.title WHERE q.query = ?", (query,)
+            ).fetchone()
+            if row is None:
+                tokens = _FTS_TOKEN.findall(query)
+                if not tokens:
+                    return None
+                # Every word of the topic must appear in the title
+                match = "title : (" + " AND ".join(f'"{t}"' for t in tokens) + ")"
+                try:
+                    row = self._db.execute(
+                        "SELECT title, summary, url, fetched FROM articles "
+                        "WHERE articles MATCH ? ORDER BY bm25(articles, 10.0, 1.0) LIMIT 1",
+                        (match,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.debug(f"Wikipedia cache search failed: {e}")
+                    row = None
+        if row is None or not self._fresh(float(row[3]), stale_ok):
+            return None
+        return {'title': row[0], 'summary': row[1], 'url': row[2], 'fetched': float(row[3])}
+
+    def put(self, article: Dict[str, Any], query: Optional[str] = None):
+        """Store an article (replacing an older copy) and the query that found it"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM articles WHERE title = ?", (article['title'],))
+            self._db.execute("INSERT INTO articles (title, summary, url, fetched) VALUES (?, ?, ?, ?)",
+                             (article['title'], article['summary'], article.get('url', ''), now))
+            if query:
+                self._db.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)",
+                                 (query, article['title'], now))
+            self._db.commit()
+
+    def prune(self) -> int:
+        """Drop the oldest articles beyond max_entries; returns how many"""
+        with self._lock:
+            count = self._db.execute("SELECT count(*) FROM articles").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self._db.execute(
+                "DELETE FROM articles WHERE rowid IN "
+                "(SELECT rowid FROM articles ORDER BY fetched LIMIT ?)", (excess,))
+            self._db.execute("DELETE FROM queries WHERE title NOT IN (SELECT title FROM articles)")
+            self._db.commit()
+        return excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class WikipediaClient:
+    """Search and summary requests against the MediaWiki APIs
+
+    Uses urllib with a timeout on every request (the wikipedia package has
+    none). base_url points at any wiki, or a local stand-in in benchmarks.
+    """
+
+    def __init__(self, base_url: str = "https://en.wikipedia.org", timeout: float = 5.0,
+                 workers: int = 4):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wikipedia")
+        self.requests = 0
+        self.errors = 0
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT,
+                                                       'Accept': 'application/json'})
+        self.requests += 1
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def search(self, topic: str, limit: int = 3) -> List[str]:
+        """Titles of the best matching articles"""
+        data = self._get("/w/api.php", {'action': 'query', 'list': 'search', 'srsearch': topic,
+                                        'srlimit': limit, 'format': 'json'})
+        return [hit['title'] for hit in data.get('query', {}).get('search', [])]
+
+    def summary(self, title: str) -> Optional[Dict[str, Any]]:
+        """Lead summary of an article; None for disambiguation pages"""
+        data = self._get("/api/rest_v1/page/summary/" + urllib.parse.quote(title.replace(' ', '_')))
+        if data.get('type') == 'disambiguation' or not data.get('extract'):
+            return None
+        url = data.get('content_urls', {}).get('desktop', {}).get('page', '')
+        return {'title': data.get('title', title), 'summary': data['extract'], 'url': url}
+
+    def summaries(self, titles: List[str]) -> Tuple[List[Optional[Dict[str, Any]]], int]:
+        """Fetch several summaries at once
+
+        Returns the summaries (None for failures, timeouts and
+        disambiguation pages) and how many fetches failed or timed out.
+        """
+        futures = [self._pool.submit(self.summary, title) for title in titles]
+        wait(futures, timeout=self.timeout * 1.5)
+        results = []
+        failed = 0
+        for future in futures:
+            try:
+                if not future.done():
+                    future.cancel()
+                    raise TimeoutError(f"no answer within {self.timeout * 1.5:.1f}s")
+                results.append(future.result(timeout=0))
+            except Exception as e:
+                self.errors += 1
+                failed += 1
+                logger.debug(f"Wikipedia summary failed: {e}")
+                results.append(None)
+        return results, failed
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class WikipediaAnswers:
+    """Answer a topic from the cache, fetching from Wikipedia on a miss"""
+
+    def __init__(self, cache: ArticleCache, client: WikipediaClient):
+        self.cache = cache
+        self.client = client
+        self.counters = {'hits': 0, 'fetched': 0, 'stale': 0, 'not_found': 0, 'errors': 0}
+
+    def lookup(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Article for topic, or None if Wikipedia has nothing (or is unreachable)"""
+        article = self.cache.get(topic)
+        if article is not None:
+            self.counters['hits'] += 1
+            return article
+
+        try:
+            titles = self.client.search(topic)
+            articles, failed = self.client.summaries(titles) if titles else ([], 0)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.warning(f"Wikipedia lookup failed: {e}")
+            return self._stale(topic)
+
+        best = next((a for a in articles if a and relevant(topic, a['title'])), None)
+        if best is None:
+            if failed:
+                # The article may be among the summaries that timed out
+                self.counters['errors'] += 1
+                logger.warning(f"Wikipedia lookup failed: {failed} summaries unavailable")
+                return self._stale(topic)
+            self.counters['not_found'] += 1
+            return None
+        # The runners-up are cached too, for related questions later
+        for article in articles:
+            if article:
+                self.cache.put(article, topic if article is best else None)
+        self.cache.prune()
+        self.counters['fetched'] += 1
+        return best
+
+    def _stale(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Offline: an expired answer beats none"""
+        article = self.cache.get(topic, stale_ok=True)
+        if article is not None:
+            self.counters['stale'] += 1
+        return article
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, 'articles': len(self.cache),
+                'requests': self.client.requests}
+
+    def close(self):
+        self.client.close()
+        self.cache.close()
+
+
+_service: Optional[WikipediaAnswers] = None
+_service_lock = threading.Lock()
+
+
+def service_for(assistant) -> WikipediaAnswers:
+    """The shared WikipediaAnswers for an assistant, created on first use
+
+    The wikipedia_* settings are re-read on every call, so config edits
+    apply to the next lookup.
+    """
+    global _service
+    config = assistant.config
+    with _service_lock:
+        if _service is None:
+            _service = WikipediaAnswers(
+                ArticleCache(assistant.get_directory('cache') / "wikipedia.db"),
+                WikipediaClient()
+            )
+        _service.cache.ttl = config.get('wikipedia_cache_ttl', 7 * 86400)
+        _service.client.base_url = config.get('wikipedia_url', "https://en.wikipedia.org").rstrip('/')
+        _service.client.timeout = config.get('wikipedia_timeout', 5)
+        return _service
+
+
+def answer(match, assistant) -> Optional[str]:
+    """Plugin handler for "who is" / "what is" questions
+
+    Wikipedia is asked only when the AI isn't configured, or first when
+    wikipedia_first is set; personal questions and topics without an
+    article whose title names them go straight to chat.
+    """
+    def chat():
+        return assistant.chat(match.query, on_token=match.context.get('on_token'),
+                              session=match.context.get('session'))
+
+    if assistant.ai_enabled and not assistant.config.get('wikipedia_first', False):
+        return chat()
+    topic = topic_of(match.query)
+    if not topic or PERSONAL & set(topic.split()):
+        return chat()
+    article = service_for(assistant).lookup(topic)
+    if article is None:
+        return chat()
+    return f"According to Wikipedia: {short_summary(article['summary'])}"
+
+
+def shutdown():
+    """Plugin hook: close the shared article cache and HTTP pool"""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.close()
+            _service = None
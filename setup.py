@@ -271,6 +271,8 @@ def create_directory_structure():
         "videos": base_dir / "videos",
         "documents": base_dir / "documents",
         "logs": base_dir / "logs",
+        "cache": base_dir / "cache",
+        "plugins": base_dir / "plugins",
         "temp": base_dir / "temp"
     }
     
@@ -297,6 +299,8 @@ def create_directory_structure():
                 f.write("videos/    - Place your video files here (MP4, AVI)\n")
                 f.write("documents/ - Place documents here\n")
                 f.write("logs/      - Assistant logs are stored here\n")
+                f.write("cache/     - Cached AI responses\n")
+                f.write("plugins/   - Command plugins (manifest .json + module)\n")
                 f.write("temp/      - Temporary files\n\n")
                 f.write("Configuration file: ~/.ai_assistant_config.json\n")
                 f.write("Main script: ai_assistant.py\n")
@@ -327,12 +331,29 @@ def create_config_file(directories):
         "assistant_name": "Assistant",
         "model": "gpt-3.5-turbo",
         "max_history": 10,
+        "history_token_budget": 0,
+        "cache_max_entries": 500,
+        "cache_ttl": 86400,
+        "save_sessions": True,
+        "microphone_index": None,
+        "persistent_capture": False,
+        "recognition_backend": "google",
+        "recognition_race": ["google", "sphinx"],
+        "openai_timeout": 30,
+        "openai_max_retries": 2,
+        "metrics_flush_interval": 60,
+        "server_host": "127.0.0.1",
+        "server_port": 8765,
+        "server_workers": 4,
+        "tts_cache": True,
+        "tts_cache_max_mb": 50,
         "directories": {
             "base": str(directories["base"]),
             "music": str(directories["music"]),
             "videos": str(directories["videos"]),
             "documents": str(directories["documents"]),
-            "logs": str(directories["logs"])
+            "logs": str(directories["logs"]),
+            "cache": str(directories["cache"])
         },
         "preferences": {
             "auto_listen": False,
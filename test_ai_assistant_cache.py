@@ -0,0 +1,164 @@
+"""
+Tests for the response cache and single-flight request sharing
+Run with: python -m unittest test_ai_assistant_cache
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ai_assistant_bench import REPLY_TEXT, FakeOpenAIServer, load_assistant_module, make_assistant
+from ai_assistant_cache import ResponseCache, SingleFlight, make_key
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="cache-test-"))
+        self.path = self.root / "responses.db"
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_key_ignores_case_and_punctuation_but_not_context(self):
+        key = make_key("What is Python?", "gpt-4", "prompt", [])
+        self.assertEqual(make_key("what is python", "gpt-4", "prompt", []), key)
+        self.assertNotEqual(make_key("what is python", "gpt-4o", "prompt", []), key)
+        context = [{"role": "user", "content": "hi"}]
+        self.assertNotEqual(make_key("what is python", "gpt-4", "prompt", context), key)
+
+    def test_entries_survive_a_restart(self):
+        cache = ResponseCache(self.path)
+        cache.put("k", "answer")
+        cache.close()
+        cache = ResponseCache(self.path)
+        self.assertEqual(cache.get("k"), "answer")
+        cache.close()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(self.path, max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        cache.close()
+        # Recency from the hit on "a" was persisted too
+        cache = ResponseCache(self.path, max_entries=2)
+        self.assertEqual((cache.get("a"), cache.get("c")), ("1", "3"))
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = ResponseCache(self.path)
+        cache.put("old", "stale", ttl=0)
+        cache.put("new", "fresh")
+        self.assertIsNone(cache.get("old"))
+        self.assertEqual(cache.get("new"), "fresh")
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        cache.close()
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def run_together(self, flight: SingleFlight, callers: int, fn, on_token=None):
+        """Start callers threads on one key while the leader's fn is still running"""
+        release = threading.Event()
+        results = []
+        errors = []
+
+        def leader_fn(emit):
+            release.wait(5)
+            return fn(emit)
+
+        def call():
+            try:
+                results.append(flight.do("key", leader_fn, on_token() if on_token else None))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        while flight.stats()['saved'] < callers - 1:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        results, _ = self.run_together(flight, 4, lambda emit: calls.append(1) or "answer")
+        self.assertEqual(calls, [1])
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual(flight.stats(), {'upstream': 1, 'saved': 3, 'in_flight': 0})
+
+    def test_followers_get_the_leaders_error(self):
+        def fail(emit):
+            raise RuntimeError("upstream down")
+
+        _, errors = self.run_together(SingleFlight(), 3, fail)
+        self.assertEqual([str(e) for e in errors], ["upstream down"] * 3)
+
+    def test_streaming_followers_receive_every_token(self):
+        received = []
+
+        def listener():
+            tokens = []
+            received.append(tokens)
+            return tokens.append
+
+        def stream(emit):
+            for token in ("one ", "two ", "three"):
+                emit(token)
+            return "one two three"
+
+        self.run_together(SingleFlight(), 3, stream, on_token=listener)
+        self.assertEqual(["".join(tokens) for tokens in received], ["one two three"] * 3)
+
+
+class AssistantCacheTest(unittest.TestCase):
+    """ask_openai against the local OpenAI stand-in"""
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp(prefix="cache-test-")
+        patcher = mock.patch.dict(os.environ, {'HOME': self.home})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = FakeOpenAIServer(first_token_latency=0.1, tokens_per_second=500).__enter__()
+        self.assistant = make_assistant(load_assistant_module(), openai_api_key='test',
+                                        openai_base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.assistant.shutdown()
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def test_repeated_question_is_answered_from_the_cache(self):
+        self.assertEqual(self.assistant.ask_openai("What is Python?"), REPLY_TEXT)
+        self.assistant.new_session()
+        self.assertEqual(self.assistant.ask_openai("what is python"), REPLY_TEXT)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_identical_questions_in_flight_share_one_request(self):
+        answers = []
+        sessions = [self.assistant.session_registry.get() for _ in range(3)]
+        threads = [threading.Thread(target=lambda s=s: answers.append(
+            self.assistant.ask_openai("tell me about python", session=s))) for s in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(answers, [REPLY_TEXT] * 3)
+        self.assertEqual(self.server.requests, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
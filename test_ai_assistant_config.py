@@ -0,0 +1,109 @@
+"""
+Tests for config validation, atomic debounced writes and live reload
+Run with: python -m unittest test_ai_assistant_config
+"""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ai_assistant_config import ConfigStore, validate
+
+DEFAULTS = {'voice_rate': 175, 'model': "gpt-3.5-turbo", 'stream_responses': True}
+
+
+class ValidateTest(unittest.TestCase):
+
+    def test_invalid_values_fall_back_to_the_defaults(self):
+        config, problems = validate({'voice_rate': 1000, 'model': "gpt-4",
+                                     'stream_responses': "yes"}, DEFAULTS)
+        self.assertEqual(config, {'voice_rate': 175, 'model': "gpt-4", 'stream_responses': True})
+        self.assertEqual(len(problems), 2)
+
+    def test_booleans_are_not_numbers(self):
+        config, problems = validate({'voice_rate': True}, DEFAULTS)
+        self.assertEqual(config['voice_rate'], 175)
+        self.assertIn("boolean", problems[0])
+
+
+class ConfigStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="config-test-"))
+        self.path = self.root / "config.json"
+        self.store = ConfigStore(self.path, DEFAULTS, debounce=60)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write_outside(self, data: dict):
+        """Edit the file as a user would, with a visibly newer mtime"""
+        self.path.write_text(json.dumps(data), encoding='utf-8')
+        stat_result = self.path.stat()
+        os.utime(self.path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+
+    def test_burst_of_saves_is_one_atomic_write(self):
+        self.path.write_text("{}", encoding='utf-8')
+        os.chmod(self.path, 0o600)
+        self.store.load()
+        for rate in (180, 190, 200):
+            self.store.data['voice_rate'] = rate
+            self.store.save()
+        self.assertEqual(self.store.writes, 0)
+        self.assertTrue(self.store.flush())
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(json.loads(self.path.read_text())['voice_rate'], 200)
+        self.assertEqual(stat.S_IMODE(self.path.stat().st_mode), 0o600)
+        # No temp file is left next to the config
+        self.assertEqual(os.listdir(self.root), ["config.json"])
+
+    def test_failed_write_keeps_the_old_file(self):
+        self.path.write_text(json.dumps({'model': "gpt-4"}), encoding='utf-8')
+        self.store.load()
+        self.store.data['model'] = "gpt-4o"
+        self.store.save()
+        with mock.patch('os.replace', side_effect=OSError("disk full")), \
+                self.assertLogs('ai_assistant_config', 'ERROR'):
+            self.assertFalse(self.store.flush())
+        self.assertEqual(json.loads(self.path.read_text()), {'model': "gpt-4"})
+        self.assertEqual(os.listdir(self.root), ["config.json"])
+        # Still pending, so the next flush writes it
+        self.assertTrue(self.store.flush())
+        self.assertEqual(json.loads(self.path.read_text())['model'], "gpt-4o")
+
+    def test_outside_edit_is_applied_and_announced(self):
+        self.store.load()
+        changes = []
+        self.store.subscribe(changes.append)
+        self.write_outside({'voice_rate': 220, 'model': "gpt-3.5-turbo"})
+        self.assertEqual(self.store.reload(), {'voice_rate': 220})
+        self.assertEqual(changes, [{'voice_rate': 220}])
+        self.assertEqual(self.store.data['voice_rate'], 220)
+        # Nothing changed since
+        self.assertEqual(self.store.reload(), {})
+
+    def test_own_write_is_not_an_outside_edit(self):
+        self.store.load()
+        self.store.data['voice_rate'] = 150
+        self.store.save()
+        self.store.flush()
+        self.assertEqual(self.store.reload(), {})
+        self.assertEqual(self.store.reloads, 0)
+
+    def test_broken_edit_keeps_the_current_settings(self):
+        self.store.load()
+        self.store.data['voice_rate'] = 150
+        self.path.write_text("{not json", encoding='utf-8')
+        with self.assertLogs('ai_assistant_config', 'ERROR'):
+            self.assertEqual(self.store.reload(), {})
+        self.assertEqual(self.store.data['voice_rate'], 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the document index: scanning, incremental rebuilds and search
+Run with: python -m unittest test_ai_assistant_documents
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import ai_assistant_documents
+from ai_assistant_documents import DocumentIndexer
+
+
+class DocumentIndexerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="documents-test-"))
+        self.docs = self.root / "docs"
+        self.docs.mkdir()
+        self.indexer = DocumentIndexer(self.docs, self.root / "index", throttle=0)
+
+    def tearDown(self):
+        self.indexer.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, name: str, text: str):
+        path = self.docs / name
+        path.write_text(text, encoding='utf-8')
+        # Make every write visible to the size/mtime check
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def paths(self, query: str):
+        return [hit['path'] for hit in self.indexer.search(query, k=5)]
+
+    def test_search_finds_the_matching_passage(self):
+        self.write("wifi.txt", "The guest wifi password is hunter2.")
+        self.write("cake.md", "Bake the chocolate cake for forty minutes.")
+        self.indexer.scan()
+        self.assertEqual(self.paths("guest wifi password"), ["wifi.txt"])
+        self.assertEqual(self.paths("chocolate cake"), ["cake.md"])
+        self.assertEqual(self.paths("submarine"), [])
+
+    def test_rescan_only_reads_changed_files(self):
+        self.write("a.txt", "alpha notes")
+        self.write("b.txt", "beta notes")
+        self.indexer.scan()
+        self.assertEqual(self.indexer.scan(), {'indexed': 0, 'unchanged': 2, 'removed': 0})
+        self.write("b.txt", "gamma notes")
+        result = self.indexer.scan()
+        self.assertEqual((result['indexed'], result['unchanged']), (1, 1))
+        self.assertEqual(self.paths("beta"), [])
+        self.assertEqual(self.paths("gamma"), ["b.txt"])
+        self.assertEqual(self.paths("alpha"), ["a.txt"])
+
+    def test_deleted_file_leaves_the_index(self):
+        self.write("old.txt", "obsolete instructions")
+        self.indexer.scan()
+        (self.docs / "old.txt").unlink()
+        self.assertEqual(self.indexer.scan()['removed'], 1)
+        self.assertEqual(self.paths("obsolete"), [])
+
+    def test_file_grown_past_the_limit_leaves_the_index(self):
+        self.write("log.txt", "secret rotation schedule")
+        self.indexer.scan()
+        self.assertEqual(self.paths("rotation schedule"), ["log.txt"])
+        with mock.patch.object(ai_assistant_documents, 'MAX_FILE_BYTES', 100):
+            self.write("log.txt", "secret rotation schedule " + "x" * 200)
+            result = self.indexer.scan()
+        self.assertEqual(result['removed'], 1)
+        self.assertEqual(self.paths("rotation schedule"), [])
+
+    def test_reopen_uses_the_saved_index(self):
+        self.write("notes.txt", "remember the milk")
+        self.indexer.scan()
+        self.indexer.close()
+        reopened = DocumentIndexer(self.docs, self.root / "index")
+        try:
+            self.assertTrue(reopened.open())
+            self.assertEqual([hit['path'] for hit in reopened.search("milk")], ["notes.txt"])
+        finally:
+            reopened.close()
+
+    def test_close_waits_for_a_running_scan(self):
+        self.write("note.txt", "a note")
+        started, release = threading.Event(), threading.Event()
+        original = ai_assistant_documents.write_index
+
+        def slow_write(*args):
+            # Past the scan's last cancellation point: it will swap in the index
+            started.set()
+            release.wait(5)
+            return original(*args)
+
+        with mock.patch.object(ai_assistant_documents, 'write_index', slow_write):
+            scanner = threading.Thread(target=self.indexer.scan)
+            scanner.start()
+            started.wait(5)
+            # The scan resumes while close() is (or should be) waiting for it
+            threading.Timer(0.2, release.set).start()
+            self.indexer.close()
+            scanner.join(5)
+        self.assertIsNone(self.indexer.index)
+        self.assertEqual(self.indexer.search("note"), [])
+        # A scan after close() must not map a new index
+        self.assertEqual(self.indexer.scan(), {})
+        self.assertIsNone(self.indexer.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
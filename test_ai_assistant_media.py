@@ -0,0 +1,111 @@
+"""
+Tests for the media catalog's fuzzy lookup and incremental library scans
+Run with: python -m unittest test_ai_assistant_media
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant_media import AUDIO, VIDEO, MediaCatalog, MediaItem, MediaLibrary, describe
+
+
+class MediaCatalogTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = MediaCatalog([
+            MediaItem("/m/1.mp3", AUDIO, "Bohemian Rhapsody", "Queen", "A Night at the Opera"),
+            MediaItem("/m/2.mp3", AUDIO, "Don't Stop Me Now", "Queen"),
+            MediaItem("/m/3.mp3", AUDIO, "Clair de Lune", "Claude Debussy"),
+            MediaItem("/m/4.mp3", AUDIO, "Café del Mar", "Energy 52"),
+            MediaItem("/v/5.mp4", VIDEO, "Rhapsody in Blue"),
+        ] + [MediaItem(f"/m/filler{i}.mp3", AUDIO, f"Track {i}", "Various") for i in range(200)])
+
+    def title(self, query: str, kind=None):
+        item = self.catalog.find(query, kind)
+        return item.title if item else None
+
+    def test_exact_and_partial_titles(self):
+        self.assertEqual(self.title("bohemian rhapsody"), "Bohemian Rhapsody")
+        self.assertEqual(self.title("dont stop me now"), "Don't Stop Me Now")
+        self.assertEqual(self.title("bohemian rhapsody by queen"), "Bohemian Rhapsody")
+
+    def test_misheard_and_cut_off_words(self):
+        self.assertEqual(self.title("clare de lune"), "Clair de Lune")
+        self.assertEqual(self.title("bohemian rhap"), "Bohemian Rhapsody")
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.title("cafe del mar"), "Café del Mar")
+
+    def test_kind_filter(self):
+        self.assertEqual(self.title("rhapsody in blue", VIDEO), "Rhapsody in Blue")
+        self.assertEqual(self.title("rhapsody in blue", AUDIO), None)
+
+    def test_unrelated_query_finds_nothing(self):
+        self.assertIsNone(self.title("submarine symphony orchestra"))
+        self.assertEqual(self.catalog.search(""), [])
+
+
+class DescribeTest(unittest.TestCase):
+
+    def test_names_and_folders_fill_in_missing_tags(self):
+        root = "music"
+        tags = describe(os.path.join(root, "Queen", "Jazz", "03 - Mustapha.mp3"), AUDIO, root)
+        self.assertEqual(tags, {'title': "Mustapha", 'album': "Jazz", 'artist': "Queen"})
+        tags = describe(os.path.join(root, "Nina Simone - Feeling Good.mp3"), AUDIO, root)
+        self.assertEqual((tags['artist'], tags['title']), ("Nina Simone", "Feeling Good"))
+
+
+class MediaLibraryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="media-test-"))
+        self.music = self.root / "Music"
+        self.videos = self.root / "Videos"
+        self.music.mkdir()
+        self.videos.mkdir()
+        self.index = self.root / "media.json.gz"
+        self.library = MediaLibrary({AUDIO: self.music, VIDEO: self.videos}, self.index, throttle=0)
+
+    def tearDown(self):
+        self.library.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def touch(self, path: Path, data: bytes = b"\0" * 16):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def test_rescan_only_describes_changed_files(self):
+        self.touch(self.music / "Miles Davis" / "Kind of Blue" / "01 So What.mp3")
+        self.touch(self.videos / "Holiday 2024.mp4")
+        self.touch(self.music / "notes.txt")
+        self.assertEqual(self.library.scan(), {'updated': 2, 'unchanged': 0, 'removed': 0})
+        self.assertEqual(self.library.find("so what").artist, "Miles Davis")
+        self.assertEqual(self.library.scan(), {'updated': 0, 'unchanged': 2, 'removed': 0})
+
+        (self.videos / "Holiday 2024.mp4").unlink()
+        self.touch(self.music / "Blue in Green.mp3", b"\0" * 32)
+        self.assertEqual(self.library.scan(), {'updated': 1, 'unchanged': 1, 'removed': 1})
+        self.assertIsNone(self.library.find("holiday 2024", VIDEO))
+
+    def test_saved_catalog_is_loaded_at_startup(self):
+        self.touch(self.music / "Blue in Green.mp3")
+        self.library.scan()
+        reopened = MediaLibrary({AUDIO: self.music}, self.index)
+        self.assertTrue(reopened.load())
+        self.assertEqual(reopened.find("blue in green").title, "Blue in Green")
+
+    def test_cancelled_scan_keeps_the_catalog(self):
+        self.touch(self.music / "Blue in Green.mp3")
+        self.library.scan()
+        self.touch(self.music / "So What.mp3")
+        self.library.cancel()
+        self.assertEqual(self.library.scan(), {})
+        self.assertEqual(len(self.library.catalog), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests for token-budgeted conversation memory
+Run with: python -m unittest test_ai_assistant_memory
+"""
+
+import unittest
+
+from ai_assistant_memory import (ConversationMemory, MESSAGE_OVERHEAD, budget_for_model,
+                                 count_tokens, extractive_summary)
+
+
+def message(role: str, words: int, first: str = "Sentence") -> dict:
+    return {"role": role, "content": f"{first} one. " + "word " * words}
+
+
+class BudgetTest(unittest.TestCase):
+
+    def test_longest_model_prefix_wins(self):
+        self.assertEqual(budget_for_model("gpt-4"), 6000)
+        self.assertEqual(budget_for_model("gpt-4o-mini"), 24000)
+        self.assertEqual(budget_for_model("some-local-model"), 3000)
+
+    def test_summary_line_is_the_first_sentence(self):
+        self.assertEqual(extractive_summary({"role": "user", "content": "Hello there. More."}),
+                         "User: Hello there.")
+        line = extractive_summary({"role": "assistant", "content": "x" * 500}, limit=20)
+        self.assertEqual(line, "Assistant: " + "x" * 17 + "...")
+
+
+class ConversationMemoryTest(unittest.TestCase):
+
+    def test_history_stays_within_the_token_budget(self):
+        memory = ConversationMemory(token_budget=400)
+        for i in range(50):
+            memory.append(message("user" if i % 2 == 0 else "assistant", 40, f"Turn{i}"))
+        self.assertLessEqual(memory.tokens + count_tokens(memory.summary), 400)
+        self.assertLessEqual(count_tokens(memory.summary), memory.summary_budget + 10)
+        # Newest turns are verbatim, older ones were folded into the summary
+        self.assertTrue(memory[-1]["content"].startswith("Turn49"))
+        self.assertEqual(memory.folded + len(memory), 50)
+        self.assertIn("Turn", memory.summary)
+
+    def test_context_leads_with_the_summary(self):
+        memory = ConversationMemory(token_budget=100, max_messages=2)
+        for i in range(4):
+            memory.append(message("user", 2, f"Question{i}"))
+        context = memory.context()
+        self.assertEqual(context[0]["role"], "system")
+        self.assertIn("User: Question1 one.", context[0]["content"])
+        self.assertEqual([m["content"][:9] for m in context[1:]], ["Question2", "Question3"])
+
+    def test_newest_message_is_kept_even_over_budget(self):
+        memory = ConversationMemory(token_budget=10)
+        memory.append(message("user", 200))
+        self.assertEqual(len(memory), 1)
+
+    def test_lower_budget_folds_at_once(self):
+        memory = ConversationMemory(token_budget=10000)
+        for _ in range(10):
+            memory.append(message("user", 20))
+        memory.set_budget(100)
+        self.assertLessEqual(memory.tokens, 100)
+        self.assertEqual(memory.folded, 10 - len(memory))
+
+    def test_state_round_trip_skips_the_listener(self):
+        memory = ConversationMemory(token_budget=200, max_messages=3)
+        for i in range(6):
+            memory.append(message("user", 5, f"Item{i}"))
+        restored = ConversationMemory(token_budget=200, max_messages=3)
+        recorded = []
+        restored.listener = recorded.append
+        restored.load_state(memory.state())
+        self.assertEqual(restored.context(), memory.context())
+        self.assertEqual(recorded, [])
+        restored.append(message("user", 1))
+        self.assertEqual(len(recorded), 1)
+
+    def test_deleting_a_message_returns_its_tokens(self):
+        memory = ConversationMemory()
+        memory.append({"role": "user", "content": "hello"})
+        memory.append({"role": "assistant", "content": "hi there"})
+        del memory[-1]
+        self.assertEqual(memory.tokens, count_tokens("hello") + MESSAGE_OVERHEAD)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the keyword-trie intent router
+Run with: python -m unittest test_ai_assistant_router
+"""
+
+import unittest
+
+from ai_assistant_router import IntentRouter
+
+
+def name_of(match):
+    return match.rule.name
+
+
+class IntentRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.router = IntentRouter()
+        self.router.add_rule('time', name_of, triggers=("time",))
+        self.router.add_rule('search', name_of, triggers=("search for",), anchored=("search",))
+        self.router.add_rule('play', name_of, anchored=("play",))
+        self.router.add_rule('volume', name_of, triggers=("up", "down"), all_of=("volume",))
+        self.router.set_fallback('chat', name_of)
+
+    def route(self, query: str) -> str:
+        return self.router.route(query).rule.name
+
+    def test_keywords_match_whole_words_only(self):
+        self.assertEqual(self.route("what time is it"), 'time')
+        self.assertEqual(self.route("sometimes i wonder"), 'chat')
+
+    def test_multi_word_and_anchored_keywords(self):
+        self.assertEqual(self.route("please search for cats"), 'search')
+        self.assertEqual(self.route("search cats"), 'search')
+        self.assertEqual(self.route("i want to search"), 'chat')
+        self.assertEqual(self.route("play some jazz"), 'play')
+        self.assertEqual(self.route("let's play a game"), 'chat')
+
+    def test_all_of_keywords_are_required(self):
+        self.assertEqual(self.route("turn the volume up"), 'volume')
+        self.assertEqual(self.route("turn it up"), 'chat')
+
+    def test_rules_are_tried_in_registration_order(self):
+        self.assertEqual(self.route("search for the time"), 'time')
+
+    def test_remainder_drops_the_keywords(self):
+        match = self.router.route("search for   cute cats")
+        self.assertEqual(match.keyword, "search for")
+        self.assertEqual(match.remainder("search for"), "cute cats")
+        self.assertEqual(self.router.route("play play music").remainder("play"), "music")
+
+    def test_dispatch_passes_context_and_counts_hits(self):
+        router = IntentRouter()
+        router.add_rule('echo', lambda match: (match.remainder("echo"), match.context), anchored=("echo",))
+        match, result = router.dispatch("echo hello", session="s1")
+        self.assertEqual(result, ("hello", {'session': "s1"}))
+        self.assertEqual(router.hits['echo'], 1)
+        self.assertEqual(router.dispatch("nothing here"), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the session log, its schema migration and the live session registry
+Run with: python -m unittest test_ai_assistant_sessions
+"""
+
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_assistant_memory import ConversationMemory
+from ai_assistant_sessions import LOCAL, REMOTE, SessionRegistry, SessionStore
+
+
+class SessionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="sessions-test-"))
+        self.path = self.root / "sessions.db"
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_messages_are_read_back_in_pages(self):
+        store = SessionStore(self.path)
+        for i in range(5):
+            store.record("s1", "user", f"message {i}", timestamp=100 + i)
+        self.assertTrue(store.flush())
+        last = store.tail("s1", limit=2)
+        self.assertEqual([m['content'] for m in last], ["message 3", "message 4"])
+        earlier = store.tail("s1", limit=2, before_id=last[0]['id'])
+        self.assertEqual([m['content'] for m in earlier], ["message 1", "message 2"])
+        store.close()
+
+    def test_last_session_only_sees_its_origin(self):
+        store = SessionStore(self.path)
+        store.record("20260101-120000-aaaaaa", "user", "mine", timestamp=100)
+        store.record("server-client", "user", "theirs", timestamp=200, origin=REMOTE)
+        store.flush()
+        self.assertEqual(store.last_session(), "20260101-120000-aaaaaa")
+        self.assertEqual(store.last_session(REMOTE), "server-client")
+        store.close()
+
+    def test_old_logs_gain_an_origin(self):
+        db = sqlite3.connect(str(self.path))
+        db.executescript("""
+            CREATE TABLE sessions (id TEXT PRIMARY KEY, started REAL NOT NULL, updated REAL NOT NULL);
+            CREATE TABLE snapshots (session_id TEXT PRIMARY KEY, updated REAL NOT NULL, data TEXT NOT NULL);
+            INSERT INTO sessions VALUES ('20250101-090000-abc123', 1, 1);
+            INSERT INTO sessions VALUES ('api-user-7', 2, 2);
+            INSERT INTO sessions VALUES ('20250102-090000-def456', 3, 3);
+            INSERT INTO snapshots VALUES ('20250102-090000-def456', 3, '{}');
+        """)
+        db.commit()
+        db.close()
+        store = SessionStore(self.path)
+        origins = {s['id']: s['origin'] for s in store.sessions()}
+        self.assertEqual(origins, {'20250101-090000-abc123': LOCAL,
+                                   'api-user-7': REMOTE,
+                                   '20250102-090000-def456': REMOTE})
+        self.assertEqual(store.last_session(), '20250101-090000-abc123')
+        store.close()
+        # Migrating twice is harmless
+        SessionStore(self.path).close()
+
+    def test_snapshots_are_readable_before_they_are_written(self):
+        store = SessionStore(self.path)
+        store.save_snapshot("s1", {'name': "Sam"})
+        self.assertEqual(store.load_snapshot("s1"), {'name': "Sam"})
+        store.close()
+        store = SessionStore(self.path)
+        self.assertEqual(store.load_snapshot("s1"), {'name': "Sam"})
+        self.assertIsNone(store.load_snapshot("missing"))
+        store.close()
+
+
+class SessionRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="sessions-test-"))
+        self.store = SessionStore(self.root / "sessions.db")
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_evicted_session_is_rehydrated_from_its_snapshot(self):
+        registry = SessionRegistry(ConversationMemory, self.store)
+        session = registry.get("client-1", name="Alex")
+        session.history.append({"role": "user", "content": "remember the blue door"})
+        self.assertTrue(registry.evict("client-1"))
+        self.assertNotIn("client-1", registry)
+
+        session = registry.get("client-1")
+        self.assertEqual(session.name, "Alex")
+        self.assertEqual(session.history[0]["content"], "remember the blue door")
+        self.assertTrue(session.remote)
+        self.assertEqual(registry.stats()['rehydrated'], 1)
+
+    def test_server_messages_are_logged_as_remote(self):
+        registry = SessionRegistry(ConversationMemory, self.store)
+        registry.get("client-2").history.append({"role": "user", "content": "hi"})
+        self.store.flush()
+        self.assertEqual(self.store.last_session(REMOTE), "client-2")
+        self.assertIsNone(self.store.last_session())
+
+    def test_least_recently_used_sessions_go_over_the_ceiling(self):
+        registry = SessionRegistry(ConversationMemory, max_sessions=2)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        self.assertEqual(sorted(s.session_id for s in registry.live()), ["a", "c"])
+        busy = registry.get("a")
+        busy.active = 1
+        registry.get("d")
+        registry.get("e")
+        self.assertIn("a", registry)
+
+    def test_idle_sessions_are_swept(self):
+        registry = SessionRegistry(ConversationMemory, idle_timeout=60)
+        registry.get("idle").last_used -= 120
+        registry.get("fresh")
+        self.assertEqual(registry.sweep(), 1)
+        self.assertEqual([s.session_id for s in registry.live()], ["fresh"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for the speech worker's queue: priorities, flushing and queue depth
+Run with: python -m unittest test_ai_assistant_speech
+"""
+
+import threading
+import unittest
+
+from ai_assistant_speech import PRIORITY_HIGH, PRIORITY_LOW, SpeechWorker
+
+
+class FakeEngine:
+    """Stand-in for a pyttsx3 engine; runAndWait() blocks while gate is clear"""
+
+    def __init__(self):
+        self.spoken = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.speaking = threading.Event()
+        self._text = None
+
+    def say(self, text):
+        self._text = text
+
+    def runAndWait(self):
+        self.speaking.set()
+        self.gate.wait(5)
+        self.spoken.append(self._text)
+
+    def stop(self):
+        self.gate.set()
+
+
+class SpeechWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = FakeEngine()
+        self.worker = SpeechWorker(lambda: self.engine)
+
+    def tearDown(self):
+        self.engine.gate.set()
+        self.worker.shutdown()
+
+    def hold(self):
+        """Keep the worker busy speaking until the gate is set again"""
+        self.engine.gate.clear()
+        self.worker.say("hold")
+        self.assertTrue(self.engine.speaking.wait(5))
+
+    def test_higher_priority_is_spoken_first(self):
+        self.hold()
+        low = self.worker.say("later", PRIORITY_LOW)
+        high = self.worker.say("now", PRIORITY_HIGH)
+        self.engine.gate.set()
+        self.assertTrue(low.wait(5) and high.wait(5))
+        self.assertEqual(self.engine.spoken, ["hold", "now", "later"])
+
+    def test_queue_depth_counts_only_speech(self):
+        self.hold()
+        self.worker.say("one")
+        self.worker.configure(lambda engine: None)
+        self.assertEqual(self.worker.queue_depth, 1)
+        self.worker.flush()
+        self.assertEqual(self.worker.queue_depth, 0)
+        self.assertTrue(self.worker.speaking)
+
+    def test_concurrent_engine_updates_keep_the_depth_exact(self):
+        self.hold()
+
+        def configure_many():
+            for _ in range(200):
+                self.worker.configure(lambda engine: None)
+
+        threads = [threading.Thread(target=configure_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        # The worker takes updates off the queue while callers add more
+        self.engine.gate.set()
+        for thread in threads:
+            thread.join()
+        done = self.worker.say("done")
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.worker._background, 0)
+        self.assertEqual(self.worker.queue_depth, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for sentence splitting of streamed replies
+Run with: python -m unittest test_ai_assistant_streaming
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from ai_assistant_bench import REPLY_TEXT
+from ai_assistant_streaming import SentenceSplitter, StreamingSpeaker
+
+
+class SentenceSplitterTest(unittest.TestCase):
+
+    def feed_all(self, splitter: SentenceSplitter, tokens):
+        sentences = []
+        for token in tokens:
+            sentences.extend(splitter.feed(token))
+        return sentences
+
+    def test_streamed_reply_comes_out_sentence_by_sentence(self):
+        # Tokens as the stand-in server streams them: one word at a time
+        splitter = SentenceSplitter()
+        sentences = self.feed_all(splitter, [w + " " for w in REPLY_TEXT.split(" ")])
+        self.assertEqual(len(sentences), 4)
+        self.assertEqual(sentences[0], "Python is a popular programming language.")
+        self.assertEqual(" ".join(sentences), REPLY_TEXT)
+        self.assertIsNone(splitter.flush())
+
+    def test_sentence_is_released_only_once_complete(self):
+        splitter = SentenceSplitter()
+        self.assertEqual(splitter.feed("The answer is"), [])
+        self.assertEqual(splitter.feed(" 3.5 today."), [])
+        self.assertEqual(splitter.feed(" And"), ["The answer is 3.5 today."])
+        self.assertEqual(splitter.flush(), "And")
+        self.assertIsNone(splitter.flush())
+
+    def test_short_fragments_join_the_next_sentence(self):
+        splitter = SentenceSplitter()
+        self.assertEqual(self.feed_all(splitter, ["Hi. ", "How are you today? ", "Fine"]),
+                         ["Hi. How are you today?"])
+
+    def test_closing_quotes_stay_with_their_sentence(self):
+        splitter = SentenceSplitter()
+        self.assertEqual(splitter.feed('She said "it is done." Then'), ['She said "it is done."'])
+
+
+class FakeSpeech:
+    def __init__(self):
+        self.said = []
+
+    def say(self, text):
+        self.said.append(text)
+        # Spoken at once; the speaker only calls wait()
+        return SimpleNamespace(wait=lambda: True)
+
+
+class StreamingSpeakerTest(unittest.TestCase):
+
+    def test_sentences_are_spoken_while_the_rest_streams(self):
+        speech = FakeSpeech()
+        speaker = StreamingSpeaker(speech)
+        speaker.feed("The first sentence is here. The sec")
+        self.assertEqual(speech.said, ["The first sentence is here."])
+        speaker.feed("ond one")
+        speaker.finish()
+        self.assertEqual(speech.said, ["The first sentence is here.", "The second one"])
+
+
+if __name__ == '__main__':
+    unittest.main()
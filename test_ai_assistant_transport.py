@@ -0,0 +1,82 @@
+"""
+Regression tests for the OpenAI transport's circuit breaker
+Run with: python -m unittest test_ai_assistant_transport
+"""
+
+import asyncio
+import unittest
+
+from ai_assistant_transport import CircuitBreaker, CircuitOpenError, OpenAITransport
+
+
+class StatusError(Exception):
+    """Stand-in for an SDK error carrying an HTTP status"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def half_open_transport() -> OpenAITransport:
+    """A transport whose breaker will let the next call through as the probe"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    return OpenAITransport(deadline=5, max_retries=0, breaker=breaker)
+
+
+class HalfOpenProbeTest(unittest.TestCase):
+
+    def test_client_error_frees_the_probe(self):
+        transport = half_open_transport()
+
+        def bad_request(timeout):
+            raise StatusError(400)
+
+        with self.assertRaises(StatusError):
+            transport.call(bad_request)
+        self.assertEqual(transport.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(transport.call(lambda timeout: "ok"), "ok")
+        self.assertEqual(transport.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_cancelled_probe_frees_the_probe(self):
+        transport = half_open_transport()
+
+        async def scenario():
+            started = asyncio.Event()
+
+            async def slow(timeout):
+                started.set()
+                await asyncio.sleep(10)
+
+            async def fast(timeout):
+                return "ok"
+
+            probe = asyncio.ensure_future(transport.acall(slow))
+            await started.wait()
+            # Only one probe at a time while the first is in flight
+            with self.assertRaises(CircuitOpenError):
+                await transport.acall(fast)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+            return await transport.acall(fast)
+
+        self.assertEqual(asyncio.run(scenario()), "ok")
+        self.assertEqual(transport.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        transport = half_open_transport()
+
+        def unavailable(timeout):
+            raise StatusError(503)
+
+        with self.assertRaises(StatusError):
+            transport.call(unavailable)
+        self.assertEqual(transport.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            transport.call(lambda timeout: "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
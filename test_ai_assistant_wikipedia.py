@@ -0,0 +1,126 @@
+"""
+Tests for Wikipedia answers: topic parsing, the FTS cache and offline fallback
+Run with: python -m unittest test_ai_assistant_wikipedia
+"""
+
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import ai_assistant_wikipedia as wikipedia
+from ai_assistant_bench import FakeWikipediaServer
+from ai_assistant_wikipedia import ArticleCache, WikipediaAnswers, WikipediaClient
+
+
+class TopicTest(unittest.TestCase):
+
+    def test_topic_of_strips_the_question(self):
+        self.assertEqual(wikipedia.topic_of("Who was Ada Lovelace?"), "ada lovelace")
+        self.assertEqual(wikipedia.topic_of("tell me about the Eiffel Tower"), "eiffel tower")
+
+    def test_relevant_needs_every_topic_word_in_the_title(self):
+        self.assertTrue(wikipedia.relevant("einstein", "Albert Einstein"))
+        self.assertTrue(wikipedia.relevant("python", "Python (programming language)"))
+        self.assertFalse(wikipedia.relevant("wifi password", "Password"))
+
+    def test_short_summary_keeps_the_first_sentences(self):
+        text = "One. Two. Three."
+        self.assertEqual(wikipedia.short_summary(text, 2), "One. Two.")
+
+
+class WikipediaAnswersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="wikipedia-test-"))
+        self.server = FakeWikipediaServer(latency=0).__enter__()
+        self.answers = WikipediaAnswers(ArticleCache(self.root / "wikipedia.db"),
+                                        WikipediaClient(self.server.base_url, timeout=0.5))
+
+    def tearDown(self):
+        self.answers.close()
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_repeat_and_related_lookups_come_from_the_cache(self):
+        article = self.answers.lookup("albert einstein")
+        self.assertEqual(article['title'], "Albert Einstein")
+        requests = self.server.requests
+        self.assertEqual(self.answers.lookup("albert einstein")['title'], "Albert Einstein")
+        # Matched against cached titles with FTS
+        self.assertEqual(self.answers.lookup("einstein")['title'], "Albert Einstein")
+        self.assertEqual(self.server.requests, requests)
+
+    def test_irrelevant_results_are_not_answers(self):
+        self.assertIsNone(self.answers.lookup("lovelace hotel"))
+        self.assertEqual(self.answers.counters['not_found'], 1)
+
+    def test_stale_copy_is_used_when_wikipedia_is_down(self):
+        self.answers.lookup("alan turing")
+        self.answers.cache.ttl = 0
+        self.server.__exit__(None, None, None)
+        with self.assertLogs('ai_assistant_wikipedia', 'WARNING'):
+            article = self.answers.lookup("alan turing")
+        self.assertEqual(article['title'], "Alan Turing")
+        self.assertEqual(self.answers.counters['stale'], 1)
+
+    def test_stale_copy_is_used_when_summaries_time_out(self):
+        self.answers.lookup("marie curie")
+        self.answers.cache.ttl = 0
+        self.server.summary_delay = 1.5
+        start = time.monotonic()
+        with self.assertLogs('ai_assistant_wikipedia', 'WARNING'):
+            article = self.answers.lookup("marie curie")
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(article['title'], "Marie Curie")
+        self.assertEqual(self.answers.counters['stale'], 1)
+
+
+class AnswerHandlerTest(unittest.TestCase):
+    """The plugin handler decides between Wikipedia and chat"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="wikipedia-test-"))
+        self.server = FakeWikipediaServer(latency=0).__enter__()
+        self.chats = []
+        self.assistant = SimpleNamespace(
+            ai_enabled=False,
+            config={'wikipedia_url': self.server.base_url},
+            get_directory=lambda name: self.root / name,
+            chat=lambda query, on_token=None, session=None: self.chats.append(query) or "chat",
+        )
+
+    def tearDown(self):
+        wikipedia.shutdown()
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def ask(self, query: str) -> str:
+        return wikipedia.answer(SimpleNamespace(query=query, context={}), self.assistant)
+
+    def test_answers_from_wikipedia_without_ai(self):
+        self.assertTrue(self.ask("who was grace hopper").startswith("According to Wikipedia: Grace"))
+        self.assertEqual(self.chats, [])
+
+    def test_personal_questions_go_to_chat(self):
+        self.assertEqual(self.ask("what is your name"), "chat")
+        self.assertEqual(self.server.requests, 0)
+
+    def test_ai_chat_comes_first_unless_opted_in(self):
+        self.assistant.ai_enabled = True
+        self.assertEqual(self.ask("who was grace hopper"), "chat")
+        self.assertEqual(self.server.requests, 0)
+        self.assistant.config['wikipedia_first'] = True
+        self.assertTrue(self.ask("who was grace hopper").startswith("According to Wikipedia"))
+
+    def test_shutdown_closes_the_shared_service(self):
+        self.ask("who was grace hopper")
+        self.assertIsNotNone(wikipedia._service)
+        wikipedia.shutdown()
+        self.assertIsNone(wikipedia._service)
+
+
+if __name__ == '__main__':
+    unittest.main()
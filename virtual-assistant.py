@@ -7,18 +7,54 @@ Status: Stable
 Last Updated: November 2025
 """
 
-import pyttsx3
-import speech_recognition as sr
+# Imported first so startup timing covers everything below
+from ai_assistant_profile import STARTUP, DEFAULT_STARTUP_BUDGET_MS
+
 import datetime
-import webbrowser
+import time
 import os
 import sys
-import json
+import importlib.util
 from pathlib import Path
 import threading
 import queue
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
+
+# Heavy dependencies (pyttsx3, speech_recognition, openai) are imported on
+# first use so text-only and --config runs never pay for them
+with STARTUP.span("import ai_assistant_metrics", kind="import"):
+    from ai_assistant_metrics import TRACER
+with STARTUP.span("import ai_assistant_config", kind="import"):
+    from ai_assistant_config import ConfigStore
+with STARTUP.span("import ai_assistant_streaming", kind="import"):
+    from ai_assistant_streaming import StreamingSpeaker
+with STARTUP.span("import ai_assistant_router", kind="import"):
+    from ai_assistant_router import IntentRouter, RouteMatch
+with STARTUP.span("import ai_assistant_cache", kind="import"):
+    from ai_assistant_cache import ResponseCache, SingleFlight, make_key
+with STARTUP.span("import ai_assistant_speech", kind="import"):
+    from ai_assistant_speech import SpeechWorker, Utterance, PRIORITY_NORMAL
+with STARTUP.span("import ai_assistant_audio_cache", kind="import"):
+    from ai_assistant_audio_cache import AudioCache, AudioPlayer, VOICE_SETTINGS, voice_settings
+with STARTUP.span("import ai_assistant_memory", kind="import"):
+    from ai_assistant_memory import ConversationMemory, budget_for_model
+with STARTUP.span("import ai_assistant_sessions", kind="import"):
+    from ai_assistant_sessions import SessionStore, Session, SessionRegistry, new_session_id
+with STARTUP.span("import ai_assistant_capture", kind="import"):
+    from ai_assistant_capture import MicrophoneCapture, device_key
+with STARTUP.span("import ai_assistant_recognition", kind="import"):
+    from ai_assistant_recognition import SpeechRecognizer
+with STARTUP.span("import ai_assistant_transport", kind="import"):
+    from ai_assistant_transport import OpenAITransport, CircuitOpenError
+with STARTUP.span("import ai_assistant_plugins", kind="import"):
+    from ai_assistant_plugins import PluginManager
+with STARTUP.span("import ai_assistant_actions", kind="import"):
+    from ai_assistant_actions import ActionExecutor, Action, ActionResult, OPEN_URL, OPEN_FILE
+with STARTUP.span("import ai_assistant_documents", kind="import"):
+    from ai_assistant_documents import DocumentIndexer
+with STARTUP.span("import ai_assistant_media", kind="import"):
+    from ai_assistant_media import MediaLibrary, AUDIO, VIDEO
 
 # Version information
 __version__ = "2.1.0"
@@ -31,131 +67,612 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Try to import OpenAI
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# Check for OpenAI without importing it; the client is created on first use
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+if not OPENAI_AVAILABLE:
     logger.warning("OpenAI not installed. Run: pip install openai")
 
+SYSTEM_PROMPT = "You are a helpful, friendly AI assistant. Keep responses concise and natural."
+
 class AIAssistant:
-    def __init__(self, use_gui: bool = True):
+    WEBSITES = {
+        'github': 'https://github.com',
+        'linkedin': 'https://linkedin.com',
+        'twitter': 'https://twitter.com',
+        'facebook': 'https://facebook.com',
+        'reddit': 'https://reddit.com',
+        'gmail': 'https://gmail.com'
+    }
+    
+    SEARCH_WORDS = ('search for', 'search', 'look up', 'find')
+    
+    # Words after "play" that say what kind of file is wanted
+    MEDIA_WORDS = {'song': AUDIO, 'track': AUDIO, 'music': AUDIO, 'album': AUDIO,
+                   'video': VIDEO, 'movie': VIDEO, 'film': VIDEO}
+    
+    # Changing these rebuilds the OpenAI transport (and with it the client)
+    TRANSPORT_KEYS = frozenset((
+        'openai_timeout', 'openai_max_retries', 'openai_backoff_base', 'openai_backoff_max',
+        'openai_breaker_threshold', 'openai_breaker_reset', 'openai_pool_size', 'openai_keepalive',
+    ))
+    
+    # Replies from these routes never contain user text, so their audio is cached
+    # (Google and YouTube replies echo the search query)
+    CACHED_ROUTES = ('help', 'website')
+    
+    GOODBYE = "Goodbye! Have a great day!"
+    
+    def __init__(self, use_gui: bool = True, mute: bool = False):
         """Initialize the AI Assistant"""
         self.use_gui = use_gui
         self.config_file = Path.home() / ".ai_assistant_config.json"
-        self.config = self.load_config()
+        # Writes are atomic and debounced; outside edits are applied live
+        self.config_store = ConfigStore(self.config_file, self.default_config())
+        with STARTUP.span("load config"):
+            self.config = self.load_config()
+        self.config_store.subscribe(self._apply_config)
         
-        # Initialize text-to-speech with error handling
-        try:
-            self.engine = pyttsx3.init()
-            self.setup_voice()
-        except Exception as e:
-            logger.error(f"Text-to-speech initialization failed: {e}")
-            self.engine = None
-        
-        # Initialize speech recognition
-        self.recognizer = sr.Recognizer()
-        self.recognizer.pause_threshold = 0.8
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-        
-        # Initialize OpenAI if available
-        self.client = None
-        if OPENAI_AVAILABLE and self.config.get('openai_api_key'):
-            try:
-                self.client = OpenAI(api_key=self.config['openai_api_key'])
-                logger.info("OpenAI client initialized successfully")
-            except Exception as e:
-                logger.error(f"OpenAI initialization failed: {e}")
+        # All speech goes through one worker thread that owns the engine;
+        # the engine itself is created on first use
+        audio_cache, player = (None, None) if mute else self._create_audio_cache()
+        self.speech = SpeechWorker(None if mute else self._create_engine,
+                                   audio_cache=audio_cache, player=player)
+        
+        # Speech recognition and the OpenAI client are also created lazily
+        self._recognizer = None
+        self._speech_recognizer = None
+        self._capture = None
+        # Audio source class used instead of sr.Microphone (e.g. WAV playback in benchmarks)
+        self.microphone_factory: Optional[Callable[..., Any]] = None
+        self._mic_key: Optional[str] = None
+        self._calibration_dirty = False
+        self._client = None
+        self._client_failed = False
+        # Server workers may ask for the client at the same time
+        self._client_lock = threading.Lock()
+        # Bumped whenever the client must be recreated (key or endpoint changed)
+        self.client_generation = 0
+        # Deadlines, retries and circuit breaking shared by every OpenAI call
+        self.transport = OpenAITransport.from_config(self.config)
+        
+        # The local user's conversation, with history bounded by a token budget
+        self.session = Session(new_session_id(), self.new_history())
+        
+        # Durable session log and persistent cache of OpenAI answers, both
+        # opened by open_stores()
+        self.sessions: Optional[SessionStore] = None
+        self.response_cache: Optional[ResponseCache] = None
+        
+        # Isolated conversations for other users (server mode); idle ones are
+        # evicted to snapshots and rehydrated on their next request
+        self.session_registry = SessionRegistry(
+            self.new_history,
+            None,
+            idle_timeout=self.config.get('session_idle_timeout', 1800),
+            max_sessions=self.config.get('session_max_live', 50),
+            memory_limit=int(self.config.get('session_memory_limit_mb', 32) * 1024 * 1024)
+        )
+        
+        self.inflight = SingleFlight()
         
-        # Conversation history for context
-        self.conversation_history = []
+        # Browser launches run in the background; replies don't wait for them
+        self.actions = ActionExecutor(
+            workers=self.config.get('action_workers', 2),
+            timeout=self.config.get('action_timeout', 10)
+        )
         
         # Command queue for thread-safe operations
         self.command_queue = queue.Queue()
         self.running = True
         
-    def load_config(self) -> Dict[str, Any]:
-        """Load configuration from file"""
-        default_config = {
+        # Plugin manifests only; plugin modules are imported on first use
+        with STARTUP.span("plugins"):
+            enabled = self.config.get('plugins_enabled', True)
+            self.plugins = PluginManager(
+                self.get_directory('plugins') if enabled else None,
+                disabled=self.config.get('plugins_disabled', []),
+                entry_points=enabled
+            )
+            self.plugins.discover()
+        
+        # Command routing table, compiled once
+        with STARTUP.span("command router"):
+            self.router = self._build_router()
+        self.last_route: Optional[RouteMatch] = None
+        
+        # Passages from the documents directory, indexed in the background;
+        # the saved index is reused, so only changed files are read again
+        self.documents = DocumentIndexer(
+            self.get_directory('documents'),
+            self.get_directory('cache') / "documents",
+            rescan_interval=self.config.get('documents_rescan_interval', 300)
+        )
+        
+        # Catalog of the music and videos directories for "play ..."
+        self.media = MediaLibrary(
+            {AUDIO: self.get_directory('music'), VIDEO: self.get_directory('videos')},
+            self.get_directory('cache') / "media.json.gz",
+            rescan_interval=self.config.get('media_rescan_interval', 600)
+        )
+        self._services_started = False
+    
+    def open_stores(self):
+        """Open the session log and the response cache (once)
+
+        Both are databases in the user's data directory, so they are opened
+        only when the assistant is about to answer something.
+        """
+        if self.response_cache is not None:
+            return
+        # Durable session log in the logs directory
+        if self.config.get('save_sessions', True):
+            try:
+                with STARTUP.span("session store"):
+                    self.sessions = SessionStore(self.get_directory('logs') / "sessions.db")
+                self.session_registry.store = self.sessions
+                self.conversation_history.listener = self._record_message
+            except Exception as e:
+                logger.error(f"Session store unavailable: {e}")
+        with STARTUP.span("response cache"):
+            self.response_cache = ResponseCache(
+                self.get_directory('cache') / "responses.db",
+                max_entries=self.config.get('cache_max_entries', 500),
+                ttl=self.config.get('cache_ttl', 86400)
+            )
+    
+    def start_services(self):
+        """Open the stores and start the background work of the interactive modes
+
+        Latency flushing, document indexing, media scanning and config
+        watching. Kept out of __init__ so --config and --startup-profile
+        stay quick and never create or touch the user's files.
+        """
+        if self._services_started:
+            return
+        self._services_started = True
+        self.open_stores()
+        
+        # Per-stage latency histograms, written to the logs directory
+        TRACER.start_flushing(self.get_directory('logs'),
+                              self.config.get('metrics_flush_interval', 60))
+        if self.config.get('documents_index', True):
+            self.documents.start()
+        if self.config.get('media_index', True):
+            self.media.start()
+        # Pick up edits to the config file without a restart
+        self.config_store.watch(self.config.get('config_watch_interval', 1.0))
+    
+    @property
+    def engine(self):
+        """The TTS engine, or None until speech has been used (or if unavailable)"""
+        return self.speech.engine
+    
+    def _create_engine(self):
+        """Create and configure the TTS engine (runs on the speech worker)"""
+        pyttsx3 = STARTUP.import_module('pyttsx3')
+        with STARTUP.span("pyttsx3.init"):
+            engine = pyttsx3.init()
+        self.setup_voice(engine)
+        return engine
+    
+    def _create_audio_cache(self):
+        """Pre-rendered phrase cache and its player, or (None, None) if unusable"""
+        if not self.config.get('tts_cache', True):
+            return None, None
+        player = AudioPlayer()
+        if not player.available:
+            logger.info("No audio player found; speech audio cache disabled")
+            return None, None
+        try:
+            with STARTUP.span("audio cache"):
+                cache = AudioCache(
+                    self.get_directory('temp') / "tts",
+                    max_bytes=int(self.config.get('tts_cache_max_mb', 50) * 1024 * 1024),
+                    voice=voice_settings(self.config)
+                )
+            return cache, player
+        except Exception as e:
+            logger.error(f"Speech audio cache unavailable: {e}")
+            return None, None
+    
+    @property
+    def recognizer(self):
+        """Speech recognizer, created the first time voice input is used"""
+        if self._recognizer is None:
+            sr = STARTUP.import_module('speech_recognition')
+            recognizer = sr.Recognizer()
+            recognizer.pause_threshold = 0.8
+            recognizer.energy_threshold = 300
+            recognizer.dynamic_energy_threshold = True
+            self._recognizer = recognizer
+        return self._recognizer
+    
+    @property
+    def ai_enabled(self) -> bool:
+        """True when OpenAI is installed and an API key is configured"""
+        return OPENAI_AVAILABLE and bool(self.config.get('openai_api_key'))
+    
+    def openai_client_options(self, async_client: bool = False) -> Dict[str, Any]:
+        """Keyword arguments for constructing an OpenAI (or AsyncOpenAI) client"""
+        options = {'api_key': self.config['openai_api_key']}
+        options.update(self.transport.client_options(async_client))
+        # Point at any OpenAI-compatible endpoint (proxy, local server, benchmark stand-in)
+        if self.config.get('openai_base_url'):
+            options['base_url'] = self.config['openai_base_url']
+        return options
+    
+    @property
+    def client(self):
+        """OpenAI client, created on first use; None if not configured"""
+        if self._client is None and not self._client_failed and self.ai_enabled:
+            with self._client_lock:
+                if self._client is None and not self._client_failed:
+                    try:
+                        openai = STARTUP.import_module('openai')
+                        with STARTUP.span("OpenAI client"):
+                            self._client = openai.OpenAI(**self.openai_client_options())
+                        logger.info("OpenAI client initialized successfully")
+                    except Exception as e:
+                        logger.error(f"OpenAI initialization failed: {e}")
+                        self._client_failed = True
+        return self._client
+    
+    def default_config(self) -> Dict[str, Any]:
+        """Settings used for anything missing from the config file"""
+        return {
             'voice_rate': 175,
             'voice_volume': 0.9,
             'voice_index': 1,
             'openai_api_key': '',
+            'openai_base_url': '',
             'assistant_name': 'Assistant',
             'model': 'gpt-3.5-turbo',
-            'max_history': 10
+            'max_history': 10,
+            'history_token_budget': 0,
+            'cache_max_entries': 500,
+            'cache_ttl': 86400,
+            'stream_responses': True,
+            'save_sessions': True,
+            'microphone_index': None,
+            'persistent_capture': False,
+            'mic_calibration': {},
+            'recognition_backend': 'google',
+            'recognition_language': 'en-US',
+            'recognition_race': ['google', 'sphinx'],
+            'recognition_deadlines': {'google': 5.0, 'sphinx': 5.0, 'vosk': 5.0, 'whisper': 10.0},
+            'recognition_min_confidence': 0.6,
+            'openai_timeout': 30,
+            'openai_max_retries': 2,
+            'openai_backoff_base': 0.5,
+            'openai_backoff_max': 8,
+            'openai_breaker_threshold': 5,
+            'openai_breaker_reset': 30,
+            'openai_pool_size': 10,
+            'openai_keepalive': 120,
+            'metrics_flush_interval': 60,
+            'server_host': '127.0.0.1',
+            'server_port': 8765,
+            'server_workers': 4,
+            'server_max_queue': 16,
+            'server_request_timeout': 60,
+            'server_token': '',
+            'session_idle_timeout': 1800,
+            'session_max_live': 50,
+            'session_memory_limit_mb': 32,
+            'tts_cache': True,
+            'tts_cache_max_mb': 50,
+            'tts_cache_prewarm': True,
+            'gui_max_messages': 500,
+            'config_watch_interval': 1.0,
+            'action_workers': 2,
+            'action_timeout': 10,
+            'plugins_enabled': True,
+            'plugins_disabled': [],
+            'wikipedia_url': 'https://en.wikipedia.org',
+            'wikipedia_timeout': 5,
+            'wikipedia_cache_ttl': 604800,
+            'wikipedia_first': False,
+            'documents_index': True,
+            'documents_rag': False,
+            'documents_top_k': 3,
+            'documents_min_match': 0.6,
+            'documents_rescan_interval': 300,
+            'media_index': True,
+            'media_rescan_interval': 600
         }
+    
+    def _retire_client(self):
+        """Drop the OpenAI client so the next call creates one from the config
+
+        The old client and its connection pool are closed once calls still
+        running on them have had their full deadline to finish.
+        """
+        client, self._client = self._client, None
+        self._client_failed = False
+        self.client_generation += 1
+        if client is not None:
+            closer = threading.Timer(self.transport.deadline + 1, client.close)
+            closer.daemon = True
+            closer.start()
+    
+    def load_config(self) -> Dict[str, Any]:
+        """Load and validate configuration from file"""
+        return self.config_store.load()
+    
+    def _apply_config(self, changes: Dict[str, Any]):
+        """Apply settings edited in the config file to the running assistant
+
+        Runs on the config watcher thread. Voice changes are applied to the
+        live engine on the speech worker; the OpenAI client is recreated
+        only when the key, endpoint or connection settings changed.
+        """
+        keys = set(changes)
+        if keys & set(VOICE_SETTINGS):
+            self.speech.configure(self.setup_voice)
+        if keys & (self.TRANSPORT_KEYS | {'openai_api_key', 'openai_base_url'}):
+            self._retire_client()
+        if keys & self.TRANSPORT_KEYS:
+            self.transport = OpenAITransport.from_config(self.config)
+        if keys & {'model', 'max_history', 'history_token_budget'}:
+            for history in [self.conversation_history] + [
+                    session.history for session in self.session_registry.live()]:
+                history.set_budget(self.history_token_budget(),
+                                   self.config.get('max_history', 10))
+        if keys & {'cache_max_entries', 'cache_ttl'} and self.response_cache is not None:
+            self.response_cache.max_entries = self.config.get('cache_max_entries', 500)
+            self.response_cache.ttl = self.config.get('cache_ttl', 86400)
+        if any(key.startswith('recognition_') for key in keys) and self._speech_recognizer:
+            recognizer, self._speech_recognizer = self._speech_recognizer, None
+            recognizer.close()
+        if 'microphone_index' in keys:
+            self._mic_key = None
+        if 'documents_rescan_interval' in keys:
+            self.documents.rescan_interval = self.config.get('documents_rescan_interval', 300)
+        if 'media_rescan_interval' in keys:
+            self.media.rescan_interval = self.config.get('media_rescan_interval', 600)
+        if keys & {'session_idle_timeout', 'session_max_live', 'session_memory_limit_mb'}:
+            registry = self.session_registry
+            registry.idle_timeout = self.config.get('session_idle_timeout', 1800)
+            registry.max_sessions = self.config.get('session_max_live', 50)
+            registry.memory_limit = int(self.config.get('session_memory_limit_mb', 32) * 1024 * 1024)
         
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-                    # Merge with defaults to ensure all keys exist
-                    default_config.update(loaded_config)
-            except Exception as e:
-                logger.error(f"Failed to load config: {e}")
+        restart = sorted(key for key in keys if key.startswith('server_') or key in
+                         ('save_sessions', 'tts_cache', 'directories', 'metrics_flush_interval',
+                          'documents_index', 'media_index'))
+        if restart:
+            logger.info(f"Restart to apply: {', '.join(restart)}")
+    
+    def history_token_budget(self) -> int:
+        """Token budget for conversation history (0 in the config means per-model default)"""
+        budget = self.config.get('history_token_budget') or 0
+        return budget or budget_for_model(self.config.get('model', 'gpt-3.5-turbo'))
+    
+    def new_history(self) -> ConversationMemory:
+        """Empty conversation history with the configured limits"""
+        return ConversationMemory(
+            self.history_token_budget(),
+            max_messages=self.config.get('max_history', 10)
+        )
+    
+    @property
+    def conversation_history(self) -> ConversationMemory:
+        """History of the local user's session"""
+        return self.session.history
+    
+    @property
+    def session_id(self) -> str:
+        return self.session.session_id
+    
+    @session_id.setter
+    def session_id(self, value: str):
+        self.session.session_id = value
+    
+    def _record_message(self, message: Dict[str, str]):
+        """Append a history message to the session store"""
+        self.sessions.record(self.session_id, message.get('role', ''), message.get('content', ''))
+    
+    def new_session(self):
+        """Forget the current conversation and start a new session"""
+        self.conversation_history.clear()
+        self.session_id = new_session_id()
+    
+    def resume_last_session(self) -> int:
+        """Restore the most recent local session's context; returns messages restored"""
+        if not self.sessions:
+            return 0
+        
+        session_id = self.sessions.last_session()
+        if not session_id:
+            return 0
         
-        return default_config
+        # Only the tail that can fit in the context is read
+        limit = self.config.get('max_history') or 50
+        messages = self.sessions.tail(session_id, limit=limit)
+        self.conversation_history.restore(
+            [{"role": m['role'], "content": m['content']} for m in messages]
+        )
+        self.session_id = session_id
+        logger.info(f"Resumed session {session_id} ({len(messages)} messages)")
+        return len(messages)
     
-    def save_config(self) -> bool:
-        """Save configuration to file"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2)
-            logger.info("Configuration saved successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
-            return False
+    def get_directory(self, name: str) -> Path:
+        """Return a data directory from the config, defaulting to ~/AIAssistant/<name>"""
+        directories = self.config.get('directories', {})
+        if name in directories:
+            return Path(directories[name]).expanduser()
+        base = Path(directories.get('base', Path.home() / "AIAssistant")).expanduser()
+        return base if name == 'base' else base / name
+    
+    def save_config(self, wait: bool = False) -> bool:
+        """Save configuration to file
+
+        Writes are batched: several calls in quick succession cost one
+        write. With wait=True the file is written before returning.
+        """
+        self.config_store.save()
+        if wait:
+            return self.config_store.flush()
+        return True
     
-    def setup_voice(self):
+    def setup_voice(self, engine=None):
         """Configure text-to-speech voice"""
-        if not self.engine:
+        engine = engine or self.engine
+        if not engine:
             return
         
         try:
-            voices = self.engine.getProperty('voices')
+            voices = engine.getProperty('voices')
             if voices:
                 voice_idx = self.config.get('voice_index', 1)
                 voice_idx = min(voice_idx, len(voices) - 1)
-                self.engine.setProperty('voice', voices[voice_idx].id)
+                engine.setProperty('voice', voices[voice_idx].id)
             
-            self.engine.setProperty('rate', self.config.get('voice_rate', 175))
-            self.engine.setProperty('volume', self.config.get('voice_volume', 0.9))
+            engine.setProperty('rate', self.config.get('voice_rate', 175))
+            engine.setProperty('volume', self.config.get('voice_volume', 0.9))
+            if self.speech.audio_cache is not None:
+                # Renderings made with other voice settings no longer match
+                self.speech.audio_cache.voice = voice_settings(self.config)
         except Exception as e:
             logger.error(f"Voice setup failed: {e}")
     
-    def speak(self, text: str, print_text: bool = True):
-        """Text-to-speech output"""
+    def speak(self, text: str, print_text: bool = True, wait: bool = True,
+              priority: int = PRIORITY_NORMAL, cache: bool = False) -> Utterance:
+        """Text-to-speech output
+
+        Speech is queued on the speech worker; with wait=False this returns
+        as soon as the text is queued. cache=True plays (and keeps) the
+        text as pre-rendered audio; use it for fixed phrases only.
+        """
         if print_text:
             print(f"🤖 {text}")
         
-        if not self.engine:
+        utterance = self.speech.say(text, priority, cache=cache)
+        if wait:
+            utterance.wait()
+        return utterance
+    
+    def reply_is_cacheable(self) -> bool:
+        """Whether the last reply came from a route with fixed wording"""
+        route = self.last_route
+        return route is not None and route.rule.name.split(':')[0] in self.CACHED_ROUTES
+    
+    def common_phrases(self) -> List[str]:
+        """Fixed phrases worth rendering ahead of time"""
+        phrases = [self.greet(hour) for hour in (6, 12, 18)]
+        phrases += [self.GOODBYE, self.get_help()]
+        phrases += [f"Opening {site.title()}" for site in self.WEBSITES]
+        return phrases
+    
+    def prewarm_speech(self):
+        """Render the common phrases in the background so they play instantly"""
+        if not self.config.get('tts_cache_prewarm', True):
             return
+        queued = self.speech.prewarm(self.common_phrases())
+        if queued:
+            logger.info(f"Rendering {queued} phrases into the speech audio cache")
+    
+    def _saved_threshold(self) -> Optional[float]:
+        """Energy threshold calibrated for the configured microphone in an earlier run"""
+        if self._mic_key is None:
+            self._mic_key = device_key(self.config.get('microphone_index'))
+        return self.config.get('mic_calibration', {}).get(self._mic_key)
+    
+    def _remember_threshold(self, threshold: float):
+        """Keep the latest calibration; it is written to the config on shutdown"""
+        saved = self._saved_threshold()
+        if saved is None or abs(threshold - saved) > 0.1 * saved:
+            self.config.setdefault('mic_calibration', {})[self._mic_key] = round(threshold, 1)
+            self._calibration_dirty = True
+    
+    def _get_capture(self) -> MicrophoneCapture:
+        """Open the persistent microphone stream on first use"""
+        if self._capture is None:
+            self._capture = MicrophoneCapture(
+                device_index=self.config.get('microphone_index'),
+                energy_threshold=self._saved_threshold(),
+                pause_threshold=self.recognizer.pause_threshold,
+                # Don't capture the assistant's own voice
+                suppress=lambda: self.speech.speaking
+            )
+        return self._capture
+    
+    def capture_audio(self, timeout: float = 5, phrase_time_limit: float = 10):
+        """Record one spoken phrase; returns AudioData or None on timeout
+
+        With persistent_capture the microphone stays open between turns and
+        speech that started just before this call is kept. Otherwise the
+        microphone is opened per call, reusing the saved calibration instead
+        of measuring ambient noise every time.
+        """
+        sr = STARTUP.import_module('speech_recognition')
+        
+        if self.config.get('persistent_capture'):
+            capture = self._get_capture()
+            print("🎤 Listening...")
+            with TRACER.span('listen.capture'):
+                audio = capture.capture(timeout, phrase_time_limit)
+            if audio is None:
+                logger.warning("Listening timeout - no speech detected")
+            self._remember_threshold(capture.energy_threshold)
+            return audio
         
+        microphone = self.microphone_factory or sr.Microphone
+        with TRACER.span('listen.mic_open'):
+            mic = microphone(device_index=self.config.get('microphone_index'))
+            source = mic.__enter__()
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as e:
-            logger.error(f"Speech error: {e}")
+            threshold = self._saved_threshold()
+            if threshold is None:
+                with TRACER.span('listen.calibrate'):
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            else:
+                self.recognizer.energy_threshold = threshold
+            
+            print("🎤 Listening...")
+            try:
+                with TRACER.span('listen.capture'):
+                    audio = self.recognizer.listen(source, timeout=timeout,
+                                                   phrase_time_limit=phrase_time_limit)
+            except sr.WaitTimeoutError:
+                logger.warning("Listening timeout - no speech detected")
+                return None
+        finally:
+            mic.__exit__(None, None, None)
+        
+        self._remember_threshold(self.recognizer.energy_threshold)
+        return audio
+    
+    @property
+    def speech_recognizer(self) -> SpeechRecognizer:
+        """Recognition backend(s) selected in the config, created on first use"""
+        if self._speech_recognizer is None:
+            self._speech_recognizer = SpeechRecognizer(self.config)
+        return self._speech_recognizer
+    
+    def recognize(self, audio) -> str:
+        """Turn captured audio into text using the configured backend(s)"""
+        with TRACER.span('recognize'):
+            result = self.speech_recognizer.recognize(audio)
+        logger.info(f"Recognized by {result.backend} in {result.elapsed:.2f}s "
+                    f"(confidence {result.confidence:.2f})")
+        return result.text
     
     def listen(self) -> Optional[str]:
         """Listen for voice input"""
         try:
-            with sr.Microphone() as source:
-                print("🎤 Listening...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                try:
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                except sr.WaitTimeoutError:
-                    logger.warning("Listening timeout - no speech detected")
-                    return None
-                
+            sr = STARTUP.import_module('speech_recognition')
+        except ImportError:
+            logger.error("SpeechRecognition not installed. Run: pip install SpeechRecognition")
+            print("❌ Voice input is not available")
+            return None
+        
+        try:
+            audio = self.capture_audio()
+            if audio is None:
+                return None
+            
             print("🔄 Recognizing...")
-            query = self.recognizer.recognize_google(audio, language='en-US')
+            query = self.recognize(audio)
             print(f"👤 You said: {query}")
             return query.lower()
             
@@ -170,47 +687,180 @@ class AIAssistant:
             logger.error(f"Listening error: {e}")
             return None
     
-    def ask_openai(self, query: str) -> str:
-        """Query OpenAI API with conversation context"""
+    def system_prompt(self, session: Optional[Session] = None) -> str:
+        """System prompt, naming the assistant if the session chose a name"""
+        if session is not None and session.assistant_name:
+            return f"Your name is {session.assistant_name}. {SYSTEM_PROMPT}"
+        return SYSTEM_PROMPT
+    
+    def search_documents(self, query: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Best matching passages from the user's documents (may be empty)"""
+        with TRACER.span('documents.search'):
+            return self.documents.search(
+                query,
+                k or self.config.get('documents_top_k', 3),
+                self.config.get('documents_min_match', 0.6)
+            )
+    
+    def document_context(self, query: str, session: Optional[Session] = None) -> Optional[str]:
+        """System message quoting the passages relevant to query, if any
+
+        Never for remote (server) sessions: the reply would reveal them.
+        """
+        if not self.config.get('documents_rag', False):
+            return None
+        if session is not None and session.remote:
+            return None
+        passages = self.search_documents(query)
+        if not passages:
+            return None
+        quoted = "\n\n".join(f"[{p['path']}]\n{p['text']}" for p in passages)
+        return ("Excerpts from the user's own documents that may help answer. "
+                "Use them if relevant and mention the file name:\n\n" + quoted)
+    
+    def document_answer(self, query: str) -> Optional[str]:
+        """Answer straight from the best matching passage (no AI needed)"""
+        passages = self.search_documents(query, k=1)
+        if not passages:
+            return None
+        text = passages[0]['text']
+        if len(text) > 300:
+            text = text[:300].rsplit(' ', 1)[0] + "..."
+        return f"From your documents ({passages[0]['path']}): {text}"
+    
+    def completion_options(self, session: Optional[Session] = None) -> Dict[str, Any]:
+        """Sampling options for a chat completion"""
+        temperature = session.temperature if session is not None else None
+        return {'max_tokens': 300, 'temperature': 0.7 if temperature is None else temperature}
+    
+    def prepare_chat(self, query: str, history: Optional[list] = None,
+                     session: Optional[Session] = None):
+        """Record the user message and build the request for it
+
+        Returns (messages, model, cache_key). history defaults to the
+        session's history, and the session defaults to the local one;
+        its assistant name and model override the config.
+        """
+        if session is None:
+            session = self.session
+        if history is None:
+            history = session.history
+        
+        # Add user message to history
+        history.append({"role": "user", "content": query})
+        
+        # Recent turns within the token budget, plus a summary of older ones
+        if isinstance(history, ConversationMemory):
+            context = history.context()
+        else:
+            context = history[-self.config.get('max_history', 10):]
+        
+        # Add system message
+        system_prompt = self.system_prompt(session)
+        messages = [
+            {
+                "role": "system", 
+                "content": system_prompt
+            }
+        ] + context
+        
+        # Passages from the user's documents go right after the system
+        # prompt; they are part of the cache key but never of the history
+        excerpts = self.document_context(query, session)
+        if excerpts:
+            messages.insert(1, {"role": "system", "content": excerpts})
+        
+        model = session.model or self.config.get('model', 'gpt-3.5-turbo')
+        # A resubmitted message (e.g. a double click) keys like the first one
+        key_context = messages[1:-1]
+        while key_context and key_context[-1] == messages[-1]:
+            key_context = key_context[:-1]
+        cache_key = make_key(query, model, system_prompt, key_context)
+        return messages, model, cache_key
+    
+    def ask_openai(self, query: str, on_token: Optional[Callable[[str], None]] = None,
+                   session: Optional[Session] = None) -> str:
+        """Query OpenAI API with conversation context
+
+        When on_token is given the reply is streamed and each token is passed
+        to it as soon as it arrives; the full answer is still returned.
+        session defaults to the local user's session.
+        """
         if not self.client:
             return "OpenAI is not configured. Please set your API key using: python ai_assistant.py --config"
         
+        if session is None:
+            session = self.session
+        
         try:
-            # Add user message to history
-            self.conversation_history.append({"role": "user", "content": query})
-            
-            # Keep only last N messages for context
-            max_history = self.config.get('max_history', 10)
-            context = self.conversation_history[-max_history:]
+            messages, model, cache_key = self.prepare_chat(query, session=session)
             
-            # Add system message
-            messages = [
-                {
-                    "role": "system", 
-                    "content": "You are a helpful, friendly AI assistant. Keep responses concise and natural."
-                }
-            ] + context
+            # Serve repeated questions from the response cache
+            answer = self.response_cache.get(cache_key)
+            if answer is not None:
+                if on_token:
+                    on_token(answer)
+                session.history.append({"role": "assistant", "content": answer})
+                return answer
             
             # Call OpenAI API
-            model = self.config.get('model', 'gpt-3.5-turbo')
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7
-            )
+            options = self.completion_options(session)
+            
+            def complete(emit: Optional[Callable[[str], None]]) -> str:
+                with TRACER.span('openai.request'):
+                    if emit:
+                        return self._stream_completion(model, messages, emit, **options)
+                    response = self.transport.call(
+                        self.client.chat.completions.create,
+                        model=model,
+                        messages=messages,
+                        **options
+                    )
+                    return response.choices[0].message.content.strip()
+            
+            # Identical requests already in flight share one upstream call
+            answer, shared = self.inflight.do(cache_key, complete, on_token)
             
-            answer = response.choices[0].message.content.strip()
+            if answer and not shared:
+                self.response_cache.put(cache_key, answer)
             
             # Add assistant response to history
-            self.conversation_history.append({"role": "assistant", "content": answer})
+            session.history.append({"role": "assistant", "content": answer})
             
             return answer
             
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            return "The AI service is having trouble right now. Please try again in a moment."
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
     
+    def _stream_completion(self, model: str, messages: list,
+                           on_token: Callable[[str], None], **options) -> str:
+        """Stream a chat completion, forwarding tokens as they arrive"""
+        start = time.perf_counter()
+        stream = self.transport.call(
+            self.client.chat.completions.create,
+            model=model,
+            messages=messages,
+            stream=True,
+            **(options or self.completion_options())
+        )
+        
+        parts = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                if not parts:
+                    TRACER.record('openai.first_token', time.perf_counter() - start)
+                parts.append(token)
+                on_token(token)
+        
+        return "".join(parts).strip()
+    
     def get_time(self) -> str:
         """Get current time"""
         now = datetime.datetime.now()
@@ -223,9 +873,10 @@ class AIAssistant:
         date_str = now.strftime("%A, %B %d, %Y")
         return f"Today is {date_str}"
     
-    def greet(self) -> str:
-        """Greet the user"""
-        hour = datetime.datetime.now().hour
+    def greet(self, hour: Optional[int] = None) -> str:
+        """Greet the user (for the given hour of the day, default now)"""
+        if hour is None:
+            hour = datetime.datetime.now().hour
         if hour < 12:
             greeting = "Good morning"
         elif hour < 18:
@@ -236,104 +887,155 @@ class AIAssistant:
         name = self.config.get('assistant_name', 'Assistant')
         return f"{greeting}! I'm {name}, your AI assistant. How can I help you?"
     
-    def process_command(self, query: str) -> Optional[str]:
-        """Process user command"""
+    def _build_router(self) -> IntentRouter:
+        """Compile the command routing table (checked in registration order)"""
+        router = IntentRouter()
+        # First, so song titles like "Bye Bye Bye" aren't taken as commands
+        router.add_rule('play', self._cmd_play, anchored=('play',))
+        router.add_rule('exit', lambda m: "exit",
+                        triggers=('exit', 'quit', 'bye', 'goodbye'))
+        router.add_rule('help', lambda m: self.get_help(),
+                        triggers=('help', 'what can you do'))
+        router.add_rule('time', lambda m: self.get_time(), triggers=('time',))
+        router.add_rule('date', lambda m: self.get_date(),
+                        triggers=('date', 'day', 'today'))
+        router.add_rule('google', self._cmd_google,
+                        triggers=('open google',), anchored=('google',))
+        router.add_rule('youtube', self._cmd_youtube,
+                        triggers=('open youtube', 'youtube'))
+        for site in self.WEBSITES:
+            router.add_rule(f'website:{site}', self._cmd_website,
+                            triggers=(site,), all_of=('open',))
+        router.add_rule('search', self._cmd_search, triggers=self.SEARCH_WORDS)
+        self.plugins.register(router, self)
+        router.set_fallback('chat', self._cmd_chat)
+        return router
+    
+    @staticmethod
+    def _is_remote(match: RouteMatch) -> bool:
+        """Whether a command came from a server client rather than the local user"""
+        session = match.context.get('session')
+        return session is not None and session.remote
+    
+    def _open_url(self, match: RouteMatch, url: str, success: str, failure: str) -> str:
+        """Queue a URL to open in the browser and return the reply for the user
+
+        The reply doesn't wait for the browser; a failure is reported later
+        through the action executor's subscribers. Server clients get the
+        link instead, so they can't open pages on this computer.
+        """
+        if self._is_remote(match):
+            return f"Here's the link: {url}"
+        if self.actions.submit(Action(OPEN_URL, url, failure)) is None:
+            return failure
+        return success
+    
+    def _report_action(self, result: ActionResult):
+        """Tell the terminal user about a background action that failed"""
+        if result.ok or not result.action.failure or not self.running:
+            return
+        print(f"\n⚠️  {result.action.failure}")
+        self.speak(result.action.failure, print_text=False, wait=False, cache=True)
+    
+    def _cmd_google(self, match: RouteMatch) -> str:
+        """Open Google, searching for the rest of the query if any"""
+        search_query = match.remainder('open google', 'google')
+        if search_query:
+            return self._open_url(match, f"https://www.google.com/search?q={search_query}",
+                                  f"Searching Google for: {search_query}",
+                                  "Sorry, I couldn't open your browser")
+        return self._open_url(match, "https://www.google.com", "Opening Google",
+                              "Sorry, I couldn't open your browser")
+    
+    def _cmd_youtube(self, match: RouteMatch) -> str:
+        """Open YouTube, searching for the rest of the query if any"""
+        search_query = match.remainder('open youtube', 'youtube')
+        if search_query:
+            return self._open_url(match, f"https://www.youtube.com/results?search_query={search_query}",
+                                  f"Searching YouTube for: {search_query}",
+                                  "Sorry, I couldn't open your browser")
+        return self._open_url(match, "https://www.youtube.com", "Opening YouTube",
+                              "Sorry, I couldn't open your browser")
+    
+    def _cmd_play(self, match: RouteMatch) -> str:
+        """Play a file from the media library, or search YouTube for it"""
+        words = match.remainder('play').split()
+        kind = None
+        while words and (words[0] in ('the', 'a', 'some', 'my') or words[0] in self.MEDIA_WORDS):
+            kind = self.MEDIA_WORDS.get(words[0], kind)
+            words = words[1:]
+        query = " ".join(word for word in words if word != 'by')
+        if not query:
+            return "What would you like me to play?"
+        if self._is_remote(match):
+            # Server clients can neither browse the library nor play files here
+            return f"Here's a YouTube search for it: https://www.youtube.com/results?search_query={query}"
+        
+        with TRACER.span('media.lookup'):
+            item = self.media.find(query, kind)
+        if item is None:
+            return self._open_url(match, f"https://www.youtube.com/results?search_query={query}",
+                                  f"I couldn't find {query} in your library, so I'm searching YouTube",
+                                  "Sorry, I couldn't open your browser")
+        failure = f"Sorry, I couldn't play {item.label}"
+        if self.actions.submit(Action(OPEN_FILE, item.path, failure)) is None:
+            return failure
+        return f"Playing {item.label}"
+    
+    def _cmd_website(self, match: RouteMatch) -> str:
+        """Open one of the known websites"""
+        site = match.keyword
+        return self._open_url(match, self.WEBSITES[site], f"Opening {site.title()}",
+                              f"Sorry, I couldn't open {site}")
+    
+    def _cmd_search(self, match: RouteMatch) -> Optional[str]:
+        """Search the web for the rest of the query"""
+        search_query = match.remainder(*self.SEARCH_WORDS)
+        if not search_query:
+            return self._cmd_chat(match)
+        return self._open_url(match, f"https://www.google.com/search?q={search_query}",
+                              f"Searching for: {search_query}",
+                              "Sorry, I couldn't perform the search")
+    
+    def _cmd_chat(self, match: RouteMatch) -> str:
+        """Use OpenAI for general queries"""
+        return self.chat(match.query, on_token=match.context.get('on_token'),
+                         session=match.context.get('session'))
+    
+    def chat(self, query: str, on_token: Optional[Callable[[str], None]] = None,
+             session: Optional[Session] = None) -> str:
+        """Answer a query with AI chat, skipping the command router
+
+        For plugins that handle a question only sometimes. Without an
+        OpenAI key the best matching document passage (local user only),
+        or a hint, is returned instead.
+        """
+        if self.client:
+            return self.ask_openai(query, on_token=on_token, session=session)
+        if session is None or not session.remote:
+            answer = self.document_answer(query)
+            if answer:
+                return answer
+        return ("I can help with time, date, opening websites, and web searches. "
+                "For advanced AI features, please configure your OpenAI API key using: "
+                "python ai_assistant.py --config")
+    
+    def process_command(self, query: str,
+                        on_token: Optional[Callable[[str], None]] = None,
+                        session: Optional[Session] = None) -> Optional[str]:
+        """Process user command
+
+        on_token is forwarded to ask_openai so AI replies can be streamed;
+        session selects whose conversation an AI reply continues.
+        The rule that handled the query is kept in self.last_route.
+        """
         if not query:
             return None
         
         query = query.lower().strip()
-        
-        # Exit commands
-        if any(word in query for word in ['exit', 'quit', 'bye', 'goodbye']):
-            return "exit"
-        
-        # Help command
-        if 'help' in query or 'what can you do' in query:
-            return self.get_help()
-        
-        # Time
-        if 'time' in query:
-            return self.get_time()
-        
-        # Date
-        if any(word in query for word in ['date', 'day', 'today']) and 'update' not in query:
-            return self.get_date()
-        
-        # Open Google
-        if 'open google' in query or query.startswith('google '):
-            search_query = query.replace('open google', '').replace('google', '').strip()
-            if search_query:
-                try:
-                    webbrowser.open(f"https://www.google.com/search?q={search_query}")
-                    return f"Searching Google for: {search_query}"
-                except Exception as e:
-                    logger.error(f"Failed to open browser: {e}")
-                    return "Sorry, I couldn't open your browser"
-            else:
-                try:
-                    webbrowser.open("https://www.google.com")
-                    return "Opening Google"
-                except Exception as e:
-                    logger.error(f"Failed to open browser: {e}")
-                    return "Sorry, I couldn't open your browser"
-        
-        # Open YouTube
-        if 'youtube' in query:
-            search_query = query.replace('open youtube', '').replace('youtube', '').strip()
-            if search_query:
-                try:
-                    webbrowser.open(f"https://www.youtube.com/results?search_query={search_query}")
-                    return f"Searching YouTube for: {search_query}"
-                except Exception as e:
-                    logger.error(f"Failed to open browser: {e}")
-                    return "Sorry, I couldn't open your browser"
-            else:
-                try:
-                    webbrowser.open("https://www.youtube.com")
-                    return "Opening YouTube"
-                except Exception as e:
-                    logger.error(f"Failed to open browser: {e}")
-                    return "Sorry, I couldn't open your browser"
-        
-        # Open websites
-        websites = {
-            'github': 'https://github.com',
-            'linkedin': 'https://linkedin.com',
-            'twitter': 'https://twitter.com',
-            'facebook': 'https://facebook.com',
-            'reddit': 'https://reddit.com',
-            'gmail': 'https://gmail.com'
-        }
-        
-        for site, url in websites.items():
-            if site in query and 'open' in query:
-                try:
-                    webbrowser.open(url)
-                    return f"Opening {site.title()}"
-                except Exception as e:
-                    logger.error(f"Failed to open {site}: {e}")
-                    return f"Sorry, I couldn't open {site}"
-        
-        # Search web
-        if any(word in query for word in ['search for', 'search', 'look up', 'find']):
-            search_query = query
-            for word in ['search for', 'search', 'look up', 'find']:
-                search_query = search_query.replace(word, '').strip()
-            if search_query:
-                try:
-                    webbrowser.open(f"https://www.google.com/search?q={search_query}")
-                    return f"Searching for: {search_query}"
-                except Exception as e:
-                    logger.error(f"Failed to search: {e}")
-                    return "Sorry, I couldn't perform the search"
-        
-        # Use OpenAI for general queries
-        if self.client:
-            return self.ask_openai(query)
-        else:
-            return ("I can help with time, date, opening websites, and web searches. "
-                   "For advanced AI features, please configure your OpenAI API key using: "
-                   "python ai_assistant.py --config")
+        self.last_route, response = self.router.dispatch(query, on_token=on_token,
+                                                         session=session)
+        return response
     
     def get_help(self) -> str:
         """Return help message"""
@@ -342,9 +1044,11 @@ class AIAssistant:
 • Date: "what's the date?"
 • Search: "search for [topic]"
 • Websites: "open google/youtube/github/etc"
+• Documents: ask about anything in your documents folder
+• Play: "play bohemian rhapsody" (from your music and videos folders)
 • Exit: "exit" or "quit"
 • Help: "help" or "what can you do?"
-""" + ("• AI Chat: Ask me anything!" if self.client else "• Configure OpenAI for AI chat features")
+""" + "".join(f"• {line}\n" for line in self.plugins.help_lines()) + ("• AI Chat: Ask me anything!" if self.ai_enabled else "• Configure OpenAI for AI chat features")
     
     def run_terminal(self):
         """Run in terminal mode"""
@@ -356,34 +1060,55 @@ class AIAssistant:
         print("  - Type your questions directly")
         print("  - Say 'exit' to quit")
         print("  - Say 'help' for available commands")
+        print("  - Say 'stop' to interrupt speech")
+        print("  - Say 'stats' to show response latencies")
         print("\n" + "="*60 + "\n")
         
+        # Browser failures are reported when they happen, between prompts
+        self.actions.subscribe(self._report_action)
+        
         # Greet user
         greeting = self.greet()
-        self.speak(greeting)
+        self.speak(greeting, wait=False, cache=True)
+        self.prewarm_speech()
         
         while self.running:
             try:
-                user_input = input("\n👤 You: ").strip()
+                user_input = input(f"\n👤 You{self._speech_indicator()}: ").strip()
                 
                 if not user_input:
                     continue
                 
+                # A new message interrupts whatever is still being spoken
+                self.speech.interrupt()
+                
+                if user_input.lower() == 'stop':
+                    continue
+                
+                if user_input.lower() == 'stats':
+                    print(TRACER.format_stats())
+                    coalesced = self.inflight.stats()
+                    print(f"AI calls: {coalesced['upstream']} made, {coalesced['saved']} saved by sharing")
+                    continue
+                
+                turn_start = time.perf_counter()
+                
                 # Voice input mode
                 if user_input.lower() == 'listen':
                     query = self.listen()
-                    if query:
-                        response = self.process_command(query)
-                    else:
+                    if not query:
                         continue
                 else:
-                    response = self.process_command(user_input)
+                    query = user_input
+                
+                response, streamed = self._respond_streaming(query)
+                TRACER.record('turn', time.perf_counter() - turn_start)
                 
                 if response == "exit":
-                    self.speak("Goodbye! Have a great day!")
+                    self.speak(self.GOODBYE, cache=True)
                     break
-                elif response:
-                    self.speak(response)
+                elif response and not streamed:
+                    self.speak(response, wait=False, cache=self.reply_is_cacheable())
                     
             except KeyboardInterrupt:
                 print("\n\n👋 Interrupted by user")
@@ -392,6 +1117,69 @@ class AIAssistant:
                 logger.error(f"Error in terminal loop: {e}")
                 print(f"❌ Error: {e}")
     
+    def _speech_indicator(self) -> str:
+        """Short prompt suffix describing speech output, e.g. ' (🔊 +2)'"""
+        status = self.speech.status()
+        if not status['speaking'] and not status['queued']:
+            return ""
+        queued = f" +{status['queued']}" if status['queued'] else ""
+        return f" (🔊{queued})"
+    
+    def _respond_streaming(self, query: str):
+        """Process a command, printing and speaking AI tokens as they arrive
+
+        Returns (response, streamed); streamed is True when the response was
+        already printed and spoken incrementally.
+        """
+        if not (self.ai_enabled and self.config.get('stream_responses', True)):
+            return self.process_command(query), False
+        
+        speaker = StreamingSpeaker(self.speech) if self.speech.enabled else None
+        started = False
+        
+        def on_token(token: str):
+            nonlocal started
+            if not started:
+                print("🤖 ", end="", flush=True)
+                started = True
+            print(token, end="", flush=True)
+            if speaker:
+                speaker.feed(token)
+        
+        try:
+            response = self.process_command(query, on_token=on_token)
+        finally:
+            if started:
+                print()
+            if speaker:
+                speaker.finish(wait=False)
+        
+        return response, started
+    
+    def shutdown(self):
+        """Release resources held by the assistant"""
+        self.running = False
+        if self._capture:
+            self._capture.close()
+        if self._speech_recognizer:
+            self._speech_recognizer.close()
+        if self._calibration_dirty:
+            self.save_config()
+        self.config_store.close()
+        self.speech.shutdown()
+        self.actions.shutdown()
+        self.documents.close()
+        self.media.close()
+        self.plugins.shutdown()
+        if self.response_cache is not None:
+            self.response_cache.close()
+        if self._client is not None:
+            self._client.close()
+        if self.sessions:
+            self.session_registry.close()
+            self.sessions.close()
+        TRACER.stop()
+    
     def run_gui(self):
         """Run with GUI (imported separately to keep dependencies optional)"""
         try:
@@ -409,6 +1197,11 @@ class AIAssistant:
             print("Running in terminal mode instead.")
             self.run_terminal()
 
+    def run_server(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Serve the assistant over HTTP and WebSocket until interrupted"""
+        from ai_assistant_server import serve
+        serve(self, host, port)
+
 def main():
     """Main entry point"""
     import argparse
@@ -421,16 +1214,45 @@ Examples:
   python ai_assistant.py              # Run with GUI
   python ai_assistant.py --terminal   # Run in terminal mode
   python ai_assistant.py --config     # Configure settings
+  python ai_assistant.py --resume     # Continue the last conversation
+  python ai_assistant.py --serve      # Local HTTP/WebSocket API on port 8765
+  python ai_assistant.py --startup-profile  # Show where startup time goes
         """
     )
     parser.add_argument('--terminal', '-t', action='store_true', 
                        help='Run in terminal mode')
     parser.add_argument('--config', '-c', action='store_true',
                        help='Configure OpenAI API key and settings')
+    parser.add_argument('--resume', '-r', action='store_true',
+                       help='Resume the last conversation')
+    parser.add_argument('--mute', '-m', action='store_true',
+                       help='Text only: never load the text-to-speech engine')
+    parser.add_argument('--serve', '-s', action='store_true',
+                       help='Serve the assistant over a local HTTP/WebSocket API')
+    parser.add_argument('--host', help='Address to serve on (default: server_host in the config)')
+    parser.add_argument('--port', type=int, help='Port to serve on (default: server_port in the config)')
+    parser.add_argument('--startup-profile', action='store_true',
+                       help='Print import/initializer timings and exit')
+    parser.add_argument('--startup-budget', type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                       metavar='MS',
+                       help='With --startup-profile, exit with status 1 if startup '
+                            f'takes longer than MS milliseconds (default: {DEFAULT_STARTUP_BUDGET_MS})')
     
     args = parser.parse_args()
     
-    assistant = AIAssistant(use_gui=not args.terminal)
+    with STARTUP.span("AIAssistant()"):
+        assistant = AIAssistant(use_gui=not (args.terminal or args.serve),
+                                mute=args.mute or args.config or args.startup_profile or args.serve)
+    
+    if args.startup_profile:
+        elapsed = STARTUP.elapsed_ms()
+        print(STARTUP.report())
+        assistant.shutdown()
+        if elapsed > args.startup_budget:
+            print(f"❌ Startup took {elapsed:.0f} ms, over the {args.startup_budget:.0f} ms budget")
+            sys.exit(1)
+        print(f"✅ Startup took {elapsed:.0f} ms (budget {args.startup_budget:.0f} ms)")
+        return
     
     if args.config:
         print("\n🔧 Configuration")
@@ -439,26 +1261,39 @@ Examples:
         api_key = input("Enter your OpenAI API key (or press Enter to skip): ").strip()
         if api_key:
             assistant.config['openai_api_key'] = api_key
-            if assistant.save_config():
-                print("✅ API key saved!")
         
         name = input("Enter assistant name (default: Assistant): ").strip()
         if name:
             assistant.config['assistant_name'] = name
-            if assistant.save_config():
-                print(f"✅ Assistant name set to: {name}")
         
         model = input("Enter OpenAI model (default: gpt-3.5-turbo): ").strip()
         if model:
             assistant.config['model'] = model
-            if assistant.save_config():
+        
+        # One write for all answers
+        if (api_key or name or model) and assistant.save_config(wait=True):
+            if api_key:
+                print("✅ API key saved!")
+            if name:
+                print(f"✅ Assistant name set to: {name}")
+            if model:
                 print(f"✅ Model set to: {model}")
         
         print("\n" + "="*60)
+        assistant.shutdown()
         return
     
     try:
-        if args.terminal:
+        assistant.start_services()
+        if args.resume:
+            restored = assistant.resume_last_session()
+            if restored:
+                print(f"📂 Resumed last session ({restored} messages)")
+            else:
+                print("📂 No previous session to resume")
+        if args.serve:
+            assistant.run_server(args.host, args.port)
+        elif args.terminal:
             assistant.run_terminal()
         else:
             assistant.run_gui()
@@ -466,6 +1301,8 @@ Examples:
         logger.error(f"Fatal error: {e}")
         print(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        assistant.shutdown()
 
 if __name__ == "__main__":
     main()